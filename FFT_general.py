@@ -1,6 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
+import precision
+import nufft
 
 #Created by Max Curie: 05/15/2021
 #GitHub: https://github.com/maxcurie1996/Python_Demo/tree/main/FFT
@@ -28,37 +30,7 @@ def sort_x_f(x_unsort,f_unsort):
 
 
 def FFT_function_time(function,time,plot=False): 
-    time=np.array(time)
-    time,function=sort_x_f(time,function)
-
-    dt=time[1:]-time[:-1]
-    dt_min=np.mean(dt)
-    
-    if abs(np.std(dt))>=np.min(dt)*0.01:
-        print('time step is NOT uniform. interperlating')
-        uni_time = np.linspace(min(time),max(time),int(abs((max(time)-min(time))/dt_min)*1.5)) #uniform time
-        uni_function = np.interp(uni_time,time,function)
-    else:
-        uni_time=time
-        uni_function=function
-
-
-    timestep=np.mean(abs(uni_time[1:]-uni_time[:-1]))
-    print('avg_dt='+str(np.mean(abs(uni_time[1:]-uni_time[:-1]))))
-    print('std_dt='+str(np.std(abs(uni_time[1:]-uni_time[:-1]))))
-    norm=1./float(len(uni_time))  #normalizing factor
-    amplitude_complex = np.fft.fft(uni_function)
-    #print(str(time.shape[-1]))
-    #output_x = np.fft.fftfreq(t.shape[-1])
-    frequency = np.fft.fftfreq(uni_time.shape[-1], d=timestep)
-    amplitude_frequency=abs(norm*amplitude_complex)
-    #amplitude_frequency=norm*amplitude_complex.real
-    phase_frequency=np.angle(amplitude_complex)
-
-
-    #Sort frequency to monotonic increase
-    frequency_sort,amplitude_frequency_sort=sort_x_f(frequency,amplitude_frequency)
-    frequency_sort,phase_frequency_sort=sort_x_f(frequency,phase_frequency)
+    frequency_sort,amplitude_frequency_sort,phase_frequency_sort=FFT_function_time_batch(function,time)
 
     if plot==True:
         #plt.plot(frequency,amplitude_frequency)
@@ -72,6 +44,40 @@ def FFT_function_time(function,time,plot=False):
         plt.show()
     return frequency_sort,amplitude_frequency_sort,phase_frequency_sort
 
+def FFT_function_time_batch(function,time):
+    #FFT_function_time for a stack of signals function (..., nt) sampled at
+    #the same times, e.g. an (nky, nkx, nt) array: the times are sorted and
+    #checked for uniformity once and all spectra are computed in one call.
+    #returns the frequency grid shared by all signals and the amplitude and
+    #phase, both of shape (..., nt), sorted by frequency
+    time=np.array(time)
+    order=np.argsort(time,kind='stable')
+    time=time[order]
+    function=np.asarray(function)[...,order]
+
+    dt=time[1:]-time[:-1]
+
+    timestep=np.mean(abs(dt))
+    print('avg_dt='+str(np.mean(abs(dt))))
+    print('std_dt='+str(np.std(abs(dt))))
+    norm=1./float(len(time))  #normalizing factor
+    if abs(np.std(dt))>=np.min(dt)*0.01:
+        print('time step is NOT uniform. using nonuniform FFT')
+        #the DFT sums are evaluated at the sample times, no interpolation
+        frequency,amplitude_complex = nufft.fft(time,function)
+    else:
+        amplitude_complex = precision.fft(function)
+        #print(str(time.shape[-1]))
+        #output_x = np.fft.fftfreq(t.shape[-1])
+        frequency = np.fft.fftfreq(time.shape[-1], d=timestep)
+    amplitude_frequency=abs(norm*amplitude_complex)
+    #amplitude_frequency=norm*amplitude_complex.real
+    phase_frequency=np.angle(amplitude_complex)
+
+    #Sort frequency to monotonic increase
+    fsort=np.argsort(frequency,kind='stable')
+    return frequency[fsort],amplitude_frequency[...,fsort],phase_frequency[...,fsort]
+
 def FFT_sum(f,amp_f,frequency_min,frequency_max,frequency_all):
     sum0_TEMP=0.
     if frequency_all==True:
@@ -98,31 +104,7 @@ def FFT_interp(frequency,amplitude_frequency,total_len_scale=1.5):
 #window types: https://docs.scipy.org/doc/scipy/reference/generated/scipy.signal.get_window.html#scipy.signal.get_window
 #intruction video of Welch's method: https://youtu.be/YK1F0-3VvQI
 def spectral_density(function,time,percent=0.5,window_for_FFT='hann',plot=False):
-    time=np.array(time)
-    
-    time,function=sort_x_f(time,function)
-    dt=time[1:]-time[:-1]
-    dt_min=np.mean(dt)
-
-    if abs(np.std(dt))>=np.min(dt)*0.01:
-        print('time step is NOT uniform. interperlating')
-        uni_time = np.linspace(min(time),max(time),int(abs((max(time)-min(time))/dt_min)*1.5)) #uniform time
-        uni_function = np.interp(uni_time,time,function)
-    else:
-        uni_time=time
-        uni_function=function
-
-
-    fs=1./np.mean(abs(uni_time[1:]-uni_time[:-1]))
-    print('avg_dt='+str(np.mean(abs(uni_time[1:]-uni_time[:-1]))))
-    print('std_dt='+str(np.std(abs(uni_time[1:]-uni_time[:-1]))))
-    #f, Pxx_den = signal.welch(uni_function, fs, nperseg=len(uni_function), window=window_for_FFT) #, scaling='spectrum')
-
-    f, Pxx_den = signal.welch(uni_function, fs, nperseg=int(percent*len(uni_function)), window=window_for_FFT,return_onesided=False, scaling='density')
-    #f, Pxx_den = signal.periodogram(uni_function, fs)
-
-    #Sort frequency to monotonic increase
-    f, Pxx_den=sort_x_f(f, Pxx_den)
+    f, Pxx_den = spectral_density_batch(function,time,percent=percent,window_for_FFT=window_for_FFT)
 
     if plot==True:
         plt.plot(f, Pxx_den,label='Pxx_den')
@@ -137,6 +119,34 @@ def spectral_density(function,time,percent=0.5,window_for_FFT='hann',plot=False)
     return f, Pxx_den
 
 
+def spectral_density_batch(function,time,percent=0.5,window_for_FFT='hann'):
+    #spectral_density for a stack of signals function (..., nt) sampled at
+    #the same times in one call; returns the shared frequency grid and the
+    #densities (..., nf), sorted by frequency
+    time=np.array(time)
+    order=np.argsort(time,kind='stable')
+    time=time[order]
+    function=np.asarray(function)[...,order]
+    dt=time[1:]-time[:-1]
+
+    fs=1./np.mean(abs(dt))
+    print('avg_dt='+str(np.mean(abs(dt))))
+    print('std_dt='+str(np.std(abs(dt))))
+    #f, Pxx_den = signal.welch(function, fs, nperseg=len(function), window=window_for_FFT) #, scaling='spectrum')
+
+    nperseg=int(percent*time.shape[-1])
+    if abs(np.std(dt))>=np.min(dt)*0.01:
+        print('time step is NOT uniform. using nonuniform FFT')
+        f, Pxx_den = nufft.welch(time, function, nperseg=nperseg, window=window_for_FFT,return_onesided=False)
+    else:
+        f, Pxx_den = signal.welch(function, fs, nperseg=nperseg, window=window_for_FFT,return_onesided=False, scaling='density')
+    #f, Pxx_den = signal.periodogram(uni_function, fs)
+
+    #Sort frequency to monotonic increase
+    fsort=np.argsort(f,kind='stable')
+    return f[fsort],Pxx_den[...,fsort]
+
+
 def spectral_density_sum(f,amp_f,frequency_min,frequency_max,frequency_all):
     sum0_TEMP=0.
     sum0_list=[]
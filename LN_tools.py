@@ -20,9 +20,12 @@ from read_write_geometry import read_geometry_local
 from read_iterdb_file import read_iterdb_file
 from FFT_general import FFT_function_time
 from FFT_general import spectral_density
+from FFT_general import FFT_function_time_batch
+from FFT_general import spectral_density_batch
 from FFT_general import sort_x_f
 from momentsWrapper_max import LILO_moments_from_mom_file
 from momlib import momfile
+import precision
 
 
 #input the suffix , plot nrg_es, em, return time_start,time_end
@@ -146,13 +149,23 @@ def ky_list_calc(suffix):
 #************Sample function line
 #omegaDoppler=Doppler_calc(suffix,iky,iterdb_file_name)
 def Doppler_calc(suffix,iky,iterdb_file_name):
+    return Doppler_calc_ky(suffix,iterdb_file_name)[iky]
+
+#************Sample function line
+#omegaDoppler_kHZ=Doppler_calc_ky(suffix,iterdb_file_name,manual_Doppler)
+#Doppler shift of all ky in kHz, the iterdb file is only read once
+#manual_Doppler==999 takes the rotation from the iterdb file, otherwise the
+#shift is manual_Doppler*n
+def Doppler_calc_ky(suffix,iterdb_file_name,manual_Doppler=999):
+    n_list, ky_list = ky_list_calc(suffix)
+    if manual_Doppler!=999:
+        return manual_Doppler*np.array(n_list,dtype=float)
 	#Import the parameters from parameter file using ParIO
     par = Parameters()
     par.Read_Pars('parameters'+suffix)
     pars = par.pardict
     x0 = pars['x0']             #x/a, location
     #Import the parameters from parameter file using ParIO
-    n_list, ky_list = ky_list_calc(suffix)
 
     #**********************Doppler shift**********************************************
 
@@ -160,7 +173,7 @@ def Doppler_calc(suffix,iky,iterdb_file_name):
     uni_rhot = np.linspace(min(rhot0),max(rhot0),int(len(rhot0)*10.))
     x0_index=np.argmin(abs(uni_rhot-x0))
     vrot_u = np.interp(uni_rhot,rhot0,vrot0)
-    omegaDoppler_kHZ = vrot_u[x0_index]*n_list[iky]/(2.*np.pi*1000.)
+    omegaDoppler_kHZ = vrot_u[x0_index]*np.array(n_list,dtype=float)/(2.*np.pi*1000.)
 
     #**********************Doppler shift**********************************************
 
@@ -375,8 +388,8 @@ def LILO_moments_from_mom_file(pars,suffix,plot,setTime=-1):
         momen.set_time(momen.tmom[setTime])
         print('Reading momentss are at t = ', momen.tmom[setTime])
     else:
-        isetTime = np.argmin(abs(np.array(momen.tmom)-setTime))
-        momen.set_time(momen.tmom[isetTime])
+        isetTime = momen.get_tind_nearest(setTime)
+        momen.set_tind(isetTime)
         print('Reading momentss are at t = ', momen.tmom[isetTime])
 
     deln_global = momen.dens()[:,:,:]
@@ -444,7 +457,7 @@ def BES_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     #ky_GENE_n1=ky_GENE_temp/float(n_min)
 
     nz=len(real_Z)
-    ky_GENE_grid=np.zeros((nz,nky0,nkx0))#outer product of the two vectors
+    ky_GENE_grid=np.zeros((nz,nky0,nkx0),dtype=precision.real_dtype(pars))#outer product of the two vectors
     for i in range(nz):
         for j in range(nky0):
             for k in range(nkx0):
@@ -469,7 +482,7 @@ def BES_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     nky0=len(n_list)
     ntime=len(time_list)
 
-    n1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=complex)
+    n1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -511,7 +524,7 @@ def BES_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
             n1=deln_global[:,:,:]+0.j
             n1_z_ky_kx=n1
             n1_GENE_ky0=n1_z_ky_kx*rhorefStar*nref
-            n1_GENE_ky= np.zeros(np.shape(n1_GENE_ky0[0,:,:]),dtype=complex)
+            n1_GENE_ky= np.zeros(np.shape(n1_GENE_ky0[0,:,:]),dtype=precision.complex_dtype(pars))
 
             #*****Sum over Z************
             sum_length_TEMP=0
@@ -558,33 +571,10 @@ def BES_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     f_ky_f=[]
     time_list=time_list/gyroFreq*(1000.)
     
-    for iky in range(nky0):
-        count_TEMP=0
-        for ikx in range(nkx0):
-            n1_inz_t=(n1_ky_kx_t[iky,ikx,:])
-            #frequency,amplitude_frequency,amplitude_growth=window_FFT_function_time(B1_inz_t,time_list,plot=False)
-            frequency,amplitude_frequency,amplitude_growth=FFT_function_time(n1_inz_t,time_list,plot=False)
-
-            if manual_Doppler==999:
-                omegaDoppler_kHZ=Doppler_calc(suffix,iky,iterdb_file_name)
-            else:
-                omegaDoppler_kHZ=manual_Doppler*n_list[iky]
-
-            count_TEMP=count_TEMP+1
-
-            if count_TEMP ==1:
-                new_frequency_kHZ_ky=frequency
-                new_amplitude_frequency=amplitude_frequency**2.
-            else:
-                new_amplitude_frequency=new_amplitude_frequency+amplitude_frequency**2.
-
-            
-        f_ky_f.append(new_frequency_kHZ_ky)
-        n1_ky_f.append(new_amplitude_frequency**0.5)
-    
-    
-    f_ky_f=np.array(f_ky_f)
-    n1_ky_f=abs(np.array(n1_ky_f))
+    #spectra of all (ky, kx) in one call, summed in quadrature over kx
+    frequency,amplitude_frequency,amplitude_growth=FFT_function_time_batch(n1_ky_kx_t,time_list)
+    f_ky_f=np.tile(frequency,(nky0,1))
+    n1_ky_f=abs(np.sqrt(np.sum(amplitude_frequency**2.,axis=1)))
 
     f,amplitude_f=k_f_plot(f_ky_f,n1_ky_f,ky_list,n_list,pic_path,csv_path,name='n1')
     
@@ -651,7 +641,7 @@ def BES_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     #ky_GENE_n1=ky_GENE_temp/float(n_min)
 
     nz=len(real_Z)
-    ky_GENE_grid=np.zeros((nz,nky0,nkx0))#outer product of the two vectors
+    ky_GENE_grid=np.zeros((nz,nky0,nkx0),dtype=precision.real_dtype(pars))#outer product of the two vectors
     for i in range(nz):
         for j in range(nky0):
             for k in range(nkx0):
@@ -676,7 +666,7 @@ def BES_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     nky0=len(n_list)
     ntime=len(time_list)
 
-    n1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=complex)
+    n1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -717,7 +707,7 @@ def BES_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
             n1=deln_global[:,:,:]+0.j
             n1_z_ky_kx=n1
             n1_GENE_ky0=n1_z_ky_kx*rhorefStar*nref
-            n1_GENE_ky= np.zeros(np.shape(n1_GENE_ky0[0,:,:]),dtype=complex)
+            n1_GENE_ky= np.zeros(np.shape(n1_GENE_ky0[0,:,:]),dtype=precision.complex_dtype(pars))
 
             #*****Sum over Z************
             sum_length_TEMP=0
@@ -763,34 +753,11 @@ def BES_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     f_ky_f=[]
     time_list=time_list/gyroFreq*(1000.)
     
-    for iky in range(nky0):
-        count_TEMP=0
-        for ikx in range(nkx0):
-            n1_inz_t=(n1_ky_kx_t[iky,ikx,:])
-            frequency,amplitude_frequency_sq=spectral_density(n1_inz_t,time_list,window_for_FFT=window_for_FFT,plot=False)
-            frequency_kHZ=frequency
-            amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
-
-            if manual_Doppler==999:
-                omegaDoppler_kHZ=Doppler_calc(suffix,iky,iterdb_file_name)
-            else:
-                omegaDoppler_kHZ=manual_Doppler*n_list[iky]
-
-            count_TEMP=count_TEMP+1
-
-            if count_TEMP ==1:
-                new_frequency_kHZ_ky=frequency_kHZ
-                new_amplitude_frequency=(2.*amplitude_frequency)**2.
-            else:
-                new_amplitude_frequency=new_amplitude_frequency+(2.*amplitude_frequency)**2.
-
-            
-        f_ky_f.append(new_frequency_kHZ_ky)
-        n1_ky_f.append(new_amplitude_frequency**0.5)
-    
-    
-    f_ky_f=np.array(f_ky_f)
-    n1_ky_f=abs(np.array(n1_ky_f))
+    #spectral densities of all (ky, kx) in one call, summed over kx
+    frequency,amplitude_frequency_sq=spectral_density_batch(n1_ky_kx_t,time_list,window_for_FFT=window_for_FFT)
+    amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
+    f_ky_f=np.tile(frequency,(nky0,1))
+    n1_ky_f=abs(np.sqrt(np.sum((2.*amplitude_frequency)**2.,axis=1)))
 
     f,amplitude_f=k_f_plot(f_ky_f,n1_ky_f,ky_list,n_list,pic_path,csv_path,name='n1')
     
@@ -857,7 +824,7 @@ def RIP_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     #ky_GENE_n1=ky_GENE_temp/float(n_min)
 
     nz=len(real_Z)
-    ky_GENE_grid=np.zeros((nz,nky0,nkx0))#outer product of the two vectors
+    ky_GENE_grid=np.zeros((nz,nky0,nkx0),dtype=precision.real_dtype(pars))#outer product of the two vectors
     for i in range(nz):
         for j in range(nky0):
             for k in range(nkx0):
@@ -886,7 +853,7 @@ def RIP_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     nky0=len(n_list)
     ntime=len(time_list)
 
-    B1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=complex)
+    B1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -898,10 +865,10 @@ def RIP_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
         os.mkdir(pic_path) 
     print("**********Scan starts, output in csv and pic***************")
 
-    for i in range(len(time_list)):
-        time0=time_list[i]
-        itime = np.argmin(abs(time - time0))
-        field.set_time(time_list[i])
+    #apar of the following time steps is read on a background thread
+    tind_list=np.arange(time_start_index,time_end_index+1)[::time_step]
+    for i,(time0,apar3d) in enumerate(field.iter_tinds(tind_list,'apar')):
+        itime = tind_list[i]
         print("Looking at the spectra at time:"+str(time[itime]))
         #This sets the time step you want to read in
         #field.set_time(time[itime])
@@ -923,10 +890,10 @@ def RIP_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
             #print("kygrid"+str(kygrid))
             zgrid = np.linspace(-np.pi,np.pi,pars['nz0'],endpoint=False)  
 
-            apar=field.apar()[:,:,:]+0.j
+            apar=apar3d+0.j
             apar_z_ky_kx=apar
             B1_GENE_ky0=apar_z_ky_kx*(ky_GENE_grid*Apar_to_B1)
-            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,:]),dtype=complex)
+            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,:]),dtype=precision.complex_dtype(pars))
 
             #*****Sum over Z************
             sum_length_TEMP=0
@@ -966,34 +933,12 @@ def RIP_f_spectrum_FFT(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,\
     growth_ky_f=[]
     f_ky_f=[]
     
-    for iky in range(nky0):
-        count_TEMP=0
-        for ikx in range(nkx0):
-            B1_inz_t=(B1_ky_kx_t[iky,ikx,:])
-            #frequency,amplitude_frequency,amplitude_growth=window_FFT_function_time(B1_inz_t,time_list,plot=False)
-            frequency,amplitude_frequency,amplitude_growth=FFT_function_time(B1_inz_t,time_list,plot=False)
-
-            if manual_Doppler==999:
-                omegaDoppler_kHZ=Doppler_calc(suffix,iky,iterdb_file_name)
-            else:
-                omegaDoppler_kHZ=manual_Doppler*n_list[iky]
-            frequency_kHZ=frequency*gyroFreq/(1000.)+omegaDoppler_kHZ
-
-            count_TEMP=count_TEMP+1
-
-            if count_TEMP ==1:
-                new_frequency_kHZ_ky=frequency_kHZ
-                new_amplitude_frequency=(2.*amplitude_frequency)**2.
-            else:
-                new_amplitude_frequency=new_amplitude_frequency+(2.*amplitude_frequency)**2.
-
-            
-        f_ky_f.append(new_frequency_kHZ_ky)
-        B1_ky_f.append(new_amplitude_frequency**0.5)
-    
-    
-    f_ky_f=np.array(f_ky_f)
-    B1_ky_f=abs(np.array(B1_ky_f))
+    #spectra of all (ky, kx) in one call, summed in quadrature over kx,
+    #and the Doppler shift of every ky added to the shared frequency grid
+    frequency,amplitude_frequency,amplitude_growth=FFT_function_time_batch(B1_ky_kx_t,time_list)
+    omegaDoppler_kHZ=Doppler_calc_ky(suffix,iterdb_file_name,manual_Doppler)
+    f_ky_f=frequency[np.newaxis,:]*gyroFreq/(1000.)+omegaDoppler_kHZ[:,np.newaxis]
+    B1_ky_f=abs(np.sqrt(np.sum((2.*amplitude_frequency)**2.,axis=1)))
 
     f,amplitude_f=k_f_plot(f_ky_f,B1_ky_f,ky_list,n_list,pic_path,csv_path,name='B1')
     
@@ -1060,7 +1005,7 @@ def RIP_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     #ky_GENE_n1=ky_GENE_temp/float(n_min)
 
     nz=len(real_Z)
-    ky_GENE_grid=np.zeros((nz,nky0,nkx0))#outer product of the two vectors
+    ky_GENE_grid=np.zeros((nz,nky0,nkx0),dtype=precision.real_dtype(pars))#outer product of the two vectors
     for i in range(nz):
         for j in range(nky0):
             for k in range(nkx0):
@@ -1084,7 +1029,7 @@ def RIP_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     nky0=len(n_list)
     ntime=len(time_list)
 
-    B1_ky_t=np.zeros((nky0,ntime),dtype=complex)
+    B1_ky_t=np.zeros((nky0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -1097,10 +1042,10 @@ def RIP_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
     print("**********Scan starts, output in csv and pic***************")
     
     print('Loadind data across the time steps')
-    for i in tqdm(range(len(time_list))):
-        time0=time_list[i]
-        itime = np.argmin(abs(time - time0))
-        field.set_time(time_list[i])
+    #apar of the following time steps is read on a background thread
+    tind_list=np.arange(time_start_index,time_end_index+1)[::time_step]
+    for i,(time0,apar3d) in enumerate(tqdm(field.iter_tinds(tind_list,'apar'),total=len(tind_list))):
+        itime = tind_list[i]
         #print("Looking at the spectra at time:"+str(time[itime]))
         #This sets the time step you want to read in
         #field.set_time(time[itime])
@@ -1122,10 +1067,10 @@ def RIP_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
             #print("kygrid"+str(kygrid))
             zgrid = np.linspace(-np.pi,np.pi,pars['nz0'],endpoint=False)  
 
-            apar=field.apar()[:,:,:]+0.j
+            apar=apar3d+0.j
             apar_z_ky_kx=apar
             B1_GENE_ky0=apar_z_ky_kx*(ky_GENE_grid*Apar_to_B1)
-            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,0]),dtype=complex)
+            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,0]),dtype=precision.complex_dtype(pars))
 
             #*****Sum over Z************
             sum_length_TEMP=0
@@ -1171,28 +1116,13 @@ def RIP_f_spectrum_density(suffix,iterdb_file_name,manual_Doppler,min_Z0,max_Z0,
 
     print('FFT across nky')
 
-    for iky in tqdm(range(nky0)):
-        B1_inz_t=(B1_ky_t[iky,:])
-        frequency,amplitude_frequency_sq=spectral_density(B1_inz_t,time_list,percent=percent_window,window_for_FFT=window_for_FFT,plot=False)
-        
-        amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
-        if manual_Doppler==999:
-            omegaDoppler_kHZ=Doppler_calc(suffix,iky,iterdb_file_name)
-        else:
-            omegaDoppler_kHZ=manual_Doppler*n_list[iky]
-        frequency_kHZ=frequency+omegaDoppler_kHZ
-        if iky ==0:
-            new_frequency_kHZ_ky=frequency_kHZ
-            new_amplitude_frequency=(2.*amplitude_frequency)**2.
-        else:
-            new_amplitude_frequency=new_amplitude_frequency+(2.*amplitude_frequency)**2.
-            
-        f_ky_f.append(new_frequency_kHZ_ky)
-        B1_ky_f.append(new_amplitude_frequency**0.5)
-    
-    
-    f_ky_f=np.array(f_ky_f)
-    B1_ky_f=abs(np.array(B1_ky_f))
+    #spectral densities of all ky in one call; as before every row gets the
+    #frequencies of ky=0 and the amplitudes are accumulated over ky
+    frequency,amplitude_frequency_sq=spectral_density_batch(B1_ky_t,time_list,percent=percent_window,window_for_FFT=window_for_FFT)
+    amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
+    omegaDoppler_kHZ=Doppler_calc_ky(suffix,iterdb_file_name,manual_Doppler)
+    f_ky_f=np.tile(frequency+omegaDoppler_kHZ[0],(nky0,1))
+    B1_ky_f=abs(np.sqrt(np.cumsum((2.*amplitude_frequency)**2.,axis=0)))
 
     f,amplitude_f=k_f_density_plot(f_ky_f,B1_ky_f,ky_list,n_list,pic_path,csv_path,name='B1')
     
@@ -1259,7 +1189,7 @@ def RIP_f_spectrum_density_old(suffix,iterdb_file_name,manual_Doppler,min_Z0,max
     #ky_GENE_n1=ky_GENE_temp/float(n_min)
 
     nz=len(real_Z)
-    ky_GENE_grid=np.zeros((nz,nky0,nkx0))#outer product of the two vectors
+    ky_GENE_grid=np.zeros((nz,nky0,nkx0),dtype=precision.real_dtype(pars))#outer product of the two vectors
     for i in range(nz):
         for j in range(nky0):
             for k in range(nkx0):
@@ -1283,7 +1213,7 @@ def RIP_f_spectrum_density_old(suffix,iterdb_file_name,manual_Doppler,min_Z0,max
     nky0=len(n_list)
     ntime=len(time_list)
 
-    B1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=complex)
+    B1_ky_kx_t=np.zeros((nky0,nkx0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -1296,10 +1226,10 @@ def RIP_f_spectrum_density_old(suffix,iterdb_file_name,manual_Doppler,min_Z0,max
     print("**********Scan starts, output in csv and pic***************")
     
     print('Loadind data across the time steps')
-    for i in tqdm(range(len(time_list))):
-        time0=time_list[i]
-        itime = np.argmin(abs(time - time0))
-        field.set_time(time_list[i])
+    #apar of the following time steps is read on a background thread
+    tind_list=np.arange(time_start_index,time_end_index+1)[::time_step]
+    for i,(time0,apar3d) in enumerate(tqdm(field.iter_tinds(tind_list,'apar'),total=len(tind_list))):
+        itime = tind_list[i]
         #print("Looking at the spectra at time:"+str(time[itime]))
         #This sets the time step you want to read in
         #field.set_time(time[itime])
@@ -1321,10 +1251,10 @@ def RIP_f_spectrum_density_old(suffix,iterdb_file_name,manual_Doppler,min_Z0,max
             #print("kygrid"+str(kygrid))
             zgrid = np.linspace(-np.pi,np.pi,pars['nz0'],endpoint=False)  
 
-            apar=field.apar()[:,:,:]+0.j
+            apar=apar3d+0.j
             apar_z_ky_kx=apar
             B1_GENE_ky0=apar_z_ky_kx*(ky_GENE_grid*Apar_to_B1)
-            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,:]),dtype=complex)
+            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:,:]),dtype=precision.complex_dtype(pars))
 
             #*****Sum over Z************
             sum_length_TEMP=0
@@ -1371,35 +1301,13 @@ def RIP_f_spectrum_density_old(suffix,iterdb_file_name,manual_Doppler,min_Z0,max
 
     print('FFT across nky')
 
-    for iky in tqdm(range(nky0)):
-        count_TEMP=0
-        for ikx in range(nkx0):
-            B1_inz_t=(B1_ky_kx_t[iky,ikx,:])
-            frequency,amplitude_frequency_sq=spectral_density(B1_inz_t,time_list,percent=percent_window,window_for_FFT=window_for_FFT,plot=False)
-            
-            amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
-            if manual_Doppler==999:
-                omegaDoppler_kHZ=Doppler_calc(suffix,iky,iterdb_file_name)
-            else:
-                omegaDoppler_kHZ=manual_Doppler*n_list[iky]
-
-            frequency_kHZ=frequency+omegaDoppler_kHZ
-
-            count_TEMP=count_TEMP+1
-
-            if count_TEMP ==1:
-                new_frequency_kHZ_ky=frequency_kHZ
-                new_amplitude_frequency=(2.*amplitude_frequency)**2.
-            else:
-                new_amplitude_frequency=new_amplitude_frequency+(2.*amplitude_frequency)**2.
-
-            
-        f_ky_f.append(new_frequency_kHZ_ky)
-        B1_ky_f.append(new_amplitude_frequency**0.5)
-    
-    
-    f_ky_f=np.array(f_ky_f)
-    B1_ky_f=abs(np.array(B1_ky_f))
+    #spectral densities of all (ky, kx) in one call, summed over kx, and the
+    #Doppler shift of every ky added to the shared frequency grid
+    frequency,amplitude_frequency_sq=spectral_density_batch(B1_ky_kx_t,time_list,percent=percent_window,window_for_FFT=window_for_FFT)
+    amplitude_frequency=abs(np.sqrt(amplitude_frequency_sq))
+    omegaDoppler_kHZ=Doppler_calc_ky(suffix,iterdb_file_name,manual_Doppler)
+    f_ky_f=frequency[np.newaxis,:]+omegaDoppler_kHZ[:,np.newaxis]
+    B1_ky_f=abs(np.sqrt(np.sum((2.*amplitude_frequency)**2.,axis=1)))
 
     f,amplitude_f=k_f_density_plot(f_ky_f,B1_ky_f,ky_list,n_list,pic_path,csv_path,name='B1')
     
@@ -1488,7 +1396,7 @@ def RIP_k_space_sum_IDL(suffix,iterdb_file_name,manual_Doppler,\
     
     nky0=len(n_list)
     ntime=len(time_list)
-    B1_ky_t=np.zeros((nky0,ntime),dtype=complex)
+    B1_ky_t=np.zeros((nky0,ntime),dtype=precision.complex_dtype(pars))
 
     if os.path.isdir(csv_path):  #if path does not exist, then create 'csv'
         pass
@@ -1500,10 +1408,10 @@ def RIP_k_space_sum_IDL(suffix,iterdb_file_name,manual_Doppler,\
         os.mkdir(pic_path) 
     print("**********Scan starts, output in csv and pic***************")
 
-    for i in range(len(time_list)):
-        time0=time_list[i]
-        itime = np.argmin(abs(time - time0))
-        field.set_time(time_list[i])
+    #apar of the following time steps is read on a background thread
+    tind_list=np.arange(time_start_index,time_end_index+1)[::time_step]
+    for i,(time0,apar3d) in enumerate(field.iter_tinds(tind_list,'apar')):
+        itime = tind_list[i]
         #print("Looking at the spectra at time:"+str(time[itime]))
         #This sets the time step you want to read in
         #field.set_time(time[itime])
@@ -1525,7 +1433,7 @@ def RIP_k_space_sum_IDL(suffix,iterdb_file_name,manual_Doppler,\
             #print("kygrid"+str(kygrid))
             zgrid = np.linspace(-np.pi,np.pi,pars['nz0'],endpoint=False)  
 
-            apar=abs(field.apar()[:,:,:])
+            apar=abs(apar3d)
             (nz,nky,nkx)=np.shape(apar)
             #print('(nz,nky,nkx)'+str(np.shape(apar)))
             #sum over kx
@@ -1535,7 +1443,7 @@ def RIP_k_space_sum_IDL(suffix,iterdb_file_name,manual_Doppler,\
 
 
             B1_GENE_ky0=apar_ky*(ky_GENE_grid*Apar_to_B1)**2.
-            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:]),dtype=complex)
+            B1_GENE_ky= np.zeros(np.shape(B1_GENE_ky0[0,:]),dtype=precision.complex_dtype(pars))
             
 
             #plt.clf()
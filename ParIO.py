@@ -1,7 +1,181 @@
 """ ParIO.py: Contains the class to handle reading and writing of parameter files """
+import os
 import re
 import sys
+import threading
 from collections import namedtuple, OrderedDict
+try:
+    from types import MappingProxyType
+except ImportError:
+    # Python 2: the views are plain ordered dicts, which must not be modified
+    MappingProxyType = OrderedDict
+
+# parameters of the species namelists, which get the species number appended
+SPEC_NL = (
+    "omn",
+    "omt",
+    "mass",
+    "charge",
+    "dens",
+    "temp",
+    "name",
+    "passive",
+    "kappa_n",
+    "kappa_T",
+    "LT_center",
+    "Ln_center",
+    "LT_width",
+    "Ln_width",
+    "prof_type",
+    "src_prof_type",
+    "src_amp",
+    "src_width",
+    "src_x0",
+    "delta_x_n",
+    "delta_x_T",
+    "prof_file",
+)
+BOOLSTR_T = [".T.", ".t.", "T", "t", ".true."]
+BOOLSTR_F = [".F.", ".f.", "F", "f", ".false."]
+
+COMMENT_RE = re.compile(r"\s*!\w*\s*=.*")
+NAMELIST_RE = re.compile(r"^\s*&(.*)")
+ASSIGN_RE = re.compile(r"^\s*(.*)\s*=\s*(.*)")
+VALUE_RE = re.compile(r"\s*([-+\'\"\[\];.,/a-zA-Z0-9_\s*]*)\s*!?\s*(.*)")
+
+
+def clearcomments(variable):
+    result = VALUE_RE.search(variable)
+    if result and result.group(2)[:4] != "scan":
+        return result.group(1)
+    else:
+        return variable
+
+
+def convert_value(value):
+    """Clear the comment from a parameter value and cast it to int, float or bool"""
+    value = clearcomments(value)
+    try:  # Can it be converted to int?
+        return int(value)
+    except ValueError:
+        try:  # No, but can it be converted to float?
+            return float(value)
+        except ValueError:
+            pass
+    if value in BOOLSTR_T:  # cast switches to boolean values
+        return True
+    elif value in BOOLSTR_F:
+        return False
+    return value.strip("'").strip('"')
+
+
+class ParsedParameters(object):
+    """ParsedParameters class:
+
+    Immutable result of parsing one parameters file. entries holds one
+    (namelist, parameter, flat name, value) tuple per parameter line in file
+    order, where the flat name carries the species number of species
+    parameters (omn1, name2, ...). Both views are generated lazily from
+    these entries: the flat pardict {flat name: value} and nmldict
+    {flat name: namelist} of Parameters, and the namelist-nested view
+    {namelist: {parameter: value}} used by genetools.read_parameters.
+    """
+
+    __slots__ = ("entries", "namelists", "_flat", "_nested")
+
+    def __init__(self, entries, namelists):
+        object.__setattr__(self, "entries", tuple(entries))
+        object.__setattr__(self, "namelists", tuple(namelists))
+        object.__setattr__(self, "_flat", None)
+        object.__setattr__(self, "_nested", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ParsedParameters is immutable")
+
+    def flat_view(self):
+        if self._flat is None:
+            pardict = OrderedDict()
+            nmldict = OrderedDict()
+            for nml, par, flatpar, value in self.entries:
+                pardict[flatpar] = value
+                nmldict[flatpar] = nml
+            object.__setattr__(self, "_flat", (MappingProxyType(pardict),
+                                               MappingProxyType(nmldict)))
+        return self._flat
+
+    @property
+    def pardict(self):
+        return self.flat_view()[0]
+
+    @property
+    def nmldict(self):
+        return self.flat_view()[1]
+
+    def namelist_view(self):
+        """{namelist: {parameter: value}}, later duplicates taking preference"""
+        if self._nested is None:
+            nested = OrderedDict()
+            for nml, par, flatpar, value in self.entries:
+                if nml is not None:
+                    nested.setdefault(nml.strip(), OrderedDict())[par] = value
+            object.__setattr__(self, "_nested", MappingProxyType(
+                OrderedDict((nml, MappingProxyType(pars)) for nml, pars in nested.items())))
+        return self._nested
+
+
+def parse_parameters(path):
+    """Parse a GENE parameters file in a single pass"""
+    entries = []
+    namelists = []
+    # counts species namelists
+    countspec = 0
+    nml = None
+    with open(path, "r") as parfile:
+        for line in parfile:
+            # Exclude commented lines
+            if COMMENT_RE.search(line) is None:
+                # Check for and count species namelists
+                m = NAMELIST_RE.search(line)
+                if m:
+                    # if namelist belongs to a species, append its number to the namelist
+                    nml = m.group(1)
+                    if nml == "species":
+                        countspec += 1
+                        nml += str(countspec)
+                    if nml not in namelists:
+                        namelists.append(nml)
+            # Search lines for <parameter> = <value> patterns
+            m = ASSIGN_RE.search(line)
+            if m:
+                par = m.group(1).strip()
+                flatpar = par + str(countspec) if par in SPEC_NL else par
+                entries.append((nml, par, flatpar, convert_value(m.group(2))))
+    return ParsedParameters(entries, namelists)
+
+
+# process-wide cache of parsed files: {path: ((mtime, size), ParsedParameters)}
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_parameters(path):
+    """Parsed parameters file, reused as long as its mtime and size are unchanged"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size)
+    with _cache_lock:
+        entry = _cache.get(path)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    parsed = parse_parameters(path)
+    with _cache_lock:
+        _cache[path] = (key, parsed)
+    return parsed
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
 
 
 class Parameters(object):
@@ -17,100 +191,28 @@ class Parameters(object):
         self.nmldict = OrderedDict()
         # keep track of all namelists that have been found
         self.namelists = []
-        self.spec_nl = (
-            "omn",
-            "omt",
-            "mass",
-            "charge",
-            "dens",
-            "temp",
-            "name",
-            "passive",
-            "kappa_n",
-            "kappa_T",
-            "LT_center",
-            "Ln_center",
-            "LT_width",
-            "Ln_width",
-            "prof_type",
-            "src_prof_type",
-            "src_amp",
-            "src_width",
-            "src_x0",
-            "delta_x_n",
-            "delta_x_T",
-            "prof_file",
-        )
-        self.boolstr_t = [".T.", ".t.", "T", "t", ".true."]
-        self.boolstr_f = [".F.", ".f.", "F", "f", ".false."]
+        self.spec_nl = SPEC_NL
+        self.boolstr_t = BOOLSTR_T
+        self.boolstr_f = BOOLSTR_F
 
     @staticmethod
     def clearcomments(variable):
-        regex = re.compile(r"\s*([-+\'\"\[\];.,/a-zA-Z0-9_\s*]*)\s*!?\s*(.*)")
-        result = regex.search(variable)
-        if result and result.group(2)[:4] != "scan":
-            return regex.search(variable).group(1)
-        else:
-            return variable
+        return clearcomments(variable)
 
     def Read_Pars(self, path):
-        """Read parameters file and make it a dict"""
-        # counts species namelists
-        countspec = 0
+        """Read parameters file and make it a dict
+
+        The file is parsed once per process as long as it is not modified.
+        """
         try:
-            with open(path, "r") as parfile:
-                # Search file for parameters using regular expressions
-                for line in parfile:
-                    # Exclude commented lines
-                    if re.search(r"\s*!\w*\s*=.*", line) is None:
-                        # Check for and count species namelists
-                        if re.search(r"^\s*&(.*)", line):
-                            # if namelist belongs to a species, append its number to the namelist
-                            if re.search(r"^\s*&(.*)", line).group(1) == "species":
-                                countspec += 1
-                                nml = re.search(r"^\s*&(.*)", line).group(1) + str(
-                                    countspec
-                                )
-                            else:
-                                nml = re.search(r"^\s*&(.*)", line).group(1)
-                            if nml not in self.namelists:
-                                self.namelists.append(nml)
-                    # Search lines for <parameter> = <value> patterns
-                    p = re.compile(r"^\s*(.*)\s*=\s*(.*)")
-                    m = p.search(line)
-                    # Pick matching lines and build parameter dictionary
-                    if m:
-                        if m.group(1).strip() in self.spec_nl:
-                            self.pardict[m.group(1).strip() + str(countspec)] = m.group(
-                                2
-                            )
-                            self.nmldict[m.group(1).strip() + str(countspec)] = nml
-                        else:
-                            self.pardict[m.group(1).strip()] = m.group(2)
-                            self.nmldict[m.group(1).strip()] = nml
-        except IOError:
+            parsed = load_parameters(path)
+        except (IOError, OSError):
             sys.exit("ParIO: ReadPars: could not read parameters file")
-        # clear the comments from all variables, cast some strings to integers and floats
-        for item in self.pardict:
-            self.pardict[item] = self.clearcomments(self.pardict[item])
-            try:  # Can it be converted to int?
-                self.pardict[item] = int(self.pardict[item])
-            except ValueError:
-                try:  # No, but can it be converted to float?
-                    self.pardict[item] = float(self.pardict[item])
-                except ValueError:
-                    pass
-            if self.pardict[item] in self.boolstr_t:  # cast switches to boolean values
-                self.pardict[item] = True
-            elif self.pardict[item] in self.boolstr_f:
-                self.pardict[item] = False
-            # generate class attributes from all valid parameters
-            # for k,v in self.pardict.iteritems():
-            #    if len(k.split())==1 and k[0]!='!':vars(self)[k]=v
-            if isinstance(self.pardict[item], str):
-                strip_value = self.pardict[item].strip("'")
-                strip_value = strip_value.strip('"')
-                self.pardict[item] = strip_value
+        self.pardict.update(parsed.pardict)
+        self.nmldict.update(parsed.nmldict)
+        for nml in parsed.namelists:
+            if nml not in self.namelists:
+                self.namelists.append(nml)
 
     def Write_Pars(self, path):
         """Take the dict and write a GENE parameters file"""
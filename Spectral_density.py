@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
+import nufft
 
 def sort_x_f(x_unsort,f_unsort): 
     #x is the varible and f is function
@@ -22,21 +23,15 @@ def sort_x_f(x_unsort,f_unsort):
 def spectral_density(function,time,window_for_FFT='boxcar',plot=False):
 	time=np.array(time)
 	dt=time[1:]-time[:-1]
-	dt_min=np.min(dt)
 
+	fs=1./np.mean(abs(dt))
+	print('avg_dt='+str(np.mean(abs(dt))))
+	print('std_dt='+str(np.std(abs(dt))))
 	if abs(np.std(dt))>=np.min(dt)*0.01:
-		print('time step is NOT uniform. interperlating')
-		uni_time = np.linspace(min(time),max(time),int(abs((max(time)-min(time))/dt_min)*1.5)) #uniform time
-		uni_function = np.interp(uni_time,time,function)
+		print('time step is NOT uniform. using nonuniform FFT')
+		f, Pxx_den = nufft.welch(time, function, window=window_for_FFT)
 	else:
-		uni_time=time
-		uni_function=function
-
-
-	fs=1./np.mean(abs(uni_time[1:]-uni_time[:-1]))
-	print('avg_dt='+str(np.mean(abs(uni_time[1:]-uni_time[:-1]))))
-	print('std_dt='+str(np.std(abs(uni_time[1:]-uni_time[:-1]))))
-	f, Pxx_den = signal.welch(uni_function, fs, window=window_for_FFT) #, scaling='spectrum')
+		f, Pxx_den = signal.welch(function, fs, window=window_for_FFT) #, scaling='spectrum')
 
 	#Sort frequency to monotonic increase
 	f, Pxx_den=sort_x_f(f, Pxx_den)
@@ -62,10 +62,17 @@ if 1 == 1:
     print 'start time ='+str(tStart)+', end time ='+str(tEnd)
     show_plots = False
     plot_format = 'ps'
-    for xInd in range(nx / 4, nx * 3 / 4, 8):
+    xInds = range(nx / 4, nx * 3 / 4, 8)
+    #transforms of all x at once
+    fgrid, dens_xf = windowFFT_batch(tgrid, np.transpose(dens_tx[:,xInds]), nf, lf)
+    fgrid, tperp_xf = windowFFT_batch(tgrid, np.transpose(tperp_tx[:,xInds]), nf, lf)
+    for i, xInd in enumerate(xInds):
         print 'x=', xgrid[xInd]
-        fgrid, dens_f = windowFFT(tgrid, dens_tx[:,xInd], nf, lf, 'dens_x=' + str(np.round(xgrid[xInd],4)), show_plots, plot_format)
-        fgrid, tperp_f = windowFFT(tgrid, tperp_tx[:,xInd], nf, lf, 'tperp_' + str(np.round(xgrid[xInd],4)), show_plots, plot_format)
+        dens_f = dens_xf[i]
+        tperp_f = tperp_xf[i]
+        if show_plots:
+            plot_windowFFT(fgrid, dens_f, 'dens_x=' + str(np.round(xgrid[xInd],4)), plot_format)
+            plot_windowFFT(fgrid, tperp_f, 'tperp_' + str(np.round(xgrid[xInd],4)), plot_format)
         wcm = radiometer(fgrid, tperp_f, 50., 300., fref_kHz)
         noise = radiometer(fgrid, tperp_f, 350., 600., fref_kHz)
         print 'relative Tperp fluct level (50 ~ 300 kHz)='+str(np.round(wcm,5))
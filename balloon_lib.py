@@ -45,6 +45,7 @@ class KyMode:
         self.iky = ky
         self.ky = ky * pars["kymin"]
         self.nx = field_file.nx
+        self.ny = field_file.ny
         self.kx_cent = kx_cent
         self.nz = field_file.nz
         self.T0 = pars["temp1"]
@@ -105,34 +106,39 @@ class KyMode:
 
     def read_field(self, varname):
         """Read field for a given time window, returning array"""
-        var = self.field_vars[varname]()
-        if var.shape[1] == 1:  # for linear scan data with single ky
+        if self.ny == 1:  # for linear scan data with single ky
             indy = 0
         else:
             indy = self.iky
-        tmp = var[:, indy, :]
-        return tmp
+        return self.field_vars[varname](ky=indy)
 
     def read_fields(self, times, fields, field_file, mom_file_list, pars):
         """Read given fields data for the given times"""
         self.fields_read = set(fields)
-        if pars["PRECISION"] == "DOUBLE":
-            tmp = np.empty(
-                (len(fields), times.size, self.nz, self.nx), dtype=np.cdouble
-            )
+        if self.ny == 1:  # for linear scan data with single ky
+            indy = 0
         else:
-            tmp = np.empty(
-                (len(fields), times.size, self.nz, self.nx), dtype=np.csingle
+            indy = self.iky
+        gene_files = [field_file]
+        if mom_file_list:
+            gene_files.append(mom_file_list[0])
+        names = set().union(*(gene_file.layout.names for gene_file in gene_files))
+        missing = [var for var in fields if var not in names]
+        if missing:
+            raise ValueError(
+                "field(s) "
+                + ", ".join(missing)
+                + " not found in "
+                + ", ".join(gene_file.file for gene_file in gene_files)
             )
-        for j, time in enumerate(times):
-            field_file.set_time(time)
-            if mom_file_list:
-                for mom_file in mom_file_list:
-                    mom_file.set_time(time)
-            for i, var in enumerate(fields):
-                tmp[i, j, :, :] = self.read_field(var)
-        for i, var in enumerate(fields):
-            self.fields[var] = tmp[i]
+        for gene_file in gene_files:
+            file_vars = [var for var in fields if var in gene_file.layout.names]
+            if file_vars:
+                # only the ky plane of this mode is read from disk
+                tinds = [gene_file.taxis.index(time) for time in times]
+                data = gene_file.read_tinds(tinds, file_vars, ky=indy)[1]
+                for var, var_data in zip(file_vars, data):
+                    self.fields[var] = var_data
 
 
 def plot_pod(mode, var, pods, varn, extend=True):
@@ -512,20 +518,17 @@ def get_input_params(directory, suffix, geom=None):
 
 
 def fft_nonuniform(times, f, axis=0, samplerate=2):
-    """Calculates fft of nonuniform data by first interpolating to uniform grid"""
+    """Calculates fft of nonuniform data by first interpolating to uniform grid
+
+    The interpolation damps the flat floor which a direct sum over jittered
+    samples leaves at all frequencies, and which biases the spectrally
+    weighted averages of avg_freq and avg_freq2.
+    """
     times_lin, f_lin = linear_resample(times, f, axis, samplerate)
     f_hat = np.fft.fft(f_lin, axis=axis)
-    test_energy(f, f_lin, f_hat, axis)
     return f_hat, times_lin
 
 
-def test_energy(f, f_lin, f_hat, axis):
-    N = f_lin.shape[axis]
-    f_sum = np.sum(np.abs(f) ** 2, axis=axis)
-    flin_sum = np.sum(np.abs(f_lin) ** 2, axis=axis)
-    fhat_sum = np.sum(np.abs(f_hat) ** 2, axis=axis) / N
-
-
 def avg_freq(times, f, axis=0, samplerate=2, norm_out=False):
     """Returns the dominant frequency from field"""
     ntimes = times.size
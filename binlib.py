@@ -0,0 +1,662 @@
+#!/usr/bin/env python
+""" binlib.py: Record layout and low level helpers shared by fieldlib and momlib """
+import os
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class RecordLayout(object):
+    """RecordLayout class:
+
+    Describes one time step of a GENE field or mom file: a Fortran-framed time
+    entry followed by nvars Fortran-framed (nz, ny, nx) complex blocks. With a
+    real npct it describes the energy3d files as well.
+    """
+
+    def __init__(self, nvars, nz, ny, nx, nprt, npct, names):
+        self.nvars = nvars
+        self.shape = (nz, ny, nx)
+        self.nprt = nprt
+        self.npct = npct
+        # pad the variable names if the file holds more entries than we know of
+        self.names = [names[i] if i < len(names) else 'var{}'.format(i)
+                      for i in range(nvars)]
+        npit = np.dtype(np.int32).newbyteorder(nprt.byteorder)
+        fields = [('te_head', npit), ('time', nprt), ('te_tail', npit)]
+        for name in self.names:
+            fields.append((name + '_head', npit))
+            fields.append((name, npct, self.shape))
+            fields.append((name + '_tail', npit))
+        self.dtype = np.dtype(fields)
+        self.recsize = self.dtype.itemsize
+
+    def nrecords(self, size):
+        """Number of complete records in a file of the given size in bytes"""
+        return int(size//self.recsize)
+
+    def offset(self, tind, var):
+        """Byte offset of the data of variable var at time index tind"""
+        return tind*self.recsize + self.dtype.fields[self.names[var]][1]
+
+
+def count_records(file, layout):
+    """Number of complete records in file
+
+    A trailing record which GENE is still writing is not counted: beyond the
+    size, the closing Fortran record marker of its last block has to be in
+    place.
+    """
+    with open(file, 'rb') as fobj:
+        fobj.seek(0, 2)
+        nrec = layout.nrecords(fobj.tell())
+        if nrec > 0:
+            tail = layout.names[-1] + '_tail'
+            tailtype, tailoffset = layout.dtype.fields[tail][:2]
+            fobj.seek((nrec - 1)*layout.recsize + tailoffset)
+            marker = np.fromfile(fobj, dtype=tailtype, count=1)
+            if len(marker) != 1 or marker[0] != layout.dtype.fields[layout.names[-1]][0].itemsize:
+                nrec -= 1
+    return nrec
+
+
+def map_records(file, layout):
+    """Map all complete records of file as a read-only structured memmap
+
+    Returns None for files that do not yet hold a complete record, since
+    numpy refuses to map empty regions.
+    """
+    nrec = count_records(file, layout)
+    if nrec == 0:
+        return None
+    return np.memmap(file, dtype=layout.dtype, mode='r', shape=(nrec,))
+
+
+def read_times(file, layout, start=0, count=None):
+    """Read the time stamps of records start, start+1, ... in one strided pass"""
+    nrec = count_records(file, layout) - start
+    if count is not None:
+        nrec = min(nrec, count)
+    if nrec <= 0:
+        return np.empty(0)
+    timedt = np.dtype({'names': ['time'], 'formats': [layout.nprt],
+                       'offsets': [layout.dtype.fields['time'][1]],
+                       'itemsize': layout.recsize})
+    mm = np.memmap(file, dtype=timedt, mode='r', offset=start*layout.recsize, shape=(nrec,))
+    times = mm['time'].astype(np.float64)
+    del mm
+    return times
+
+
+def index_path(file):
+    """Name of the sidecar file holding the persisted time index of file"""
+    head, tail = os.path.split(file)
+    return os.path.join(head, '.' + tail + '.tidx.npz')
+
+
+def load_index(file, layout):
+    """Return the persisted time index of file or None if there is none usable
+
+    The index is returned together with the file size and mtime it was built for.
+    """
+    try:
+        with np.load(index_path(file)) as idx:
+            if int(idx['recsize']) != layout.recsize:
+                return None
+            return idx['times'], int(idx['size']), float(idx['mtime'])
+    except (IOError, OSError, KeyError, ValueError):
+        return None
+
+
+def replace_file(src, dst):
+    """os.replace, which Python 2 lacks; there the target is removed first
+    on Windows, where os.rename does not overwrite it"""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def save_index(file, layout, times, size, mtime):
+    """Persist the time index next to file; silently skipped for read-only directories"""
+    path = index_path(file)
+    tmppath = path + '.{}.tmp'.format(os.getpid())
+    try:
+        with open(tmppath, 'wb') as fobj:
+            np.savez(fobj, times=times, size=size, mtime=mtime, recsize=layout.recsize)
+        replace_file(tmppath, path)
+    except (IOError, OSError):
+        try:
+            os.remove(tmppath)
+        except OSError:
+            pass
+
+
+def time_index(file, layout, persist=True):
+    """Return the time stamps of all complete records in file
+
+    A persisted index is reused as is if size and mtime of file are unchanged.
+    If the file has only grown (GENE appends during a run), only the new
+    records are read and the index is extended.
+    """
+    stat = os.stat(file)
+    cached = load_index(file, layout) if persist else None
+    if cached is not None:
+        times, size, mtime = cached
+        if size == stat.st_size and mtime == stat.st_mtime:
+            return times
+        ncached = len(times)
+        # reuse the cached part only if the file was appended to: check the
+        # first and last cached stamps against the file
+        if 0 < ncached <= count_records(file, layout) and \
+           read_times(file, layout, 0, 1)[0] == times[0] and \
+           read_times(file, layout, ncached - 1, 1)[0] == times[-1]:
+            times = np.concatenate((times, read_times(file, layout, ncached)))
+        else:
+            times = read_times(file, layout)
+    else:
+        times = read_times(file, layout)
+    if persist:
+        save_index(file, layout, times, stat.st_size, stat.st_mtime)
+    return times
+
+
+def extend_index(file, layout, times, persist=True):
+    """Return times extended by the stamps of records appended to file since
+
+    Only the new records are read. The persisted index is updated as well.
+    """
+    stat = os.stat(file)
+    new_times = read_times(file, layout, len(times))
+    if len(new_times):
+        times = np.concatenate((times, new_times))
+        if persist:
+            save_index(file, layout, times, stat.st_size, stat.st_mtime)
+    return times
+
+
+# time.monotonic is Python 3 only
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+def follow(gene_file, poll=5., timeout=None):
+    """Yield (tind, time) for every time step appended to gene_file
+
+    gene_file is anything with a taxis and a refresh() method returning the
+    new times, e.g. a fieldfile, momfile or FileSeries of a running
+    simulation. It is polled every poll seconds; the generator ends once no
+    new step arrived for timeout seconds (never, if timeout is None).
+    """
+    idle_since = monotonic()
+    while True:
+        ntimes = len(gene_file.taxis)
+        new_times = gene_file.refresh()
+        for it, new_time in enumerate(new_times):
+            yield ntimes + it, new_time
+        if len(new_times):
+            idle_since = monotonic()
+        elif timeout is not None and monotonic() - idle_since >= timeout:
+            return
+        else:
+            time.sleep(poll)
+
+
+class TimeAxis(object):
+    """TimeAxis class:
+
+    numpy-backed time axis of a field or mom file with bisection lookups.
+    Out-of-order stamps (e.g. from appended continuation data) are handled
+    through a stable sort permutation.
+    """
+
+    def __init__(self, times):
+        self.times = np.asarray(times, dtype=np.float64)
+        if np.all(self.times[1:] >= self.times[:-1]):
+            self.order = None
+            self.sorted = self.times
+        else:
+            self.order = np.argsort(self.times, kind='stable')
+            self.sorted = self.times[self.order]
+
+    def __len__(self):
+        return len(self.times)
+
+    def _unsort(self, pos):
+        return pos if self.order is None else self.order[pos]
+
+    def index(self, time):
+        """Index of the first entry exactly equal to time, ValueError if absent"""
+        pos = np.searchsorted(self.sorted, time, side='left')
+        if pos == len(self.sorted) or self.sorted[pos] != time:
+            raise ValueError('{} is not in time axis'.format(time))
+        return int(self._unsort(pos))
+
+    def nearest(self, time):
+        """Index of the entry closest to time"""
+        if len(self.sorted) == 0:
+            raise ValueError('empty time axis')
+        pos = int(np.searchsorted(self.sorted, time, side='left'))
+        if pos == len(self.sorted) or \
+           (pos > 0 and time - self.sorted[pos - 1] <= self.sorted[pos] - time):
+            # step back to the first entry sharing the closer stamp
+            pos = int(np.searchsorted(self.sorted, self.sorted[pos - 1], side='left'))
+        return int(self._unsort(pos))
+
+    def range(self, t0, t1, stride=1):
+        """Indices of all entries with t0 <= t <= t1, every stride-th one"""
+        lo = np.searchsorted(self.sorted, t0, side='left')
+        hi = np.searchsorted(self.sorted, t1, side='right')
+        if self.order is None:
+            return np.arange(lo, hi, stride)
+        return np.sort(self.order[lo:hi])[::stride]
+
+
+# upper bound for the size of a single coalesced read in bytes
+CHUNK_BYTES = 256*1024**2
+
+
+def selection(z=None, ky=None, kx=None):
+    """Index tuple for a (nz, ny, nx) block from ints or slices; None selects the full axis"""
+    return tuple(slice(None) if ind is None else ind for ind in (z, ky, kx))
+
+
+def selected_shape(shape, sel):
+    """Shape of a block of the given shape after applying the index tuple sel"""
+    return np.broadcast_to(np.int8(0), shape)[sel].shape
+
+
+def as_slice(tinds):
+    """Express an evenly spaced ascending index array as a slice if possible"""
+    if len(tinds) == 1:
+        return slice(tinds[0], tinds[0] + 1)
+    step = tinds[1] - tinds[0]
+    if step > 0 and np.all(np.diff(tinds) == step):
+        return slice(tinds[0], tinds[-1] + 1, step)
+    return None
+
+
+def is_full(sel):
+    """True if the index tuple sel selects complete blocks"""
+    return all(isinstance(ind, slice) and ind == slice(None) for ind in sel)
+
+
+def read_block(fobj, layout, offset, sel):
+    """Read the part sel of the (nz, ny, nx) block starting at byte offset
+
+    Only the bytes spanned by the selection are read: one contiguous read for
+    a range of z planes, one read per z plane for a ky range and one read per
+    (z, ky) row for a kx range. Selections covering at least half of the
+    block are read in one go and cut in memory.
+    """
+    sel = tuple(sel) + (slice(None),)*(3 - len(sel))
+    nz, ny, nx = layout.shape
+    ranges = []
+    for ind, n in zip(sel, layout.shape):
+        if isinstance(ind, slice):
+            ranges.append(range(*ind.indices(n)))
+        else:
+            if not -n <= ind < n:
+                raise IndexError('index {} is out of bounds for axis with size {}'.format(ind, n))
+            ranges.append(range(ind % n, ind % n + 1))
+    if any(rng.step < 0 or len(rng) == 0 for rng in ranges):
+        fobj.seek(offset)
+        return np.fromfile(fobj, dtype=layout.npct, count=nz*ny*nx).reshape(layout.shape)[sel]
+    zr, yr, xr = ranges
+    y0, y1, x0, x1 = yr[0], yr[-1] + 1, xr[0], xr[-1] + 1
+    itemsize = layout.npct.itemsize
+    if len(zr)*len(yr)*len(xr)*2 >= nz*ny*nx or \
+       (x0 == 0 and x1 == nx and y0 == 0 and y1 == ny and zr.step == 1):
+        fobj.seek(offset + zr[0]*ny*nx*itemsize)
+        box = np.fromfile(fobj, dtype=layout.npct, count=(zr[-1] + 1 - zr[0])*ny*nx)
+        box = box.reshape(-1, ny, nx)[::zr.step, y0:y1:yr.step, x0:x1:xr.step]
+    elif x0 == 0 and x1 == nx and yr.step == 1:
+        box = np.empty((len(zr), y1 - y0, nx), dtype=layout.npct)
+        for i, iz in enumerate(zr):
+            fobj.seek(offset + (iz*ny + y0)*nx*itemsize)
+            box[i] = np.fromfile(fobj, dtype=layout.npct, count=(y1 - y0)*nx).reshape(-1, nx)
+        box = box[:, :, ::xr.step]
+    else:
+        box = np.empty((len(zr), len(yr), x1 - x0), dtype=layout.npct)
+        for i, iz in enumerate(zr):
+            for j, iy in enumerate(yr):
+                fobj.seek(offset + ((iz*ny + iy)*nx + x0)*itemsize)
+                box[i, j] = np.fromfile(fobj, dtype=layout.npct, count=x1 - x0)
+        box = box[:, :, ::xr.step]
+    # drop the integer indexed axes
+    return box[tuple(slice(None) if isinstance(ind, slice) else 0 for ind in sel)]
+
+
+def read_entries(fobj, layout, tinds, varinds, sel=(), mm=None):
+    """Read variables varinds at time indices tinds into one contiguous array
+
+    Returns an array of shape (len(varinds), len(tinds)) + selected block shape
+    in native byte order. Runs of consecutive records are read in chunks of
+    whole records, otherwise only the byte span of the requested variables
+    (or of the requested part of each block, see read_block) is read for
+    each record.
+    """
+    tinds = np.asarray(tinds, dtype=np.int64)
+    sel = tuple(sel) + (slice(None),)*(3 - len(sel))
+    names = [layout.names[var] for var in varinds]
+    out = np.empty((len(names), len(tinds)) + selected_shape(layout.shape, sel),
+                   dtype=layout.npct.newbyteorder('='))
+    if len(tinds) == 0:
+        return out
+    if mm is not None:
+        tsel = as_slice(tinds)
+        for i, name in enumerate(names):
+            out[i] = mm[name][(tinds if tsel is None else tsel,) + sel]
+        return out
+    offsets = [layout.dtype.fields[name][1] for name in names]
+    blocksize = layout.dtype.fields[names[0]][0].itemsize
+    spanstart = min(offsets)
+    spanlen = max(offsets) + blocksize - spanstart
+    nselected = len(names)*int(np.prod(out.shape[2:]))*layout.npct.itemsize
+    if spanlen*2 >= layout.recsize and nselected*2 >= layout.recsize:
+        # coalesce runs of consecutive records into chunked whole-record reads
+        nchunk = max(1, CHUNK_BYTES//layout.recsize)
+        runs = np.split(np.arange(len(tinds)), np.nonzero(np.diff(tinds) != 1)[0] + 1)
+        for run in runs:
+            for i0 in range(0, len(run), nchunk):
+                part = run[i0:i0 + nchunk]
+                fobj.seek(int(tinds[part[0]])*layout.recsize)
+                recs = np.fromfile(fobj, dtype=layout.dtype, count=len(part))
+                if len(recs) != len(part):
+                    raise IOError('unexpected end of file {}'.format(fobj.name))
+                for i, name in enumerate(names):
+                    out[i, part[0]:part[-1] + 1] = recs[name][(slice(None),) + sel]
+    elif not is_full(sel):
+        # hyperslab reads of the selected part of each block
+        for it, tind in enumerate(tinds):
+            for i, off in enumerate(offsets):
+                out[i, it] = read_block(fobj, layout, int(tind)*layout.recsize + off, sel)
+    else:
+        spandt = np.dtype({'names': names,
+                           'formats': [(layout.npct, layout.shape)]*len(names),
+                           'offsets': [off - spanstart for off in offsets],
+                           'itemsize': spanlen})
+        for it, tind in enumerate(tinds):
+            fobj.seek(int(tind)*layout.recsize + spanstart)
+            rec = np.fromfile(fobj, dtype=spandt, count=1)
+            if len(rec) != 1:
+                raise IOError('unexpected end of file {}'.format(fobj.name))
+            for i, name in enumerate(names):
+                out[i, it] = rec[name][0][sel]
+    return out
+
+
+
+class SliceCache(object):
+    """SliceCache class:
+
+    Least recently used cache of decoded field/mom blocks with a memory cap
+    in bytes. One instance can be shared by any number of fieldfile and
+    momfile objects; entries are keyed by (file, tind, var, selection).
+    Cached arrays are read-only, since they are handed out repeatedly.
+    """
+
+    def __init__(self, maxbytes=1024**3):
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(file, tind, var, sel):
+        """Hashable cache key; slices are not hashable before python 3.12"""
+        return (os.path.abspath(file), int(tind), var,
+                tuple((ind.start, ind.stop, ind.step) if isinstance(ind, slice) else ind
+                      for ind in sel))
+
+    def get(self, key):
+        """Return the cached array for key or None"""
+        with self.lock:
+            arr = self.entries.get(key)
+            if arr is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return arr
+
+    def put(self, key, arr):
+        """Store arr under key, evicting the least recently used entries as needed"""
+        if arr.nbytes > self.maxbytes:
+            return arr
+        arr.flags.writeable = False
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key).nbytes
+            self.entries[key] = arr
+            self.nbytes += arr.nbytes
+            while self.nbytes > self.maxbytes:
+                self.nbytes -= self.entries.popitem(last=False)[1].nbytes
+        return arr
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Return hits, misses, number of entries and bytes in use"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self.entries), 'nbytes': self.nbytes}
+
+
+
+def prefetch(file, layout, tinds, varinds, sel=(), depth=4, mm=None):
+    """Yield the data of varinds for each of tinds in turn, see read_entries
+
+    A background thread with its own file handle reads up to depth time
+    steps ahead into a bounded queue, so that reading overlaps with whatever
+    the consumer does with the current step. depth=0 reads synchronously.
+    """
+    if depth <= 0 or mm is not None:
+        with open(file, 'rb') as fobj:
+            for tind in tinds:
+                yield read_entries(fobj, layout, [tind], varinds, sel, mm)[:, 0]
+        return
+    buf = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        # give up once the consumer has stopped listening
+        while not stop.is_set():
+            try:
+                buf.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def reader():
+        try:
+            with open(file, 'rb') as fobj:
+                for tind in tinds:
+                    if stop.is_set():
+                        return
+                    put(read_entries(fobj, layout, [tind], varinds, sel)[:, 0])
+        except Exception as exc:
+            put(exc)
+
+    thread = threading.Thread(target=reader)
+    thread.daemon = True
+    thread.start()
+    try:
+        for _ in range(len(tinds)):
+            item = buf.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def datatypes(pars):
+    """Real and complex datatypes of GENE binary output according to precision and endianness"""
+    if pars['PRECISION'] == 'DOUBLE':
+        nprt = np.dtype(np.float64)
+        npct = np.dtype(np.complex128)
+    else:
+        nprt = np.dtype(np.float32)
+        npct = np.dtype(np.complex64)
+    if pars.get('ENDIANNESS') == 'BIG':
+        nprt = nprt.newbyteorder('>')
+        npct = npct.newbyteorder('>')
+    return nprt, npct
+
+
+class FileSeries(object):
+    """FileSeries class:
+
+    Base class presenting the field or mom files of a continuation run as one
+    file on a single time axis. Files are opened lazily when data is read.
+    Where two consecutive files overlap in time, the later file takes
+    preference, as in nrgdata.gluenrgdata.
+    """
+    # parameters which have to agree between all files of the series
+    shared_pars = ('nx0', 'nky0', 'nz0', 'PRECISION', 'ENDIANNESS')
+
+    def __init__(self, files, pars, opener, nvars_key, names, **kwargs):
+        if not files:
+            raise ValueError('empty list of files')
+        self.files = list(files)
+        if isinstance(pars, dict):
+            pars = [pars]*len(self.files)
+        if len(pars) != len(self.files):
+            raise ValueError('need one parameter set per file')
+        for key in self.shared_pars + (nvars_key,):
+            values = set(str(par.get(key)) for par in pars)
+            if len(values) > 1:
+                raise ValueError('{} differs between files: {}'.format(key, sorted(values)))
+        self.pars = pars
+        self.opener = opener
+        self.kwargs = kwargs
+        self.handles = [None]*len(self.files)
+        self.layout = RecordLayout(int(pars[0][nvars_key]), int(pars[0]['nz0']),
+                                   int(pars[0]['nky0']), int(pars[0]['nx0']),
+                                   *datatypes(pars[0]), names=names)
+        self.build_axis()
+        self.reset_tinds()
+
+    def build_axis(self):
+        """Glue the time indices of all files to one axis"""
+        ftimes = [time_index(file, self.layout) for file in self.files]
+        times, fileinds, localinds = [], [], []
+        for ifile, ftime in enumerate(ftimes):
+            nkeep = len(ftime)
+            # when times overlap, give the following file preference
+            for nexttime in ftimes[ifile + 1:]:
+                if len(nexttime):
+                    nkeep = int(np.searchsorted(ftime, nexttime[0], side='left'))
+                    break
+            times.append(ftime[:nkeep])
+            fileinds.append(np.full(nkeep, ifile, dtype=np.int64))
+            localinds.append(np.arange(nkeep))
+        self.taxis = TimeAxis(np.concatenate(times))
+        self.fileind = np.concatenate(fileinds)
+        self.localind = np.concatenate(localinds)
+
+    def reset_tinds(self):
+        self.tind = 0
+        self.time = self.taxis.times[0] if len(self.taxis) else None
+
+    def refresh(self):
+        """Pick up time steps appended to the files since the last call
+
+        Returns the times of the new steps on the global axis.
+        """
+        ntimes = len(self.taxis)
+        for gene_file in self.handles:
+            if gene_file is not None:
+                gene_file.refresh()
+        self.build_axis()
+        return self.taxis.times[ntimes:]
+
+    def follow(self, poll=5., timeout=None):
+        return follow(self, poll, timeout)
+
+    def handle(self, ifile):
+        """The opened file object of the ifile-th file"""
+        if self.handles[ifile] is None:
+            self.handles[ifile] = self.opener(self.files[ifile], self.pars[ifile], **self.kwargs)
+        return self.handles[ifile]
+
+    def current(self):
+        """The file object positioned at the current time step"""
+        gene_file = self.handle(self.fileind[self.tind])
+        gene_file.set_tind(self.localind[self.tind])
+        return gene_file
+
+    def get_minmaxtime(self):
+        return self.taxis.times[0], self.taxis.times[-1]
+
+    def get_tind(self):
+        return self.taxis.index(self.time)
+
+    def get_tind_nearest(self, time):
+        return self.taxis.nearest(time)
+
+    def tind_range(self, t0, t1, stride=1):
+        return self.taxis.range(t0, t1, stride)
+
+    def set_time(self, time):
+        self.time = time
+        self.tind = self.get_tind()
+
+    def set_time_nearest(self, time):
+        self.set_tind(self.get_tind_nearest(time))
+        return self.time
+
+    def set_tind(self, tind):
+        self.time = self.taxis.times[tind]
+        self.tind = int(tind) % len(self.taxis)
+
+    def readvar(self, var, ky=None, kx=None, z=None):
+        return self.current().readvar(var, ky, kx, z)
+
+    def read_tinds(self, tinds, vars, ky=None, kx=None, z=None):
+        """Read vars at global time indices tinds, see fieldlib.fieldfile.read_tinds"""
+        single = isinstance(vars, str)
+        if single:
+            vars = (vars,)
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.taxis)
+        sel = selection(z, ky, kx)
+        data = np.empty((len(vars), len(tinds)) + selected_shape(self.layout.shape, sel),
+                        dtype=self.layout.npct.newbyteorder('='))
+        fileinds = self.fileind[tinds]
+        for ifile in np.unique(fileinds):
+            pos = np.nonzero(fileinds == ifile)[0]
+            data[:, pos] = self.handle(ifile).read_tinds(self.localind[tinds[pos]], vars,
+                                                         ky, kx, z)[1]
+        times = self.taxis.times[tinds]
+        return (times, data[0]) if single else (times, data)
+
+    def read_window(self, t0, t1, vars, stride=1, ky=None, kx=None, z=None):
+        return self.read_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z)
+
+    def iter_tinds(self, tinds, vars, ky=None, kx=None, z=None, prefetch=4):
+        """Yield (time, data) for global time indices tinds, see fieldlib.fieldfile.iter_tinds"""
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.taxis)
+        fileinds = self.fileind[tinds]
+        bounds = np.nonzero(np.diff(fileinds))[0] + 1
+        for part in np.split(np.arange(len(tinds)), bounds):
+            if len(part):
+                gene_file = self.handle(fileinds[part[0]])
+                for item in gene_file.iter_tinds(self.localind[tinds[part]], vars,
+                                                 ky, kx, z, prefetch):
+                    yield item
+
+    def iter_times(self, t0, t1, vars, stride=1, ky=None, kx=None, z=None, prefetch=4):
+        return self.iter_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z, prefetch)
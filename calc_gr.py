@@ -5,6 +5,10 @@ from sys import exit
 from get_nrg import *
 import os
 from finite_differences import *
+import nrglib
+import scanlib
+from ParIO import load_parameters
+from fieldlib import fieldfile
 
 
 def calc_gr2(suffix,nspec=2,ncols=10):
@@ -247,3 +251,171 @@ def calc_gr(suffix,nspec=2,ncols=10):
         return -1
 
 
+def pad_runs(arrays,fill=np.nan):
+    """Stack arrays of different lengths into one, padded with fill at the end.
+    Returns the stacked array (nruns,ntmax,...) and the lengths."""
+    lengths = np.array([len(arr) for arr in arrays],dtype=int)
+    ntmax = lengths.max() if len(arrays) else 0
+    shape = np.shape(arrays[0])[1:] if len(arrays) else ()
+    dtype = np.result_type(*arrays) if len(arrays) else np.float64
+    stacked = np.full((len(arrays),ntmax)+shape,fill,dtype=dtype)
+    for irun,arr in enumerate(arrays):
+        stacked[irun,:len(arr)] = arr
+    return stacked,lengths
+
+
+def default_start_times(tend):
+    """Start of the averaging window used by calc_gr2: the last 2 time units
+    for runs longer than 80, the last 5% otherwise"""
+    return np.where(tend > 80,tend-2.0,0.95*tend)
+
+
+def batch_growth_rates(times,nrgs,tstart=None,rtol=1.0e-2):
+    """Growth rates of many runs at once from their nrg data.
+
+    times is a list of time arrays, nrgs a list of (ntime,nspec,ncols) nrg
+    arrays (see nrglib.read_nrg), one per run. As in calc_gr2 a trailing
+    record which has dropped to zero is ignored and 0.5*d(log nrg)/dt is
+    averaged over the window from tstart (scalar or per run, by default
+    default_start_times) to the end of each run, for all species and
+    columns at once. Returns gamma, spread (standard deviation of the
+    log-derivative in the window), err (relative deviation of the
+    exponential fit, as in calc_gr2), each (nruns,nspec,ncols), and the
+    flags converged = err < rtol."""
+    time,ntimes = pad_runs([np.asarray(t,dtype=np.float64) for t in times])
+    nrg = pad_runs([np.asarray(n,dtype=np.float64) for n in nrgs])[0]
+    runs = np.arange(len(ntimes))
+    with np.errstate(divide='ignore',invalid='ignore'):
+        dropped = nrg[runs,ntimes-1,0,0]/nrg[runs,np.maximum(ntimes-2,0),0,0] < 1.0e-10
+    ntimes = ntimes-(dropped & (ntimes > 2))
+    itime = np.arange(time.shape[1])
+    valid = itime[np.newaxis,:] < ntimes[:,np.newaxis]
+    time = np.where(valid,time,np.nan)
+    tend = time[runs,ntimes-1]
+    if tstart is None:
+        tstart = default_start_times(tend)
+    tstart = np.broadcast_to(np.asarray(tstart,dtype=np.float64),tend.shape)
+    start = np.nanargmin(np.abs(time-tstart[:,np.newaxis]),axis=1)
+    inwindow = valid & (itime[np.newaxis,:] >= start[:,np.newaxis])
+    # intervals from start to the last valid record
+    intervals = inwindow[:,:-1] & valid[:,1:]
+    mask = intervals[:,:,np.newaxis,np.newaxis]
+    points = inwindow[:,:,np.newaxis,np.newaxis]
+    count = np.maximum(intervals.sum(axis=1),1)[:,np.newaxis,np.newaxis]
+    with np.errstate(divide='ignore',invalid='ignore'):
+        dt = np.diff(time,axis=1)[:,:,np.newaxis,np.newaxis]
+        dlogdt = 0.5*(nrg[:,1:]-nrg[:,:-1])/dt/(0.5*(nrg[:,1:]+nrg[:,:-1]))
+        gamma = np.where(mask,dlogdt,0.0).sum(axis=1)/count
+        spread = np.sqrt(np.where(mask,(dlogdt-gamma[:,np.newaxis])**2,0.0).sum(axis=1)/count)
+        nrgend = nrg[runs,ntimes-1]
+        fit = nrgend[:,np.newaxis]*np.exp(2.0*gamma[:,np.newaxis]*
+                                          (time-tend[:,np.newaxis])[:,:,np.newaxis,np.newaxis])
+        err = np.abs(np.where(points,nrg-fit,0.0).sum(axis=1))/np.where(points,nrg,0.0).sum(axis=1)
+    return gamma,spread,err,err < rtol
+
+
+def batch_frequencies(times,traces):
+    """Complex frequencies of many runs at once from complex time traces
+    (e.g. phi at its maximum), as in calc_omega_from_field.py: log(f(t_i)/f(t_i-1))/dt
+    averaged over the finite ratios of each trace (zero samples are left
+    out). Returns gamma, omega and their standard deviations, each (nruns,);
+    nan for traces with no finite ratio."""
+    time,ntimes = pad_runs([np.asarray(t,dtype=np.float64) for t in times])
+    trace = pad_runs([np.asarray(f,dtype=np.complex128) for f in traces])[0]
+    with np.errstate(divide='ignore',invalid='ignore'):
+        omega = np.log(trace[:,1:]/trace[:,:-1])/np.diff(time,axis=1)
+        #the padding is nan, so this also masks the points past each trace
+        valid = np.isfinite(omega)
+        count = valid.sum(axis=1).astype(np.float64)
+        count[count < 1] = np.nan
+        omega = np.where(valid,omega,0.0)
+        mean = omega.sum(axis=1)/count
+        dev = np.where(valid,omega-mean[:,np.newaxis],0.0)
+        std_gamma = np.sqrt((dev.real**2).sum(axis=1)/count)
+        std_omega = np.sqrt((dev.imag**2).sum(axis=1)/count)
+    return mean.real,mean.imag,std_gamma,std_omega
+
+
+def field_trace(field,tstart,var='phi'):
+    """Time trace of var (ky index 0) at the location of its maximum at the
+    last time step, from tstart to the end of the field file"""
+    tinds = field.tind_range(tstart,field.tfld[-1])
+    last = np.abs(field.read_tinds([-1],var,ky=0)[1][0])
+    iz,ix = np.unravel_index(np.argmax(last),last.shape)
+    time,data = field.read_tinds(tinds,var,ky=0,z=iz,kx=ix)
+    return time,data.reshape(len(time))
+
+
+def scan_growth_rates(scandir='.',nruns=None,tstart=None,rtol=1.0e-2,use_field=True,
+                      outfile='growth_rates.dat',only=None,min_field_records=10):
+    """Growth rates and frequencies of all runs of a linear scan.
+
+    The nrg files of all runs are read (with the nrglib cache) and evaluated
+    together by batch_growth_rates; with use_field the complex frequency is
+    taken from phi in the field files by batch_frequencies over the same
+    window, widened to the last min_field_records field records where the
+    field output is sparser. Only the run numbers in only are evaluated
+    (default: all). Returns a table with one row per run (run, kymin, gamma and err
+    of the density of the first species as calc_gr2, converged, gamma_field,
+    omega_field and their spreads; nan for runs without output) and the
+    per-column growth rates (nruns,nspec,ncols). The table is also written
+    to scandir/outfile unless outfile is None."""
+    runs = scanlib.scan_files(scandir,nruns)
+    table = np.zeros(len(runs),dtype=[('run',np.int64),('kymin',np.float64),
+                                      ('gamma',np.float64),('err',np.float64),
+                                      ('converged',bool),('gamma_field',np.float64),
+                                      ('omega_field',np.float64),('gamma_field_std',np.float64),
+                                      ('omega_field_std',np.float64)])
+    table['run'] = [run for run,path in runs]
+    for name in table.dtype.names[1:]:
+        if name != 'converged':
+            table[name] = np.nan
+    done,times,nrgs,parlist = [],[],[],[]
+    for irun,(run,path) in enumerate(runs):
+        if path is None or (only is not None and run not in only):
+            continue
+        pars = load_parameters(path).pardict
+        table['kymin'][irun] = scanlib.scan_value(pars.get('kymin',np.nan))
+        nrgfile = os.path.join(scandir,'nrg_%04d' % run)
+        if not os.path.isfile(nrgfile):
+            continue
+        time,nrg = nrglib.read_nrg(nrgfile,int(pars['n_spec']))
+        if len(time) < 3:
+            continue
+        done.append(irun)
+        times.append(time)
+        nrgs.append(nrg)
+        parlist.append(pars)
+    rates = None
+    if done:
+        gamma,spread,err,converged = batch_growth_rates(times,nrgs,tstart,rtol)
+        table['gamma'][done] = gamma[:,0,0]
+        table['err'][done] = err[:,0,0]
+        table['converged'][done] = converged[:,0,0]
+        rates = np.full((len(runs),)+gamma.shape[1:],np.nan)
+        rates[done] = gamma
+    if done and use_field:
+        starts = default_start_times(np.array([time[-1] for time in times])) if tstart is None \
+            else np.broadcast_to(tstart,(len(done),))
+        ftimes,ftraces,fdone = [],[],[]
+        for irun,pars,start in zip(done,parlist,starts):
+            fieldname = os.path.join(scandir,'field_%04d' % table['run'][irun])
+            if not os.path.isfile(fieldname):
+                continue
+            field = fieldfile(fieldname,pars)
+            start = min(start,field.tfld[-min(len(field.tfld),min_field_records)])
+            ftime,ftrace = field_trace(field,start)
+            ftimes.append(ftime)
+            ftraces.append(ftrace)
+            fdone.append(irun)
+        if fdone:
+            freqs = batch_frequencies(ftimes,ftraces)
+            for name,values in zip(('gamma_field','omega_field','gamma_field_std',
+                                    'omega_field_std'),freqs):
+                table[name][fdone] = values
+    if outfile is not None:
+        np.savetxt(os.path.join(scandir,outfile),
+                   np.array([table[name] for name in table.dtype.names],dtype=np.float64).T,
+                   header=' '.join('%d.%s' % (icol+1,name) for icol,name in enumerate(table.dtype.names)))
+    return table,rates
+
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+import os
+import numpy as np
+import binlib
+from reducelib import abs2
+
+
+class checkpointfile(object):
+    # reads GENE (s_)checkpoint files out-of-core: after a header holding the
+    # precision as 6 characters, the time, dt and the grid dimensions, the
+    # distribution function g(x, ky, z, v, mu, spec) is stored in Fortran
+    # order. g is memory mapped, so slices of it are only read when used
+    # and the moments and ky spectra are computed in chunks of CHUNK_BYTES
+    def __init__(self, file, pars):
+        self.pars = pars
+        self.file = file
+        self.set_gridcounts()
+        self.nprt, self.npct = binlib.datatypes(pars)
+        self.read_header()
+        self.g = np.memmap(file, dtype=self.npct, mode='r', offset=self.headersize,
+                           shape=self.shape, order='F')
+        self.set_velocity_grids()
+
+    # set resolution
+    def set_gridcounts(self):
+        self.nx = int(self.pars['nx0'])
+        self.ny = int(self.pars['nky0'])
+        self.nz = int(self.pars['nz0'])
+        self.nv = int(self.pars['nv0'])
+        self.nw = int(self.pars['nw0'])
+        self.nspec = int(self.pars['n_spec'])
+        self.shape = (self.nx, self.ny, self.nz, self.nv, self.nw, self.nspec)
+
+    # precision string, time and dt, then the six grid dimensions as int32
+    def read_header(self):
+        npit = np.dtype(np.int32).newbyteorder(self.nprt.byteorder)
+        header = np.dtype([('prec', 'S6'), ('time', self.nprt), ('dt', self.nprt),
+                           ('dims', npit, 6)])
+        self.headersize = header.itemsize
+        datasize = int(np.prod(self.shape))*self.npct.itemsize
+        filesize = os.path.getsize(self.file)
+        if filesize != self.headersize + datasize:
+            raise ValueError('size of {} ({} bytes) does not match the grid {} of the '
+                             'parameters'.format(self.file, filesize, self.shape))
+        with open(self.file, 'rb') as f:
+            head = np.fromfile(f, dtype=header, count=1)[0]
+        if tuple(head['dims']) != self.shape:
+            raise ValueError('grid {} of {} does not match the grid {} of the '
+                             'parameters'.format(tuple(head['dims']), self.file, self.shape))
+        self.prec = head['prec'].decode().strip()
+        self.time = float(head['time'])
+        self.dt = float(head['dt'])
+
+    # parallel velocity grid as in GENE, equidistant on [-lv, lv], and the mu
+    # grid of Gauss-Legendre points on [0, lw]; the weights do not contain
+    # the geometry factor pi*B0(x, z) of the mu integration. set vp, wv, mu
+    # and wmu by hand for other grids
+    def set_velocity_grids(self):
+        lv = float(self.pars['lv'])
+        lw = float(self.pars['lw'])
+        self.vp = np.linspace(-lv, lv, self.nv)
+        self.wv = np.full(self.nv, 2.0*lv/(self.nv - 1))
+        nodes, weights = np.polynomial.legendre.leggauss(self.nw)
+        self.mu = 0.5*lw*(nodes + 1.0)
+        self.wmu = 0.5*lw*weights
+
+    # g(x, ky, z) of velocity point (iv, imu) and species ispec as a view
+    def slice(self, iv, imu, ispec):
+        return self.g[:, :, :, iv, imu, ispec]
+
+    # (ispec, mu slice) chunks of g, each a view of contiguous bytes
+    def chunks(self):
+        slab = self.nx*self.ny*self.nz*self.nv*self.npct.itemsize
+        nmu = max(1, binlib.CHUNK_BYTES//slab)
+        for ispec in range(self.nspec):
+            for mu0 in range(0, self.nw, nmu):
+                mus = slice(mu0, min(mu0 + nmu, self.nw))
+                yield ispec, mus, self.g[:, :, :, :, mus, ispec]
+
+    # velocity space integrals of g with the weights vp**vpow*mu**mupow for
+    # each (vpow, mupow) in powers, all computed in one pass over the file;
+    # returns an array of shape (len(powers), nx, nky, nz, nspec)
+    def velocity_moments(self, powers):
+        out = np.zeros((len(powers),) + self.shape[:3] + (self.nspec,),
+                       dtype=self.npct.newbyteorder('='))
+        weights = [np.outer(self.wv*self.vp**vpow, self.wmu*self.mu**mupow)
+                   for vpow, mupow in powers]
+        for ispec, mus, chunk in self.chunks():
+            chunk = np.asarray(chunk)
+            for imom, weight in enumerate(weights):
+                out[imom, ..., ispec] += np.tensordot(chunk, weight[:, mus],
+                                                      axes=([3, 4], [0, 1]))
+        return out
+
+    # the moments dens, upar, tpar and tperp of g, each (nx, nky, nz, nspec)
+    def moments(self):
+        names = ('dens', 'upar', 'tpar', 'tperp')
+        data = self.velocity_moments([(0, 0), (1, 0), (2, 0), (0, 1)])
+        return dict(zip(names, data))
+
+    # sum of |g|^2 over x, z and velocity space (with the velocity weights)
+    # per ky and species, shape (nky, nspec)
+    def energy_ky(self):
+        out = np.zeros((self.ny, self.nspec))
+        weight = np.outer(self.wv, self.wmu)
+        for ispec, mus, chunk in self.chunks():
+            out[:, ispec] += np.einsum('xkzvm,vm->k', abs2(np.asarray(chunk)),
+                                       weight[:, mus])
+        return out
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+import numpy as np
+import binlib
+
+
+class energy3dfile(object):
+    # reads GENE energy3d files: per time step a Fortran-framed time entry and
+    # n_entries Fortran-framed real (ky, x, z) blocks, ky running fastest.
+    # the arrays returned are indexed [ky, x, z] as in read_energy3d.py.
+    # with mmap=True (default) the records are read through a memory map
+    def __init__(self, file, pars, mmap=True, n_entries=6):
+        self.pars = pars
+        self.file = file
+        self.use_mmap = mmap
+        self.mm = None
+        self.nentries = n_entries
+        self.set_gridcounts()
+        self.nprt = binlib.datatypes(pars)[0]
+        # the layout describes the blocks in file order, i.e. as (z, x, ky)
+        self.layout = binlib.RecordLayout(self.nentries, self.nz, self.nx, self.ny,
+                                          self.nprt, self.nprt,
+                                          ['entry{}'.format(i) for i in range(self.nentries)])
+        self.redirect(self.file)
+
+    # call this routine to read from a new energy3d file
+    def redirect(self, file):
+        self.file = file
+        try:
+            self.f.close()
+        except (AttributeError, OSError):
+            pass
+        self.f = open(file, 'rb')
+        if self.use_mmap:
+            self.mm = binlib.map_records(file, self.layout)
+        self.get_timearray()
+        self.reset_tinds()
+
+    # set resolution
+    def set_gridcounts(self):
+        self.nx = int(self.pars['nx0'])
+        self.ny = int(self.pars['nky0'])
+        self.nz = int(self.pars['nz0'])
+
+    # get time array from the (persisted) time index in one strided read
+    def get_timearray(self):
+        self.taxis = binlib.TimeAxis(binlib.time_index(self.file, self.layout))
+        self.te3d = self.taxis.times.tolist()
+
+    # pick up time steps appended since the last call; returns their times
+    def refresh(self):
+        ntimes = len(self.te3d)
+        times = binlib.extend_index(self.file, self.layout, self.taxis.times)
+        if len(times) > ntimes:
+            self.taxis = binlib.TimeAxis(times)
+            self.te3d = times.tolist()
+            if self.use_mmap:
+                self.mm = binlib.map_records(self.file, self.layout)
+        return times[ntimes:]
+
+    def get_minmaxtime(self):
+        return self.te3d[0], self.te3d[-1]
+
+    # return time index for given time, if it is present
+    # otherwise, an exception is raised
+    def get_tind(self):
+        return self.taxis.index(self.time)
+
+    # return time index closest to the given time
+    def get_tind_nearest(self, time):
+        return self.taxis.nearest(time)
+
+    # return time indices with t0 <= time <= t1, every stride-th one
+    def tind_range(self, t0, t1, stride=1):
+        return self.taxis.range(t0, t1, stride)
+
+    # set current timestep
+    def set_time(self, time):
+        self.time = time
+        self.tind = self.get_tind()
+
+    # set current timestep to the one closest to time and return its time
+    def set_time_nearest(self, time):
+        self.set_tind(self.get_tind_nearest(time))
+        return self.time
+
+    # set current timestep by index (negative indices count from the end)
+    def set_tind(self, tind):
+        self.time = self.te3d[tind]
+        self.tind = int(tind) % len(self.te3d)
+
+    def reset_tinds(self):
+        self.tind = 0
+        self.time = self.te3d[0] if self.te3d else None
+
+    # returns entry ientry at the current timestep as [ky, x, z]; ky, x and z
+    # (ints or slices) select a part of it
+    def entry(self, ientry, ky=None, x=None, z=None):
+        sel = binlib.selection(z, x, ky)
+        if self.mm is not None:
+            return self.mm[self.layout.names[ientry]][self.tind][sel].T
+        data = binlib.read_entries(self.f, self.layout, [self.tind], [ientry], sel)
+        return data[0, 0].T
+
+    # returns times and the entries for the given time indices as one array of
+    # shape (len(entries), nt, nky, nx, nz), or (nt, nky, nx, nz) for a single int
+    def read_tinds(self, tinds, entries=None, ky=None, x=None, z=None):
+        single = isinstance(entries, (int, np.integer))
+        if entries is None:
+            entries = range(self.nentries)
+        elif single:
+            entries = [entries]
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.te3d)
+        data = binlib.read_entries(self.f, self.layout, tinds, list(entries),
+                                   binlib.selection(z, x, ky), self.mm)
+        # (z, x, ky) in file order to [ky, x, z]
+        data = np.moveaxis(data, range(2, data.ndim), range(data.ndim - 1, 1, -1))
+        times = self.taxis.times[tinds]
+        return (times, data[0]) if single else (times, data)
+
+    # same for all time steps with t0 <= time <= t1, every stride-th one
+    def read_window(self, t0, t1, entries=None, stride=1, ky=None, x=None, z=None):
+        return self.read_tinds(self.tind_range(t0, t1, stride), entries, ky, x, z)
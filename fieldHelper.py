@@ -94,8 +94,8 @@ def field_tx(field, \
              show_xz = False, \
              plot_format = 'display'):
 
-    itStart = np.argmin(abs(np.array(field.tfld) - tStart))
-    itEnd = np.argmin(abs(np.array(field.tfld) - tEnd))
+    itStart = field.get_tind_nearest(tStart)
+    itEnd = field.get_tind_nearest(tEnd)
     tsteps = itEnd - itStart + 1
     tgrid = []
     nz = field.nz
@@ -128,8 +128,8 @@ def local_eigenfunctions(pars, \
         field.set_time(field.tfld[setTime])
         print ('Reading eigenfunctions are at t = ', field.tfld[setTime])
     else:
-        isetTime = np.argmin(abs(np.array(field.tfld)-setTime))
-        field.set_time(field.tfld[isetTime])
+        isetTime = field.get_tind_nearest(setTime)
+        field.set_tind(isetTime)
         print ('Reading eigenfunctions are at t = ', field.tfld[isetTime])
 
     if center_only:
@@ -2,17 +2,26 @@
 import struct
 from os.path import getsize, join
 import numpy as np
+import binlib
 
 
 class fieldfile(object):
     # class constructor
-    def __init__(self, file, pars):
+    # with mmap=True the whole file is mapped once and phi(), apar() and bpar()
+    # return read-only views into the map instead of freshly read copies
+    # cache is an optional binlib.SliceCache, which may be shared between files
+    def __init__(self, file, pars, mmap=False, cache=None):
         self.pars = pars
         self.file = file
+        self.use_mmap = mmap
+        self.cache = cache
+        self.mm = None
         self.set_gridcounts()
         self.set_sizes()
         self.set_datatypes()
         self.te, self.tesize = self.TimeEntry()
+        self.layout = binlib.RecordLayout(self.nfields, self.nz, self.ny, self.nx,
+                                          self.nprt, self.npct, ['phi', 'apar', 'bpar'])
         self.define_arrays()
         self.redirect(self.file)
 
@@ -24,6 +33,8 @@ class fieldfile(object):
         except (AttributeError, OSError):
             pass
         self.f = open(file, 'rb')
+        if self.use_mmap:
+            self.mm = binlib.map_records(file, self.layout)
         self.tfld = []
         self.get_timearray()
         self.reset_tinds()
@@ -69,10 +80,26 @@ class fieldfile(object):
         self.bpar3d = np.empty((self.nz, self.ny, self.nx), dtype=self.npct)
 
     def get_timearray(self):
-        # get time arrays for field file
-        for i in range(int(getsize(self.file)/(self.leapfld + self.tesize))):
-            self.tfld.append(float(self.te.unpack(self.f.read(self.tesize))[1]))
-            self.f.seek(self.leapfld, 1)
+        # get time arrays for field file from the (persisted) time index
+        self.taxis = binlib.TimeAxis(binlib.time_index(self.file, self.layout))
+        self.tfld = self.taxis.times.tolist()
+
+    # pick up time steps appended since the last call, e.g. while GENE is
+    # still running; only the new records are read. returns their times
+    def refresh(self):
+        ntimes = len(self.tfld)
+        times = binlib.extend_index(self.file, self.layout, self.taxis.times)
+        if len(times) > ntimes:
+            self.taxis = binlib.TimeAxis(times)
+            self.tfld = times.tolist()
+            if self.use_mmap:
+                self.mm = binlib.map_records(self.file, self.layout)
+        return times[ntimes:]
+
+    # yield (tind, time) for each new time step as it lands in the file,
+    # polling every poll seconds until none arrived for timeout seconds
+    def follow(self, poll=5., timeout=None):
+        return binlib.follow(self, poll, timeout)
 
     def get_minmaxtime(self):
         if not self.tfld:
@@ -99,31 +126,107 @@ class fieldfile(object):
             return self.tesize + self.tind*(self.tesize+self.leapfld) + var*(
                    self.entrysize + 2*self.intsize) + self.intsize
 
-    # returns field for given timestep
-    def readvar(self, var):
-        self.f.seek(self.offset(var))
-        var3d = np.fromfile(self.f, count=self.nx*self.ny*self.nz, dtype=self.npct).reshape(self.nz,
-                                                                                            self.ny,
-                                                                                            self.nx)
+    # returns field for given timestep; ky, kx and z (ints or slices) select
+    # a hyperslab var3d[z, ky, kx] of which only the needed bytes are read
+    def readvar(self, var, ky=None, kx=None, z=None):
+        sel = binlib.selection(z, ky, kx)
+        if self.mm is not None:
+            return self.mm[self.layout.names[var]][self.tind][sel]
+        if self.cache is not None:
+            key = self.cache.key(self.file, self.tind, var, sel)
+            var3d = self.cache.get(key)
+            if var3d is not None:
+                return var3d
+        if not binlib.is_full(sel):
+            var3d = binlib.read_block(self.f, self.layout, self.offset(var), sel)
+        else:
+            self.f.seek(self.offset(var))
+            var3d = np.fromfile(self.f, count=self.nx*self.ny*self.nz,
+                                dtype=self.npct).reshape(self.nz, self.ny, self.nx)
+        if self.cache is not None:
+            self.cache.put(key, var3d)
         return var3d
 
+    # returns times and data of vars for the given time indices as one array of
+    # shape (len(vars), nt, nz, ny, nx), or (nt, nz, ny, nx) for a single var name;
+    # z, ky and kx (ints or slices) restrict the block as in var3d[z, ky, kx]
+    def read_tinds(self, tinds, vars=('phi', 'apar'), ky=None, kx=None, z=None):
+        single = isinstance(vars, str)
+        if single:
+            vars = (vars,)
+        for var in vars:
+            if var not in self.layout.names:
+                raise ValueError('{} is not in field file {}'.format(var, self.file))
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.tfld)
+        data = binlib.read_entries(self.f, self.layout, tinds,
+                                   [self.layout.names.index(var) for var in vars],
+                                   binlib.selection(z, ky, kx), self.mm)
+        times = self.taxis.times[tinds]
+        return (times, data[0]) if single else (times, data)
+
+    # same for all time steps with t0 <= time <= t1, every stride-th one
+    def read_window(self, t0, t1, vars=('phi', 'apar'), stride=1, ky=None, kx=None, z=None):
+        return self.read_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z)
+
+    # yields (time, data) for each of tinds in turn with data shaped as one time
+    # step of read_tinds; a background thread reads up to prefetch steps ahead
+    def iter_tinds(self, tinds, vars=('phi', 'apar'), ky=None, kx=None, z=None, prefetch=4):
+        single = isinstance(vars, str)
+        if single:
+            vars = (vars,)
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.tfld)
+        reader = binlib.prefetch(self.file, self.layout, tinds,
+                                 [self.layout.names.index(var) for var in vars],
+                                 binlib.selection(z, ky, kx), prefetch, self.mm)
+        try:
+            for tind, data in zip(tinds, reader):
+                yield self.tfld[tind], (data[0] if single else data)
+        finally:
+            reader.close()
+
+    # same for all time steps with t0 <= time <= t1, every stride-th one
+    def iter_times(self, t0, t1, vars=('phi', 'apar'), stride=1, ky=None, kx=None, z=None,
+                   prefetch=4):
+        return self.iter_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z, prefetch)
+
     # return time index for given time, if it is present
     # otherwise, an exception is raised
     def get_tind(self):
-        return self.tfld.index(self.time)
+        return self.taxis.index(self.time)
+
+    # return time index closest to the given time
+    def get_tind_nearest(self, time):
+        return self.taxis.nearest(time)
+
+    # return time indices with t0 <= time <= t1, every stride-th one
+    def tind_range(self, t0, t1, stride=1):
+        return self.taxis.range(t0, t1, stride)
 
     # set current timestep
     def set_time(self, time):
         self.time = time
         self.tind = self.get_tind()
 
+    # set current timestep to the one closest to time and return its time
+    def set_time_nearest(self, time):
+        self.set_tind(self.get_tind_nearest(time))
+        return self.time
+
+    # set current timestep by index (negative indices count from the end)
+    def set_tind(self, tind):
+        self.time = self.tfld[tind]
+        self.tind = int(tind) % len(self.tfld)
+
     # reset time indices
     def reset_tinds(self):
         self.tind = 0
         self.ftind = [-1]*self.nfields
 
     # return phi. this will only read from file if necessary
-    def phi(self):
+    # hyperslabs selected by ky, kx or z are read directly and not kept
+    def phi(self, ky=None, kx=None, z=None):
+        if ky is not None or kx is not None or z is not None:
+            return self.readvar(0, ky, kx, z)
         if self.ftind[0] == self.tind:
             pass
         else:
@@ -132,8 +235,10 @@ class fieldfile(object):
         return self.phi3d
 
     # same for apar
-    def apar(self):
+    def apar(self, ky=None, kx=None, z=None):
         if self.nfields > 1:
+            if ky is not None or kx is not None or z is not None:
+                return self.readvar(1, ky, kx, z)
             if self.ftind[1] == self.tind:
                 pass
             else:
@@ -142,11 +247,49 @@ class fieldfile(object):
             return self.apar3d
 
     # same for bpar
-    def bpar(self):
+    def bpar(self, ky=None, kx=None, z=None):
         if self.nfields > 2:
+            if ky is not None or kx is not None or z is not None:
+                return self.readvar(2, ky, kx, z)
             if self.ftind[2] == self.tind:
                 pass
             else:
                 self.ftind[2] = self.tind
                 self.bpar3d = self.readvar(2)
             return self.bpar3d
+
+
+class FieldSeries(binlib.FileSeries):
+    # field files of a continuation run (field_0001, field_0002, ...) on one
+    # time axis; pars is one parameter dict or a list with one per file
+    def __init__(self, files, pars, mmap=False, cache=None):
+        super(FieldSeries, self).__init__(files, pars, fieldfile, 'n_fields',
+                                          ['phi', 'apar', 'bpar'], mmap=mmap, cache=cache)
+        self.nfields = self.layout.nvars
+        self.nz, self.ny, self.nx = self.layout.shape
+
+    def build_axis(self):
+        super(FieldSeries, self).build_axis()
+        self.tfld = self.taxis.times.tolist()
+
+    def read_tinds(self, tinds, vars=('phi', 'apar'), ky=None, kx=None, z=None):
+        return super(FieldSeries, self).read_tinds(tinds, vars, ky, kx, z)
+
+    def read_window(self, t0, t1, vars=('phi', 'apar'), stride=1, ky=None, kx=None, z=None):
+        return super(FieldSeries, self).read_window(t0, t1, vars, stride, ky, kx, z)
+
+    def iter_tinds(self, tinds, vars=('phi', 'apar'), ky=None, kx=None, z=None, prefetch=4):
+        return super(FieldSeries, self).iter_tinds(tinds, vars, ky, kx, z, prefetch)
+
+    def iter_times(self, t0, t1, vars=('phi', 'apar'), stride=1, ky=None, kx=None, z=None,
+                   prefetch=4):
+        return super(FieldSeries, self).iter_times(t0, t1, vars, stride, ky, kx, z, prefetch)
+
+    def phi(self, ky=None, kx=None, z=None):
+        return self.current().phi(ky, kx, z)
+
+    def apar(self, ky=None, kx=None, z=None):
+        return self.current().apar(ky, kx, z)
+
+    def bpar(self, ky=None, kx=None, z=None):
+        return self.current().bpar(ky, kx, z)
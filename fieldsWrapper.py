@@ -5,11 +5,12 @@ import numpy as np
 import matplotlib.pyplot as plt
 from fieldlib import *
 from finite_differences import *
+import precision
 #from finite_differences_x import *
 
 def field_smoother(field):
-    field_smooth = np.zeros(len(field), dtype = 'complex128')
-    field_tmp = np.zeros(len(field), dtype = 'complex128')
+    field_smooth = np.zeros(len(field), dtype = precision.complex_dtype(like=field))
+    field_tmp = np.zeros(len(field), dtype = precision.complex_dtype(like=field))
     field_tmp[0] = field[0]
     field_tmp[len(field) - 1] = field[len(field) - 1]
     for i in range(1, len(field) - 1):
@@ -41,22 +42,22 @@ def eigenfunctions_from_field_file(pars,suffix,center_only,plot,setTime=-1,smoot
         field.set_time(field.tfld[setTime])
 #        print 'Reading eigenfunctions are at t = ', field.tfld[setTime]
     else:
-        isetTime = np.argmin(abs(np.array(field.tfld)-setTime))
-        field.set_time(field.tfld[isetTime])
+        isetTime = field.get_tind_nearest(setTime)
+        field.set_tind(isetTime)
 #        print 'Reading eigenfunctions are at t = ', field.tfld[isetTime]
 
     if center_only:
         ikx_grid = [0]
-        phi = np.zeros(nz,dtype='complex128')
-        apar = np.zeros(nz,dtype='complex128')
+        phi = np.zeros(nz,dtype=precision.complex_dtype(pars))
+        apar = np.zeros(nz,dtype=precision.complex_dtype(pars))
     else:
         #print("nx",nx,"nx/2",nx/2,"floor(nx/2)",np.floor(nx/2))
         ikxmin = int( -np.ceil(nx/2)+1)
         ikx_grid = np.arange(nx)+ikxmin
         #ikx_grid = np.arange(-int(np.floor(nx/2)+1),int(np.floor(nx/2)+1))
         #print("ikx_grid",ikx_grid)
-        phi = np.zeros(nx*nz,dtype='complex128')
-        apar = np.zeros(nx*nz,dtype='complex128')
+        phi = np.zeros(nx*nz,dtype=precision.complex_dtype(pars))
+        apar = np.zeros(nx*nz,dtype=precision.complex_dtype(pars))
 
     if 'n0_global' in pars:
         phase_fac = -np.e**(-2.0*np.pi*(0.0+1.0J)*int(pars['n0_global']) * float(pars['q0']))
@@ -155,7 +156,7 @@ def eigenfunction_squared(z_grid,jacobian,field):
     return ave_sq_int, ave_int_sq
 
 def kz_from_dfielddz(zgrid, jacobian, field, plot, name, zstart = 0., zend = 0.):
-    dfielddz = np.empty(len(field)-1,dtype='complex128')
+    dfielddz = np.empty(len(field)-1,dtype=precision.complex_dtype(like=field))
     for i in range(len(field)-1):
         dfielddz[i] = (field[i+1]-field[i])/\
             (zgrid[i+1]-zgrid[i])*jacobian[i]
@@ -191,7 +192,7 @@ def kz_from_dfielddz(zgrid, jacobian, field, plot, name, zstart = 0., zend = 0.)
 
 def fourierTrans(pars,zgrid,jacobian,field,plot,name):
     zi=complex(0,1)
-    field_kz = np.empty(0,dtype='complex128')
+    field_kz = np.empty(0,dtype=precision.complex_dtype(like=field))
     nkz = 100
     lkz = pars['nz0']/2
     kz_grid = np.linspace(-lkz,lkz,nkz,endpoint=False)
@@ -240,24 +241,24 @@ def LILO_eigenfunctions_from_field_file(pars,suffix,plot,setTime=-1):
         field.set_time(field.tfld[setTime])
         print( 'Reading eigenfunctions are at t = ', field.tfld[setTime])
     else:
-        isetTime = np.argmin(abs(np.array(field.tfld)-setTime))
-        field.set_time(field.tfld[isetTime])
+        isetTime = field.get_tind_nearest(setTime)
+        field.set_tind(isetTime)
         print( 'Reading eigenfunctions are at t = ', field.tfld[isetTime])
 
     if 1 == 0:
-        phi = np.zeros(nz,dtype='complex128')
-        apar = np.zeros(nz,dtype='complex128')
+        phi = np.zeros(nz,dtype=precision.complex_dtype(pars))
+        apar = np.zeros(nz,dtype=precision.complex_dtype(pars))
     else:
-        phi = np.zeros(field.nx,dtype='complex128')
-        apar = np.zeros(field.nx,dtype='complex128')
+        phi = np.zeros(field.nx,dtype=precision.complex_dtype(pars))
+        apar = np.zeros(field.nx,dtype=precision.complex_dtype(pars))
 
     if 1 == 1:
-        phi = field.phi()[nz/2,0,:]
-        apar = field.apar()[nz/2,0,:]
+        phi = field.phi(z=nz//2,ky=0)
+        apar = field.apar(z=nz//2,ky=0)
 
     # Normalize phi and apar by highest value so that the peak abs val = 1
-    phi = phi/np.max(abs(field.phi()[nz/2,0,:]))
-    apar = apar/np.max(abs(field.apar()[nz/2,0,:]))
+    phi = phi/np.max(abs(phi))
+    apar = apar/np.max(abs(apar))
     if plot:
         if (setTime == -1):
             figTitle='t = '+ str(field.tfld[setTime])
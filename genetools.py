@@ -11,6 +11,8 @@ import efittools
 import read_iterdb
 
 from ParIO import *
+import precision
+import nrglib
 from momlib import *
 from fieldlib import *
 from finite_differences import *
@@ -43,9 +45,68 @@ def str2bool(vin):
    #Developed by Ehab Hassan on 2019-03-28
     return (vin.strip()).lower() in ('t','.t.','true','.true.')
 
+def str2complex(vin):
+    try:
+        return complex(vin)
+    except (TypeError, ValueError):
+        return 0.+0.j
+
+def param2bool(vin):
+    if type(vin) == bool: return vin
+    return str2bool(str(vin))
+
+def param2float(vin):
+    #non-numerical values (e.g. of miller geometries) are skipped
+    try:
+        return float(vin)
+    except (TypeError, ValueError):
+        return None
+
+#types of the parameters in the namelist-nested view of read_parameters:
+#{namelist: (type of unlisted parameters, {type: parameters})}, where unlisted
+#parameters are dropped if the type is None
+param_types = {
+    'parallelization': (int, {}),
+    'units':           (float, {}),
+    'bdgrid':          (param2bool, {}),
+    'box':             (int, {float:      ['lx','lx_a','x0','kymin','lv','lw','kx_center'],
+                              param2bool: ['adapt_lx','adapt_ly'],
+                              str:        ['mu_grid_type']}),
+    'in_out':          (int, {float:      ['iterdb_time'],
+                              str:        ['diagdir','chptdir','iterdb_file'],
+                              param2bool: ['write_std','read_checkpoint','write_checkpoint','write_h5','chpt_read_h5',
+                                           'chpt_write_h5','chpt_read_hac','chpt_write_hac','many_chpts']}),
+    'species':         (None, {float:      ['omn','omt','mass','temp','dens'],
+                               int:        ['charge','prof_type'],
+                               param2bool: ['passive'],
+                               str:        ['name']}),
+    'geometry':        (param2float, {param2bool: ['norm_flux_projection','mag_prof'],
+                                      str:        ['magn_geometry','geomdir','geomfile','x_def','dpdx_term']}),
+    'external_contr':  (float, {param2bool: ['with_coriolis','with_centrifugal','with_comoving_other'],
+                                int:        ['kxind_phi_ext','kxind_omn_ext','kxind_omt_ext','kxind_apar_ext',
+                                             'phase_phi_ext','phase_omn_ext','phase_omt_ext','phase_apar_ext']}),
+    'nonlocal_x':      (float, {int:        ['rad_bc_type','lpow_krook','upow_krook','psource_type','ck_filter_type',
+                                             'lckpow_krook','uckpow_krook'],
+                                param2bool: ['buffer_on_ky0','explicit_buffer','shifted_metric','drive_buffer',
+                                             'ga_spatial_var']}),
+    'info':            (None, {float: ['lx','nu_ei']}),
+    'general':         (float, {int:         ['antenna_type','perf_tsteps','hyp_z_order','hyp_y_order','hyp_x_order',
+                                              'ev_max_it','n_ev','timelim','ntimesteps'],
+                                param2bool:  ['nonlinear','hypz_compensation','x_local','calc_dt','include_f0_contr',
+                                              'bpar','delzonal','delzonal_fields','arakawa_zv','check qn gradients',
+                                              'hyp_z_with_dz_prefactor','hyp_v_with_dv_prefactor'],
+                                str:         ['comp_type','timescheme','coll_split_scheme','which_ev','init_cond',
+                                              'collision_op','coll_cons_model'],
+                                str2complex: ['lv_antenna_freq','lv_antenna_initamp','lv_antenna_amp','ev_shift'],
+                                'perf_vec':  ['perf_vec'],
+                                'first':     ['lv_antenna_modes'],
+                                'zero':      ['taumfn']})}
+
 def read_parameters(paramfpath):
    #Developed by Ehab Hassan on 2019-02-07
     #Modified by Ehab Hassan on 2019-03-09
+    #The files are parsed by ParIO.load_parameters, so a file read by both
+    #ParIO.Parameters and read_parameters is parsed once per process
     if   "parameters_" in paramfpath.strip():
          paramflist=[paramfpath.strip()]
     elif "parameters.dat" in paramfpath.strip():
@@ -64,311 +125,55 @@ def read_parameters(paramfpath):
         if not os.path.isfile(paramflist[fid]):
            print('FATAL in read_parameters:')
            print(paramflist[fid]+' FILE NOT FOUND. Exit!'); sys.exit()
-    
-        ofh = open(paramflist[fid],'r')
-        lines = ofh.readlines()
-        ofh.close()
-
-        nspecs = 1
-        for line in lines:
-            pkeys = geneparam.keys()
-            if   line[0] == '&':
-                 pkey = line[1:].strip()
-                 if pkey == 'species':
-                    pkey += str(nspecs)
-                    nspecs += 1
-                 if pkey not in pkeys: geneparam[pkey] = {}
-            elif line.strip() in ['/', '!','']:
+
+        parsed = load_parameters(paramflist[fid])
+        for pkey in parsed.namelists:
+            if pkey.strip() not in geneparam: geneparam[pkey.strip()] = {}
+        for pkey,skey,flatkey,value in parsed.entries:
+            if pkey is None: continue
+            pkey = pkey.strip()
+            typekey = 'species' if 'species' in pkey else pkey
+            if typekey not in param_types: continue
+            deftype,types = param_types[typekey]
+            ptype = deftype
+            for itype in types:
+                if skey in types[itype]: ptype = itype
+            if   ptype is None:
                  continue
+            elif ptype == 'perf_vec':
+                 value = tuple([int(item) for item in str(value).split()])
+            elif ptype == 'first':
+                 #only the first occurrence is kept, as a list
+                 if skey not in geneparam[pkey]: geneparam[pkey][skey] = [str(value)]
+                 continue
+            elif ptype == 'zero':
+                 value = 0
+            elif ptype == int:
+                 value = int(float(value))
             else:
-                 skeys = geneparam[pkey].keys()
-                 items = (line.strip()).split('=')
-                 skey  = items[0].strip()
-                 if   pkey == "parallelization":
-                      if skey not in skeys:
-                         geneparam[pkey][skey] = int(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         geneparam[pkey][skey].append(int(items[1]))
-                      else:
-                         if geneparam[pkey][skey] != int(items[1]):
-                            geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                 elif pkey == "units":
-                      if skey not in skeys:
-                         geneparam[pkey][skey] = float(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         geneparam[pkey][skey].append(float(items[1]))
-                      else:
-                         if abs(geneparam[pkey][skey]-float(items[1])) >= 1.0e-9:
-                            geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                 elif pkey == "bdgrid":
-                      if skey not in skeys:
-                         geneparam[pkey][skey] = str2bool(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         geneparam[pkey][skey].append(str2bool(items[1]))
-                      else:
-                         if geneparam[pkey][skey] != str2bool(items[1]):
-                            geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                 elif pkey == "box":
-                      if skey not in skeys:
-                         if   skey in ['lx','lx_a','x0','kymin','lv','lw','kx_center']:
-                              geneparam[pkey][skey] = float(items[1])
-                         elif skey in ['adapt_lx','adapt_ly']:
-                              geneparam[pkey][skey] = bool(items[1])
-                         elif skey in ['mu_grid_type']:
-                              geneparam[pkey][skey] = str(items[1])
-                         else:
-                              geneparam[pkey][skey] = int(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['lx','lx_a','x0','kymin','lv','lw','kx_center']:
-                              geneparam[pkey][skey].append(float(items[1]))
-                         elif skey in ['adapt_lx','adapt_ly']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['mu_grid_type']:
-                              geneparam[pkey][skey].append(str(items[1]))
-                         else:
-                              geneparam[pkey][skey].append(int(items[1]))
-                      else:
-                         if   skey in ['lx','lx_a','x0','kymin','lv','lw','kx_center']:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                         elif skey in ['adapt_lx','adapt_ly']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['mu_grid_type']:
-                              if geneparam[pkey][skey] != str(items[1]):
-                                 geneparam[pkey][skey] = [geneparam[pkey][skey],str(items[1])]
-                         else:
-                              if geneparam[pkey][skey] != int(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                 elif pkey == "in_out":
-                      if skey not in skeys:
-                         if   skey in ['iterdb_time']:
-                              geneparam[pkey][skey] = float(items[1])
-                         elif skey in ['diagdir','chptdir','iterdb_file']:
-                              geneparam[pkey][skey] = items[1].strip()[1:-1]
-                         elif skey in ['write_std','read_checkpoint','write_checkpoint','write_h5','chpt_read_h5','chpt_write_h5','chpt_read_hac','chpt_write_hac','many_chpts']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         else:
-                              geneparam[pkey][skey] = int(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['iterdb_time']:
-                              geneparam[pkey][skey].append(float(items[1]))
-                         elif skey in ['diagdir','chptdir','iterdb_file']:
-                              geneparam[pkey][skey].append(items[1].strip()[1:-1])
-                         elif skey in ['write_std','read_checkpoint','write_checkpoint','write_h5','chpt_read_h5','chpt_write_h5','chpt_read_hac','chpt_write_hac','many_chpts']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         else:
-                              geneparam[pkey][skey].append(int(items[1]))
-                      else:
-                         if   skey in ['iterdb_time']:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                         elif skey in ['diagdir','chptdir','iterdb_file']:
-                              if geneparam[pkey][skey] != items[1].strip()[1:-1]:
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],items[1].strip()[1:-1]]
-                         elif skey in ['write_std','read_checkpoint','write_checkpoint','write_h5','chpt_read_h5','chpt_write_h5','chpt_read_hac','chpt_write_hac','many_chpts']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         else:
-                              if geneparam[pkey][skey] != int(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                 elif "species" in pkey:
-                      if skey not in skeys:
-                         if   skey in ['omn','omt','mass','temp','dens']:
-                              geneparam[pkey][skey] = float(items[1])
-                         elif skey in ['charge','prof_type']:
-                              geneparam[pkey][skey] = int(float(items[1]))
-                         elif skey in ['passive']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         elif skey in ['name']:
-                              geneparam[pkey][skey] = items[1].strip()[1:-1]
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['omn','omt','mass','temp','dens']:
-                              geneparam[pkey][skey].append(float(items[1]))
-                         elif skey in ['charge','prof_type']:
-                              geneparam[pkey][skey].append(int(float(items[1])))
-                         elif skey in ['passive']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['name']:
-                              geneparam[pkey][skey].append(items[1].strip()[1:-1])
-                      else:
-                         if   skey in ['omn','omt','mass','temp','dens']:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey] = [geneparam[pkey][skey],float(items[1])]
-                         elif skey in ['charge','prof_type']:
-                              if geneparam[pkey][skey] != int(float(items[1])):
-                                 geneparam[pkey][skey] = [geneparam[pkey][skey],int(items[1])]
-                         elif skey in ['passive']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey] = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['name']:
-                              if geneparam[pkey][skey] != items[1].strip()[1:-1]:
-                                 geneparam[pkey][skey] = [geneparam[pkey][skey],items[1].strip()[1:-1]]
-                 elif pkey == "geometry":
-                      if skey not in skeys:
-                         if   skey in ['norm_flux_projection','mag_prof']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         elif skey in ['magn_geometry','geomdir','geomfile','x_def','dpdx_term']:
-                              geneparam[pkey][skey] = items[1].strip()[1:-1]
-                         else:
-                              try: #in case for the miller geometry
-                                  geneparam[pkey][skey] = float(items[1])
-                              except:
-                                  pass
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['norm_flux_projection','mag_prof']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['magn_geometry','geomdir','geomfile','x_def','dpdx_term']:
-                              geneparam[pkey][skey].append(items[1].strip()[1:-1])
-                         else:
-                              geneparam[pkey][skey].append(float(items[1]))
-                      else:
-                         if   skey in ['norm_flux_projection','mag_prof']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['magn_geometry','geomdir','geomfile','x_def','dpdx_term']:
-                              if geneparam[pkey][skey] != items[1].strip()[1:-1]:
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],items[1].strip()[1:-1]]
-                         else:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                 elif pkey == "external_contr":
-                      if skey not in skeys:
-                         if   skey in ['with_coriolis','with_centrifugal','with_comoving_other']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         elif skey in ['kxind_phi_ext','kxind_omn_ext','kxind_omt_ext','kxind_apar_ext','phase_phi_ext','phase_omn_ext','phase_omt_ext','phase_apar_ext']:
-                              geneparam[pkey][skey] = int(items[1])
-                         else:
-                              geneparam[pkey][skey] = float(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['with_coriolis','with_centrifugal','with_comoving_other']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['kxind_phi_ext','kxind_omn_ext','kxind_omt_ext','kxind_apar_ext','phase_phi_ext','phase_omn_ext','phase_omt_ext','phase_apar_ext']:
-                              geneparam[pkey][skey].append(int(items[1]))
-                         else:
-                              geneparam[pkey][skey].append(float(items[1]))
-                      else:
-                         if   skey in ['with_coriolis','with_centrifugal','with_comoving_other']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['kxind_phi_ext','kxind_omn_ext','kxind_omt_ext','kxind_apar_ext','phase_phi_ext','phase_omn_ext','phase_omt_ext','phase_apar_ext']:
-                              if geneparam[pkey][skey] != int(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                         else:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                 elif pkey == "nonlocal_x":
-                      if skey not in skeys:
-                         if   skey in ['rad_bc_type','lpow_krook','upow_krook','psource_type','ck_filter_type','lckpow_krook','uckpow_krook']:
-                              geneparam[pkey][skey] = int(items[1])
-                         elif skey in ['buffer_on_ky0','explicit_buffer','shifted_metric','drive_buffer','ga_spatial_var']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         else:
-                              geneparam[pkey][skey] = float(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['rad_bc_type','lpow_krook','upow_krook','psource_type','ck_filter_type','lckpow_krook','uckpow_krook']:
-                              geneparam[pkey][skey].append(int(items[1]))
-                         elif skey in ['buffer_on_ky0','explicit_buffer','shifted_metric','drive_buffer','ga_spatial_var']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         else:
-                              geneparam[pkey][skey].append(float(items[1]))
-                      else:
-                         if   skey in ['rad_bc_type','lpow_krook','upow_krook','psource_type','ck_filter_type','lckpow_krook','uckpow_krook']:
-                              if geneparam[pkey][skey] != int(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                         elif skey in ['buffer_on_ky0','explicit_buffer','shifted_metric','drive_buffer','ga_spatial_var']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         else:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
-                 elif pkey == "info":
-                      #print(skeys)
-                      if skey not in skeys:
-                         if skey in ['lx']:
-                             geneparam[pkey][skey] = float(items[1])
-                         elif skey in ['nu_ei']:
-                             geneparam[pkey][skey] = float(items[1])
-                 elif pkey == "general":
-                      if skey not in skeys:
-                         if   skey in ['antenna_type','perf_tsteps','hyp_z_order','hyp_y_order','hyp_x_order','ev_max_it','n_ev','timelim','ntimesteps']:
-                              geneparam[pkey][skey] = int(items[1])
-                         elif skey in ['ntimesteps']:
-                              geneparam[pkey][skey] = long(items[1])
-                         elif skey in ['nonlinear','hypz_compensation','x_local','calc_dt','include_f0_contr','bpar','delzonal','delzonal_fields','arakawa_zv','check qn gradients']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         elif skey in ['hyp_z_with_dz_prefactor','hyp_v_with_dv_prefactor']:
-                              geneparam[pkey][skey] = str2bool(items[1])
-                         elif skey in ['comp_type','timescheme','coll_split_scheme','which_ev','init_cond','collision_op','coll_cons_model']:
-                              geneparam[pkey][skey] = items[1].strip()[1:-1]
-                         elif skey in ['lv_antenna_freq','lv_antenna_initamp','lv_antenna_amp','ev_shift']:
-                              
-                              try: 
-                                geneparam[pkey][skey] = complex(items[1])
-                              except:
-                                geneparam[pkey][skey] = 0.+0.j
-                         elif skey in ['perf_vec']:
-                              geneparam[pkey][skey] = tuple([int(item) for item in items[1].split()])
-                         elif skey in ['lv_antenna_modes']:
-                              try:
-                                  geneparam[pkey][skey].append(items[1])
-                              except ValueError: 
-                                  geneparam[pkey][skey] = [items[1]]
-                         elif skey in ['taumfn']:
-                              geneparam[pkey][skey] = 0
-                         else:
-                              geneparam[pkey][skey] = float(items[1])
-                      elif type(geneparam[pkey][skey]) == list:
-                         if   skey in ['antenna_type','perf_tsteps','hyp_z_order','hyp_y_order','hyp_x_order','ev_max_it','n_ev','timelim','ntimesteps']:
-                              geneparam[pkey][skey].append(int(items[1]))
-                         elif skey in ['ntimesteps']:
-                              geneparam[pkey][skey].append(long(items[1]))
-                         elif skey in ['nonlinear','hypz_compensation','x_local','calc_dt','include_f0_contr','bpar','delzonal','delzonal_fields','arakawa_zv','check qn gradients']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['hyp_z_with_dz_prefactor','hyp_v_with_dv_prefactor']:
-                              geneparam[pkey][skey].append(str2bool(items[1]))
-                         elif skey in ['comp_type','timescheme','coll_split_scheme','which_ev','init_cond','collision_op','coll_cons_model']:
-                              geneparam[pkey][skey].append(items[1].strip()[1:-1])
-                         elif skey in ['lv_antenna_freq','lv_antenna_initamp','lv_antenna_amp','ev_shift']:
-                              geneparam[pkey][skey].append(complex(items[1]))
-                         elif skey in ['perf_vec']:
-                              geneparam[pkey][skey].append(tuple([int(item) for item in items[1].split()]))
-                         elif skey in ['lv_antenna_modes']:
-                              continue
-                         else:
-                              geneparam[pkey][skey].append(float(items[1]))
-                      else:
-                         if   skey in ['antenna_type','perf_tsteps','hyp_z_order','hyp_y_order','hyp_x_order','ev_max_it','n_ev','timelim','ntimesteps']:
-                              if geneparam[pkey][skey] != int(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],int(items[1])]
-                         elif skey in ['ntimesteps']:
-                              if geneparam[pkey][skey] != long(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],long(items[1])]
-                         elif skey in ['nonlinear','hypz_compensation','x_local','calc_dt','include_f0_contr','bpar','delzonal','delzonal_fields','arakawa_zv','check qn gradients']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['hyp_z_with_dz_prefactor','hyp_v_with_dv_prefactor']:
-                              if geneparam[pkey][skey] != str2bool(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],str2bool(items[1])]
-                         elif skey in ['comp_type','timescheme','coll_split_scheme','which_ev','init_cond','collision_op','coll_cons_model']:
-                              if geneparam[pkey][skey] != items[1].strip()[1:-1]:
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],items[1].strip()[1:-1]]
-                         elif skey in ['lv_antenna_freq','lv_antenna_initamp','lv_antenna_amp','ev_shift']:
-                              if geneparam[pkey][skey] != complex(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],complex(items[1])]
-                         elif skey in ['perf_vec']:
-                              perf_vec_list = tuple([int(item) for item in items[1].split()])
-                              if geneparam[pkey][skey] != perf_vec_list:
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],perf_vec_list]
-                         elif skey in ['lv_antenna_modes']:
-                              continue
-                         else:
-                              if geneparam[pkey][skey] != float(items[1]):
-                                 geneparam[pkey][skey]  = [geneparam[pkey][skey],float(items[1])]
+                 value = ptype(value)
+                 if value is None: continue
+
+            #values differing between the files are collected in lists; info
+            #parameters are taken from the first file only
+            skeys = geneparam[pkey].keys()
+            if   skey not in skeys:
+                 geneparam[pkey][skey] = value
+            elif pkey == 'info':
+                 continue
+            elif type(geneparam[pkey][skey]) == list:
+                 geneparam[pkey][skey].append(value)
+            elif pkey == 'units':
+                 if abs(geneparam[pkey][skey]-value) >= 1.0e-9:
+                    geneparam[pkey][skey]  = [geneparam[pkey][skey],value]
+            elif geneparam[pkey][skey] != value:
+                 geneparam[pkey][skey]  = [geneparam[pkey][skey],value]
 
     return geneparam
 
 
+nrgcolumns = ['n','upara','Tpara','Tperp','PFluxes','PFluxem','HFluxes','HFluxem','Viscoses','Viscosem']
+
 def read_nrg(nrgfpath,nspecs=0,parameters={},normalized=True):
    #Developed by Ehab Hassan on 2019-03-12
     if "nrg_" in nrgfpath.strip():
@@ -403,75 +208,22 @@ def read_nrg(nrgfpath,nspecs=0,parameters={},normalized=True):
 
         inrgfkey = inrgf
         nrgdata[inrgfkey] = {}
-        nrgfhand = open(inrgf,'r')
-
-        nrgdata[inrgfkey]['time']=npy.empty(0,dtype=float)
-        for ispecs in specstype:
-            nrgdata[inrgfkey][ispecs]={}
-            nrgdata[inrgfkey][ispecs]['n']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['upara']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['Tpara']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['Tperp']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['PFluxes']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['PFluxem']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['HFluxes']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['HFluxem']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['Viscoses']=npy.empty(0,dtype=float)
-            nrgdata[inrgfkey][ispecs]['Viscosem']=npy.empty(0,dtype=float)
-
-        while True:
-              try:
-                 ctime = float(nrgfhand.readline())
-                #if not normalized:
-                #   ctime*=(units['Lref']/units['cref'])
-                 nrgdata[inrgfkey]['time']=npy.append(nrgdata[inrgfkey]['time'],ctime)
-                 for ispecs in specstype:
-                     linedata = nrgfhand.readline().split()
-                     specdata = [float(item) for item in linedata]
-                     if len(specdata)==0:
-                        nrgdata[inrgfkey]['time'] = npy.delete(nrgdata[inrgfkey]['time'],-1)
-                        ntimes = npy.size(nrgdata[inrgfkey]['time'])
-                        specsid = specstype.index(ispecs)
-                        if npy.size(nrgdata[inrgfkey][ispecs]['n']) > ntimes:
-                           for specind in range(specid):
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['n'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['upara'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['Tpara'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['Tperp'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['PFluxes'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['PFluxem'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['HFluxes'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['HFluxem'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['Viscoses'],-1)
-                                npy.delete(nrgdata[inrgfkey][spectype[specind]]['Viscosem'],-1)
-                        break
-
-                     if not normalized:
-                        specdata[0]*=(units['nref']*units['rhostar'])**2
-                        specdata[1]*=(units['vref']*units['rhostar'])**2
-                        specdata[2]*=(units['Tref']*units['rhostar'])**2
-                        specdata[3]*=(units['Tref']*units['rhostar'])**2
-                        specdata[4]*=(units['Ggb'])
-                        specdata[5]*=(units['Ggb'])
-                        specdata[6]*=(units['Qgb'])
-                        specdata[7]*=(units['Qgb'])
-                        specdata[8]*=(units['Pgb'])
-                        specdata[9]*=(units['Pgb'])
-
-                     nrgdata[inrgfkey][ispecs]['n']=npy.append(nrgdata[inrgfkey][ispecs]['n'],specdata[0])
-                     nrgdata[inrgfkey][ispecs]['upara']=npy.append(nrgdata[inrgfkey][ispecs]['upara'],specdata[1])
-                     nrgdata[inrgfkey][ispecs]['Tpara']=npy.append(nrgdata[inrgfkey][ispecs]['Tpara'],specdata[2])
-                     nrgdata[inrgfkey][ispecs]['Tperp']=npy.append(nrgdata[inrgfkey][ispecs]['Tperp'],specdata[3])
-                     nrgdata[inrgfkey][ispecs]['PFluxes']=npy.append(nrgdata[inrgfkey][ispecs]['PFluxes'],specdata[4])
-                     nrgdata[inrgfkey][ispecs]['PFluxem']=npy.append(nrgdata[inrgfkey][ispecs]['PFluxem'],specdata[5])
-                     nrgdata[inrgfkey][ispecs]['HFluxes']=npy.append(nrgdata[inrgfkey][ispecs]['HFluxes'],specdata[6])
-                     nrgdata[inrgfkey][ispecs]['HFluxem']=npy.append(nrgdata[inrgfkey][ispecs]['HFluxem'],specdata[7])
-                     nrgdata[inrgfkey][ispecs]['Viscoses']=npy.append(nrgdata[inrgfkey][ispecs]['Viscoses'],specdata[8])
-                     nrgdata[inrgfkey][ispecs]['Viscosem']=npy.append(nrgdata[inrgfkey][ispecs]['Viscosem'],specdata[9])
-
-              except ValueError:
-                  break
-        nrgfhand.close()
+        #all time blocks are read at once into a (ntimes,nspecs,ncolumns) array
+        times,nrgcols = nrglib.read_nrg(inrgf,nspecs,len(nrgcolumns))
+        if not normalized:
+           nrgcols = nrgcols*npy.array([(units['nref']*units['rhostar'])**2,
+                                        (units['vref']*units['rhostar'])**2,
+                                        (units['Tref']*units['rhostar'])**2,
+                                        (units['Tref']*units['rhostar'])**2,
+                                        units['Ggb'],units['Ggb'],
+                                        units['Qgb'],units['Qgb'],
+                                        units['Pgb'],units['Pgb']])
+
+        nrgdata[inrgfkey]['time']=times
+        for ispecs in range(nspecs):
+            nrgdata[inrgfkey][specstype[ispecs]]={}
+            for icol in range(len(nrgcolumns)):
+                nrgdata[inrgfkey][specstype[ispecs]][nrgcolumns[icol]]=nrgcols[:,ispecs,icol]
 
     return nrgdata
 
@@ -776,6 +528,7 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
            par0.Read_Pars(ifieldf[:-10]+"parameters"+ifieldf[-5:])
         pars = par0.pardict
         field = fieldfile(ifieldf,pars)
+        cdtype = precision.complex_dtype(pars)
 
         if timeslot == None: t_ind = -1
         else:                t_ind = timeslot
@@ -813,8 +566,8 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
               elif fieldfmt=='local-flatten': nx = field.nx
               ny   = field.ny
               nz   = field.nz
-              phi  = npy.zeros(nx*nz,dtype='complex128')
-              apar = npy.zeros(nx*nz,dtype='complex128')
+              phi  = npy.zeros(nx*nz,dtype=cdtype)
+              apar = npy.zeros(nx*nz,dtype=cdtype)
 
               zgrid = npy.arange(nx*nz)/float(nx*nz-1)*(2.0*nx-(2.0/nz))-nx
 
@@ -863,7 +616,7 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
               else:
                   xgrid = npy.arange(nx)/float(nx-1)*float(pars['lx'])-float(pars['lx'])/2.0
 
-              phi           = npy.empty((nz+4,ny,nx),dtype = 'complex128')
+              phi           = npy.empty((nz+4,ny,nx),dtype = cdtype)
               phi[2:-2,:,:] = phi3d
              #phi[2:-2,:,:] = phi3d*float(pars['rhostar'])
               for iy in range(ny):
@@ -873,7 +626,7 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
                   phi[ 0,iy,ix] = phi[-4,iy,ix]*npy.exp( phase[ix])
                   phi[ 1,iy,ix] = phi[-3,iy,ix]*npy.exp( phase[ix])
               if field.nfields>1:
-                 apar = npy.empty((nz,ny,nx),dtype = 'complex128')
+                 apar = npy.empty((nz,ny,nx),dtype = cdtype)
                  apar = apar3d
              #   apar = apar3d*float(pars['rhostar'])
 
@@ -888,9 +641,9 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
               fielddata[ifieldf]['nfields'] = field.nfields
 
               if fieldfmt=='global-flatten':
-                 phix = npy.empty(nx*(nz+4),dtype = 'complex128')
+                 phix = npy.empty(nx*(nz+4),dtype = cdtype)
                  if field.nfields>1:
-                    aparx = npy.empty(nx*nz,dtype = 'complex128')
+                    aparx = npy.empty(nx*nz,dtype = cdtype)
                  if 'n0_global' in pars:
                     n0_global = int(pars['n0_global'])
                     q0        = float(gpars['q0'])
@@ -921,11 +674,11 @@ def read_field(fieldfpath,timeslot=None,fieldfmt=None):
                  mode_zgrid   = npy.arange(max_mode*20)/float(max_mode*20)*2.0-1.0
                  n_mode_zgrid = npy.size(mode_zgrid)
 
-                 phi_theta = npy.empty((n_mode_zgrid,ny,nx),dtype = 'complex128')
-                 phi_modes = npy.empty((n_mode_zgrid,ny,nx),dtype = 'complex128')
+                 phi_theta = npy.empty((n_mode_zgrid,ny,nx),dtype = cdtype)
+                 phi_modes = npy.empty((n_mode_zgrid,ny,nx),dtype = cdtype)
                  if field.nfields>1:
-                    apar_theta = npy.empty((n_mode_zgrid,ny,nx),dtype = 'complex128')
-                    apar_modes = npy.zeros((n_mode_zgrid,ny,nx),dtype = 'complex128')
+                    apar_theta = npy.empty((n_mode_zgrid,ny,nx),dtype = cdtype)
+                    apar_modes = npy.zeros((n_mode_zgrid,ny,nx),dtype = cdtype)
 
                  zgridx = npy.arange(nz+4)/float(nz+4-1)*(2.0+3.0*(2.0/nz))-(1.0+2.0*(2.0/nz))
 
@@ -1167,12 +920,13 @@ def find_mode_frequency(fieldfpath,fraction=0.9,bgn_t=None,end_t=None,method='fa
               phi_t = []
 
            if end_t == None: end_t  = tlist[-1]
-           end_t_ind = npy.argmin(abs(npy.array(tlist)-end_t))
+           end_t_ind = field.get_tind_nearest(end_t)
           #if bgn_t == None: bgn_t  = tlist[-1]*fraction
-           bgn_t_ind = npy.argmin(abs(npy.array(tlist)-bgn_t))
-           if bgn_t == None:
+           if bgn_t != None:
+              bgn_t_ind = field.get_tind_nearest(bgn_t)
+           else:
               bgn_t     = tlist[-1]*fraction
-              bgn_t_ind = npy.argmin(abs(npy.array(tlist)-bgn_t))
+              bgn_t_ind = field.get_tind_nearest(bgn_t)
               if end_t_ind-bgn_t_ind > 150:
                  bgn_t_ind = npy.size(tlist)-151
                  bgn_t = tlist[bgn_t_ind]
@@ -1183,7 +937,7 @@ def find_mode_frequency(fieldfpath,fraction=0.9,bgn_t=None,end_t=None,method='fa
 
            if method.lower() in ['quick','fast-mode','standard']:
               for tind in range(bgn_t_ind,end_t_ind):
-                  field.set_time(field.tfld[tind])
+                  field.set_tind(tind)
                   time  = npy.append(time,tlist[tind])
 
                   (iphiz,iphix) = npy.unravel_index(np.argmax(abs(field.phi()[:,0,:])),(nz,nx))
@@ -1216,7 +970,7 @@ def find_mode_frequency(fieldfpath,fraction=0.9,bgn_t=None,end_t=None,method='fa
 
            elif method.lower() in ['slow','general-mode','thorough']:
               for tind in range(bgn_t_ind,end_t_ind+1):
-                field.set_time(field.tfld[tind])
+                field.set_tind(tind)
                 time  = npy.append(time,tlist[tind])
 
                 if x_local:
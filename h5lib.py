@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+""" h5lib.py: Chunked HDF5 store for GENE field and mom output
+
+The converter writes field_XXXX and mom_<spec>_XXXX of one run, plus its
+parameters, to a single HDF5 file with one group per GENE file. Each
+variable is a (time, nz, ky, nx) dataset chunked along time and ky, so that
+the time trace of a single ky mode is read contiguously. h5fieldfile and
+h5momfile read such a file through the interface of fieldlib.fieldfile and
+momlib.momfile. They also accept the name of the original file, e.g.
+fieldfile('field'+suffix, pars) with h5fieldfile imported as fieldfile opens
+group field of gene<suffix>.h5 next to it, so that scripts only need to
+change their import.
+
+Usage: python h5lib.py [options] <run number>
+"""
+import os
+import re
+import optparse as op
+import numpy as np
+import binlib
+from ParIO import Parameters
+from fieldlib import fieldfile
+from momlib import momfile
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+FIELD_NAMES = ['phi', 'apar', 'bpar']
+MOM_NAMES = ['dens', 'tpar', 'tperp', 'qpar', 'qperp', 'upar']
+# field<suffix> or mom_<spec><suffix> with suffix _XXXX or .dat
+GENE_FILE_RE = re.compile(r'^(field|mom_.+?)(_\d+|\.dat)$')
+
+
+def require_h5py():
+    if h5py is None:
+        raise ImportError('h5lib needs the h5py package')
+
+
+def write_pars(h5file, pars):
+    """Store the scalar parameters as attributes of the root group"""
+    for key, value in pars.items():
+        if isinstance(value, (bool, int, float, str)):
+            h5file.attrs[key] = value
+
+
+def read_pars(h5file):
+    pars = {}
+    for key, value in h5file.attrs.items():
+        if isinstance(value, bytes):
+            value = value.decode()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        pars[key] = value
+    return pars
+
+
+def convert_file(gene_file, h5file, group, chunk_t=None, compression=None):
+    """Copy all time steps of an opened fieldfile or momfile to group in h5file
+
+    chunk_t is the number of time steps per chunk (default: about 1 MB per
+    chunk and ky), compression e.g. 'gzip' or 'lzf'.
+    """
+    require_h5py()
+    layout = gene_file.layout
+    nz, ny, nx = layout.shape
+    dtype = layout.npct.newbyteorder('=')
+    if chunk_t is None:
+        chunk_t = max(1, 2**20//(nz*nx*dtype.itemsize))
+    times = gene_file.taxis.times
+    nt = len(times)
+    grp = h5file.require_group(group)
+    grp.create_dataset('time', data=times)
+    dsets = [grp.create_dataset(name, shape=(nt, nz, ny, nx), dtype=dtype,
+                                chunks=(max(1, min(chunk_t, nt)), nz, 1, nx),
+                                compression=compression)
+             for name in layout.names]
+    # copy in time blocks matching the chunks, each read with coalesced reads
+    for it0 in range(0, nt, chunk_t):
+        tinds = np.arange(it0, min(it0 + chunk_t, nt))
+        data = gene_file.read_tinds(tinds, tuple(layout.names))[1]
+        for dset, var_data in zip(dsets, data):
+            dset[tinds[0]:tinds[-1] + 1] = var_data
+
+
+def convert_run(suffix, outfile=None, chunk_t=None, compression=None, moms=True, path=''):
+    """Convert field<suffix> and, if present, mom_<spec><suffix> of one run"""
+    require_h5py()
+    par = Parameters()
+    par.Read_Pars(os.path.join(path, 'parameters' + suffix))
+    pars = par.pardict
+    if outfile is None:
+        outfile = os.path.join(path, 'gene' + suffix + '.h5')
+    with h5py.File(outfile, 'w') as h5file:
+        write_pars(h5file, pars)
+        convert_file(fieldfile(os.path.join(path, 'field' + suffix), pars), h5file, 'field',
+                     chunk_t, compression)
+        if moms:
+            for ispec in range(int(pars['n_spec'])):
+                group = 'mom_' + str(pars['name{}'.format(ispec + 1)])
+                momname = os.path.join(path, group + suffix)
+                if os.path.isfile(momname):
+                    convert_file(momfile(momname, pars), h5file, group, chunk_t, compression)
+    return outfile
+
+
+def h5_location(file, group):
+    """(HDF5 file, group) holding file: file itself if it is an HDF5 file,
+    else for an original field/mom file the converted gene<suffix>.h5 next
+    to it (as written by convert_run) and the group of that file"""
+    if os.path.isfile(file) and h5py.is_hdf5(file):
+        return file, group
+    match = GENE_FILE_RE.match(os.path.basename(file))
+    if match is None:
+        return file, group
+    name, suffix = match.groups()
+    return os.path.join(os.path.dirname(file), 'gene' + suffix + '.h5'), name
+
+
+class H5GeneFile(object):
+    """H5GeneFile class:
+
+    Base class reading one group of a converted HDF5 file with the interface
+    of fieldlib.fieldfile and momlib.momfile. file is the HDF5 file or the
+    name of the original field/mom file, see h5_location.
+    """
+
+    def __init__(self, file, pars=None, group='field', names=FIELD_NAMES):
+        require_h5py()
+        file, group = h5_location(file, group)
+        self.file = file
+        self.h5 = h5py.File(file, 'r')
+        self.pars = read_pars(self.h5) if pars is None else pars
+        self.grp = self.h5[group]
+        self.names = [name for name in names if name in self.grp]
+        self.nz, self.ny, self.nx = self.grp[self.names[0]].shape[1:]
+        npct = self.grp[self.names[0]].dtype
+        self.npct = npct
+        self.nprt = np.empty(0, dtype=npct).real.dtype
+        # layout of the original binary file, e.g. for layout.names
+        self.layout = binlib.RecordLayout(len(self.names), self.nz, self.ny, self.nx,
+                                          self.nprt, self.npct, self.names)
+        self.taxis = binlib.TimeAxis(self.grp['time'][()])
+        self.times = self.taxis.times.tolist()
+        self.tind = 0
+        self.time = self.times[0] if self.times else None
+
+    def close(self):
+        self.h5.close()
+
+    def get_minmaxtime(self):
+        return self.times[0], self.times[-1]
+
+    def get_tind(self):
+        return self.taxis.index(self.time)
+
+    def get_tind_nearest(self, time):
+        return self.taxis.nearest(time)
+
+    def tind_range(self, t0, t1, stride=1):
+        return self.taxis.range(t0, t1, stride)
+
+    def set_time(self, time):
+        self.time = time
+        self.tind = self.get_tind()
+
+    def set_time_nearest(self, time):
+        self.set_tind(self.get_tind_nearest(time))
+        return self.time
+
+    def set_tind(self, tind):
+        self.time = self.times[tind]
+        self.tind = int(tind) % len(self.times)
+
+    def readvar(self, var, ky=None, kx=None, z=None):
+        return self.grp[self.names[var]][(self.tind,) + binlib.selection(z, ky, kx)]
+
+    def read_tinds(self, tinds, vars, ky=None, kx=None, z=None):
+        """Read vars at time indices tinds, see fieldlib.fieldfile.read_tinds"""
+        single = isinstance(vars, str)
+        if single:
+            vars = (vars,)
+        tinds = np.asarray(tinds, dtype=np.int64) % len(self.times)
+        sel = binlib.selection(z, ky, kx)
+        # h5py wants increasing unique indices or a slice
+        utinds, inverse = np.unique(tinds, return_inverse=True)
+        tsel = binlib.as_slice(utinds) if len(utinds) else slice(0, 0)
+        if tsel is None:
+            tsel = utinds
+        data = np.stack([self.grp[var][(tsel,) + sel][inverse] for var in vars])
+        times = self.taxis.times[tinds]
+        return (times, data[0]) if single else (times, data)
+
+    def read_window(self, t0, t1, vars, stride=1, ky=None, kx=None, z=None):
+        return self.read_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z)
+
+    def iter_tinds(self, tinds, vars, ky=None, kx=None, z=None, prefetch=4):
+        """Yield (time, data) per time step, reading one chunk of time steps at a time"""
+        single = isinstance(vars, str)
+        tinds = np.asarray(tinds, dtype=np.int64)
+        nblock = max(1, prefetch)
+        for i0 in range(0, len(tinds), nblock):
+            times, data = self.read_tinds(tinds[i0:i0 + nblock], vars, ky, kx, z)
+            for it, time in enumerate(times):
+                yield time, (data[it] if single else data[:, it])
+
+    def iter_times(self, t0, t1, vars, stride=1, ky=None, kx=None, z=None, prefetch=4):
+        return self.iter_tinds(self.tind_range(t0, t1, stride), vars, ky, kx, z, prefetch)
+
+
+class h5fieldfile(H5GeneFile):
+    # drop-in replacement for fieldlib.fieldfile reading a converted HDF5 file
+    def __init__(self, file, pars=None, group='field'):
+        super(h5fieldfile, self).__init__(file, pars, group, FIELD_NAMES)
+        self.nfields = len(self.names)
+        self.tfld = self.times
+
+    def read_tinds(self, tinds, vars=('phi', 'apar'), ky=None, kx=None, z=None):
+        return super(h5fieldfile, self).read_tinds(tinds, vars, ky, kx, z)
+
+    def read_window(self, t0, t1, vars=('phi', 'apar'), stride=1, ky=None, kx=None, z=None):
+        return super(h5fieldfile, self).read_window(t0, t1, vars, stride, ky, kx, z)
+
+    def phi(self, ky=None, kx=None, z=None):
+        return self.readvar(0, ky, kx, z)
+
+    def apar(self, ky=None, kx=None, z=None):
+        if self.nfields > 1:
+            return self.readvar(1, ky, kx, z)
+
+    def bpar(self, ky=None, kx=None, z=None):
+        if self.nfields > 2:
+            return self.readvar(2, ky, kx, z)
+
+
+class h5momfile(H5GeneFile):
+    # drop-in replacement for momlib.momfile reading a converted HDF5 file
+    def __init__(self, file, pars=None, group='mom_e'):
+        super(h5momfile, self).__init__(file, pars, group, MOM_NAMES)
+        self.nmoms = len(self.names)
+        self.tmom = self.times
+
+    def read_tinds(self, tinds, vars=('dens', 'tperp'), ky=None, kx=None, z=None):
+        return super(h5momfile, self).read_tinds(tinds, vars, ky, kx, z)
+
+    def read_window(self, t0, t1, vars=('dens', 'tperp'), stride=1, ky=None, kx=None, z=None):
+        return super(h5momfile, self).read_window(t0, t1, vars, stride, ky, kx, z)
+
+    def dens(self, ky=None, kx=None, z=None):
+        return self.readvar(0, ky, kx, z)
+
+    def tpar(self, ky=None, kx=None, z=None):
+        return self.readvar(1, ky, kx, z)
+
+    def tperp(self, ky=None, kx=None, z=None):
+        return self.readvar(2, ky, kx, z)
+
+    def qpar(self, ky=None, kx=None, z=None):
+        return self.readvar(3, ky, kx, z)
+
+    def qperp(self, ky=None, kx=None, z=None):
+        return self.readvar(4, ky, kx, z)
+
+    def upar(self, ky=None, kx=None, z=None):
+        return self.readvar(5, ky, kx, z)
+
+
+if __name__ == '__main__':
+    parser = op.OptionParser(usage='%prog [options] <run number>',
+                             description='Converts GENE field and mom files of a run to a '
+                                         'chunked HDF5 file.')
+    parser.add_option('--output', '-o', default=None,
+                      help='Name of the HDF5 file (default: gene_<run number>.h5, which the readers '
+                           'find from the field/mom file names).')
+    parser.add_option('--chunk_t', '-t', type='int', default=None,
+                      help='Number of time steps per chunk.')
+    parser.add_option('--compression', '-c', default=None,
+                      help='Lossless compression filter, e.g. gzip or lzf.')
+    parser.add_option('--nomom', action='store_true', default=False,
+                      help='Convert the field file only.')
+    options, args = parser.parse_args()
+    if len(args) != 1:
+        exit("""
+Please include run number as argument (e.g., 0001)."
+    \n""")
+    suffix = args[0]
+    if suffix != '.dat':
+        suffix = '_' + suffix
+    print('Wrote', convert_run(suffix, options.output, options.chunk_t, options.compression,
+                               not options.nomom))
@@ -107,8 +107,8 @@ def momen_tx(momen, \
                   show_plots = False, \
                   plot_format = 'display'):
     show_xz = False
-    itStart = np.argmin(abs(np.array(momen.tmom)-tStart))
-    itEnd = np.argmin(abs(np.array(momen.tmom)-tEnd))
+    itStart = momen.get_tind_nearest(tStart)
+    itEnd = momen.get_tind_nearest(tEnd)
     tsteps = itEnd - itStart + 1
     tgrid = []
     nz = momen.pars['nz0']
@@ -164,8 +164,8 @@ def momen_tky(momen, \
                   tStart, \
                   tEnd):
     nky = momen.pars['nky0']
-    itStart = np.argmin(abs(np.array(momen.tmom)-tStart))
-    itEnd = np.argmin(abs(np.array(momen.tmom)-tEnd))
+    itStart = momen.get_tind_nearest(tStart)
+    itEnd = momen.get_tind_nearest(tEnd)
     tsteps = itEnd - itStart + 1
     tgrid = []
     deln_tky = np.zeros((tsteps, nky),dtype='complex128')
@@ -20,8 +20,8 @@ def moments_from_mom_file(pars,suffix,center_only,plot,setTime=-1):
         momen.set_time(momen.tmom[setTime])
 #        print 'Reading moments are at t = ', momen.tmom[setTime]
     else:
-        isetTime = np.argmin(abs(np.array(momen.tmom)-setTime))
-        momen.set_time(momen.tmom[isetTime])
+        isetTime = momen.get_tind_nearest(setTime)
+        momen.set_tind(isetTime)
 #        print 'Reading moments are at t = ', momen.tmom[isetTime]
 
     nz = pars['nz0']
@@ -116,8 +116,8 @@ def LILO_moments_from_mom_file(pars,suffix,plot,setTime=-1):
         momen.set_time(momen.tmom[setTime])
         print ('Reading momentss are at t = ', momen.tmom[setTime])
     else:
-        isetTime = np.argmin(abs(np.array(momen.tmom)-setTime))
-        momen.set_time(momen.tmom[isetTime])
+        isetTime = momen.get_tind_nearest(setTime)
+        momen.set_tind(isetTime)
         print ('Reading momentss are at t = ', momen.tmom[isetTime])
 
     nz = pars['nz0']
@@ -2,14 +2,23 @@
 import struct
 from os.path import getsize, join
 import numpy as np
+import binlib
 
 class momfile():
-        def __init__(self,file,pars):
+        #with mmap=True the whole file is mapped once and dens(), tpar(), ...
+        #return read-only views into the map instead of freshly read copies
+        #cache is an optional binlib.SliceCache, which may be shared between files
+        def __init__(self,file,pars,mmap=False,cache=None):
             self.pars=pars
             self.file=file
+            self.use_mmap=mmap
+            self.cache=cache
+            self.mm=None
             self.set_gridcounts()
             self.set_sizes()
             self.set_datatypes()
+            self.layout=binlib.RecordLayout(self.nmoms,self.nz,self.ny,self.nx,self.nprt,self.npct,
+                                            ['dens','tpar','tperp','qpar','qperp','upar'])
             self.define_arrays()
             self.redirect(self.file)
         #def redirect(self,file):
@@ -20,6 +29,8 @@ class momfile():
             except:
                 pass
             self.m=open(file,'rb')
+            if self.use_mmap:
+                self.mm=binlib.map_records(file,self.layout)
             self.tmom=[]
             self.te,self.tesize=self.TimeEntry()
             self.get_timearray()
@@ -69,10 +80,26 @@ class momfile():
        
            
         def get_timearray(self):
-#get time arrays for field file
-            for i in range(int(getsize(self.file)/(self.leapmom+self.tesize))):
-                self.tmom.append(float(self.te.unpack(self.m.read(self.tesize))[1]))
-                self.m.seek(self.leapmom,1)
+#get time arrays for mom file from the (persisted) time index
+            self.taxis=binlib.TimeAxis(binlib.time_index(self.file,self.layout))
+            self.tmom=self.taxis.times.tolist()
+
+#pick up time steps appended since the last call (e.g. while GENE is still
+#running), reading only the new records; returns their times
+        def refresh(self):
+            ntimes=len(self.tmom)
+            times=binlib.extend_index(self.file,self.layout,self.taxis.times)
+            if len(times)>ntimes:
+                self.taxis=binlib.TimeAxis(times)
+                self.tmom=times.tolist()
+                if self.use_mmap:
+                    self.mm=binlib.map_records(self.file,self.layout)
+            return times[ntimes:]
+
+#yield (tind,time) for each new time step as it lands in the file,
+#polling every poll seconds until none arrived for timeout seconds
+        def follow(self,poll=5.,timeout=None):
+            return binlib.follow(self,poll,timeout)
 
         def get_minmaxtime(self):
             if not self.tmom:
@@ -100,11 +127,67 @@ class momfile():
                         return self.tesize+self.tind*(self.tesize+leap)+var*(self.entrysize+2*self.intsize)+self.intsize
 
 #returns field for given timestep
-        def readvar(self,var):
-            self.m.seek(self.offset(var))	
-            var3d=np.fromfile(self.m,count=self.nx*self.ny*self.nz,dtype=self.npct).reshape(self.nz,self.ny,self.nx)
+#ky, kx and z (ints or slices) select a hyperslab var3d[z, ky, kx] of which
+#only the needed bytes are read
+        def readvar(self,var,ky=None,kx=None,z=None):
+            sel=binlib.selection(z,ky,kx)
+            if self.mm is not None:
+                return self.mm[self.layout.names[var]][self.tind][sel]
+            if self.cache is not None:
+                key=self.cache.key(self.file,self.tind,var,sel)
+                var3d=self.cache.get(key)
+                if var3d is not None:
+                    return var3d
+            if not binlib.is_full(sel):
+                var3d=binlib.read_block(self.m,self.layout,self.offset(var),sel)
+            else:
+                self.m.seek(self.offset(var))
+                var3d=np.fromfile(self.m,count=self.nx*self.ny*self.nz,dtype=self.npct).reshape(self.nz,self.ny,self.nx)
+            if self.cache is not None:
+                self.cache.put(key,var3d)
             return var3d
 
+        #returns times and data of vars for the given time indices as one array of
+        #shape (len(vars), nt, nz, ny, nx), or (nt, nz, ny, nx) for a single var name;
+        #z, ky and kx (ints or slices) restrict the block as in var3d[z, ky, kx]
+        def read_tinds(self,tinds,vars=('dens','tperp'),ky=None,kx=None,z=None):
+            single=isinstance(vars,str)
+            if single:
+                vars=(vars,)
+            for var in vars:
+                if var not in self.layout.names:
+                    raise ValueError('{} is not in mom file {}'.format(var,self.file))
+            tinds=np.asarray(tinds,dtype=np.int64)%len(self.tmom)
+            data=binlib.read_entries(self.m,self.layout,tinds,
+                                     [self.layout.names.index(var) for var in vars],
+                                     binlib.selection(z,ky,kx),self.mm)
+            times=self.taxis.times[tinds]
+            return (times,data[0]) if single else (times,data)
+
+        #same for all time steps with t0 <= time <= t1, every stride-th one
+        def read_window(self,t0,t1,vars=('dens','tperp'),stride=1,ky=None,kx=None,z=None):
+            return self.read_tinds(self.tind_range(t0,t1,stride),vars,ky,kx,z)
+
+        #yields (time, data) for each of tinds in turn with data shaped as one time
+        #step of read_tinds; a background thread reads up to prefetch steps ahead
+        def iter_tinds(self,tinds,vars=('dens','tperp'),ky=None,kx=None,z=None,prefetch=4):
+            single=isinstance(vars,str)
+            if single:
+                vars=(vars,)
+            tinds=np.asarray(tinds,dtype=np.int64)%len(self.tmom)
+            reader=binlib.prefetch(self.file,self.layout,tinds,
+                                   [self.layout.names.index(var) for var in vars],
+                                   binlib.selection(z,ky,kx),prefetch,self.mm)
+            try:
+                for tind,data in zip(tinds,reader):
+                    yield self.tmom[tind],(data[0] if single else data)
+            finally:
+                reader.close()
+
+        #same for all time steps with t0 <= time <= t1, every stride-th one
+        def iter_times(self,t0,t1,vars=('dens','tperp'),stride=1,ky=None,kx=None,z=None,prefetch=4):
+            return self.iter_tinds(self.tind_range(t0,t1,stride),vars,ky,kx,z,prefetch)
+
         def reset_tinds(self):
             self.tind=0
             self.mtind=[-1]*self.nmoms
@@ -112,13 +195,33 @@ class momfile():
         def get_tind(self):
             if not self.tmom:
                 self.get_timearray()
-            return self.tmom.index(self.time)
+            return self.taxis.index(self.time)
+
+        #return time index closest to the given time
+        def get_tind_nearest(self,time):
+            return self.taxis.nearest(time)
+
+        #return time indices with t0 <= time <= t1, every stride-th one
+        def tind_range(self,t0,t1,stride=1):
+            return self.taxis.range(t0,t1,stride)
 
         def set_time(self,time):
             self.time=time
             self.tind=self.get_tind()
 
-        def dens(self):
+        #set current timestep to the one closest to time and return its time
+        def set_time_nearest(self,time):
+            self.set_tind(self.get_tind_nearest(time))
+            return self.time
+
+        #set current timestep by index (negative indices count from the end)
+        def set_tind(self,tind):
+            self.time=self.tmom[tind]
+            self.tind=int(tind)%len(self.tmom)
+
+        def dens(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(0,ky,kx,z)
                 if self.mtind[0]==self.tind:
                     pass
                 else:
@@ -127,7 +230,9 @@ class momfile():
                 return self.dens3d
 
 
-        def tpar(self):
+        def tpar(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(1,ky,kx,z)
                 if self.mtind[1]==self.tind:
                         pass
                 else:
@@ -135,7 +240,9 @@ class momfile():
                         self.tpar3d=self.readvar(1)
                 return self.tpar3d
 
-        def tperp(self):
+        def tperp(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(2,ky,kx,z)
                 if self.mtind[2]==self.tind:
                         pass
                 else:
@@ -143,7 +250,9 @@ class momfile():
                         self.tperp3d=self.readvar(2)
                 return self.tperp3d
 
-        def qpar(self):
+        def qpar(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(3,ky,kx,z)
                 if self.mtind[3]==self.tind:
                         pass
                 else:
@@ -151,7 +260,9 @@ class momfile():
                         self.qpar3d=self.readvar(3)
                 return self.qpar3d
 
-        def qperp(self):
+        def qperp(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(4,ky,kx,z)
                 if self.mtind[4]==self.tind:
                         pass
                 else:
@@ -159,7 +270,9 @@ class momfile():
                         self.qperp3d=self.readvar(4)
                 return self.qperp3d
 
-        def upar(self):
+        def upar(self,ky=None,kx=None,z=None):
+                if ky is not None or kx is not None or z is not None:
+                        return self.readvar(5,ky,kx,z)
                 if self.mtind[5]==self.tind:
                         pass
                 else:
@@ -167,3 +280,136 @@ class momfile():
                         self.upar3d=self.readvar(5)
                 return self.upar3d
 
+
+
+class MomSeries(binlib.FileSeries):
+        #mom files of a continuation run (mom_e_0001, mom_e_0002, ...) on one
+        #time axis; pars is one parameter dict or a list with one per file
+        def __init__(self,files,pars,mmap=False,cache=None):
+            super(MomSeries,self).__init__(files,pars,momfile,'n_moms',
+                                           ['dens','tpar','tperp','qpar','qperp','upar'],
+                                           mmap=mmap,cache=cache)
+            self.nmoms=self.layout.nvars
+            self.nz,self.ny,self.nx=self.layout.shape
+
+        def build_axis(self):
+            super(MomSeries,self).build_axis()
+            self.tmom=self.taxis.times.tolist()
+
+        def read_tinds(self,tinds,vars=('dens','tperp'),ky=None,kx=None,z=None):
+            return super(MomSeries,self).read_tinds(tinds,vars,ky,kx,z)
+
+        def read_window(self,t0,t1,vars=('dens','tperp'),stride=1,ky=None,kx=None,z=None):
+            return super(MomSeries,self).read_window(t0,t1,vars,stride,ky,kx,z)
+
+        def iter_tinds(self,tinds,vars=('dens','tperp'),ky=None,kx=None,z=None,prefetch=4):
+            return super(MomSeries,self).iter_tinds(tinds,vars,ky,kx,z,prefetch)
+
+        def iter_times(self,t0,t1,vars=('dens','tperp'),stride=1,ky=None,kx=None,z=None,prefetch=4):
+            return super(MomSeries,self).iter_times(t0,t1,vars,stride,ky,kx,z,prefetch)
+
+        def dens(self,ky=None,kx=None,z=None):
+            return self.current().dens(ky,kx,z)
+
+        def tpar(self,ky=None,kx=None,z=None):
+            return self.current().tpar(ky,kx,z)
+
+        def tperp(self,ky=None,kx=None,z=None):
+            return self.current().tperp(ky,kx,z)
+
+        def qpar(self,ky=None,kx=None,z=None):
+            return self.current().qpar(ky,kx,z)
+
+        def qperp(self,ky=None,kx=None,z=None):
+            return self.current().qperp(ky,kx,z)
+
+        def upar(self,ky=None,kx=None,z=None):
+            return self.current().upar(ky,kx,z)
+
+
+class MomentSet():
+        #mom files of all species of one run (mom_e_0001, mom_i_0001, ...), opened
+        #together and read as stacked arrays with axes (species,moment,...)
+        #species defaults to the names in pars; the time axes are checked to agree
+        #once on opening, so all files can then be indexed with the same tind
+        def __init__(self,suffix,pars,species=None,path='',mmap=False,cache=None):
+            self.pars=pars
+            if species is None:
+                species=[str(pars['name'+str(ispec+1)]).strip() for ispec in range(int(pars['n_spec']))]
+            self.species=list(species)
+            self.files=[join(path,'mom_'+spec+suffix) for spec in self.species]
+            self.moms=[momfile(file,pars,mmap=mmap,cache=cache) for file in self.files]
+            self.layout=self.moms[0].layout
+            self.taxis=self.moms[0].taxis
+            self.tmom=self.moms[0].tmom
+            for file,mom in zip(self.files[1:],self.moms[1:]):
+                if not np.array_equal(mom.taxis.times,self.taxis.times):
+                    raise ValueError('time axis of {} differs from {}'.format(file,self.files[0]))
+            self.nspec=len(self.moms)
+            self.nmoms=self.layout.nvars
+            self.nz,self.ny,self.nx=self.layout.shape
+            self.set_tind(0)
+
+        #vars as a tuple of moment names; all moments by default
+        def moment_names(self,vars):
+            if vars is None:
+                return tuple(self.layout.names)
+            if isinstance(vars,str):
+                return (vars,)
+            return tuple(vars)
+
+        def get_minmaxtime(self):
+            return self.tmom[0],self.tmom[-1]
+
+        def get_tind(self):
+            return self.taxis.index(self.time)
+
+        def get_tind_nearest(self,time):
+            return self.taxis.nearest(time)
+
+        def tind_range(self,t0,t1,stride=1):
+            return self.taxis.range(t0,t1,stride)
+
+        def set_time(self,time):
+            self.set_tind(self.taxis.index(time))
+
+        def set_time_nearest(self,time):
+            self.set_tind(self.get_tind_nearest(time))
+            return self.time
+
+        def set_tind(self,tind):
+            for mom in self.moms:
+                mom.set_tind(tind)
+            self.tind=self.moms[0].tind
+            self.time=self.moms[0].time
+
+#returns the moments vars of all species at the current timestep,
+#shape (species,moment,z,ky,kx) or the selected hyperslab of it
+        def read(self,vars=None,ky=None,kx=None,z=None):
+            ivars=[self.layout.names.index(var) for var in self.moment_names(vars)]
+            return np.stack([np.stack([mom.readvar(ivar,ky,kx,z) for ivar in ivars])
+                             for mom in self.moms])
+
+#returns (times,data) with data of shape (species,moment,t,z,ky,kx)
+        def read_tinds(self,tinds,vars=None,ky=None,kx=None,z=None):
+            vars=self.moment_names(vars)
+            data=[mom.read_tinds(tinds,vars,ky,kx,z) for mom in self.moms]
+            return data[0][0],np.stack([mom_data for times,mom_data in data])
+
+        def read_window(self,t0,t1,vars=None,stride=1,ky=None,kx=None,z=None):
+            return self.read_tinds(self.tind_range(t0,t1,stride),vars,ky,kx,z)
+
+#yields (time,data) per time step with data of shape (species,moment,z,ky,kx),
+#each species file being read ahead in the background
+        def iter_tinds(self,tinds,vars=None,ky=None,kx=None,z=None,prefetch=4):
+            vars=self.moment_names(vars)
+            readers=[mom.iter_tinds(tinds,vars,ky,kx,z,prefetch) for mom in self.moms]
+            try:
+                for steps in zip(*readers):
+                    yield steps[0][0],np.stack([data for time,data in steps])
+            finally:
+                for reader in readers:
+                    reader.close()
+
+        def iter_times(self,t0,t1,vars=None,stride=1,ky=None,kx=None,z=None,prefetch=4):
+            return self.iter_tinds(self.tind_range(t0,t1,stride),vars,ky,kx,z,prefetch)
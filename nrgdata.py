@@ -6,11 +6,11 @@ Module handling nrg files
 # pylint: disable=E1101
 import numpy as np
 import sys
-import csv
 import errors as err
 from baseplot import plt, Plotting
 from bisect import bisect_left
 from ParIO import Parameters
+import nrglib
 
 
 class Nrgdata(object):
@@ -53,27 +53,13 @@ class Nrgdata(object):
 
     def readnrg(self):
         """ Fill the Nrgdata object with data """
-        n_col = self.n_col
-
         try:
-            with open(self.filename) as nrgfile:
-                csvnrg = csv.reader(nrgfile, delimiter=' ', skipinitialspace=True)
-                for line in csvnrg:
-                    if len(line) == 0:
-                        continue
-                    if len(line) == 1:
-                        self.timefld.append(float(line[0]))
-                        self.nrgcols.append([[] for _ in range(self.pnt.n_spec)])
-                        ispec = 0  # Reset index for the species at the current time step
-                    elif len(line) == n_col:
-                        self.nrgcols[-1][ispec] = line
-                        ispec += 1
-                    else:
-                        raise IOError("Incorrect number of columns")
-        except IOError:
+            self.timefld, self.nrgcols = nrglib.read_nrg(self.filename, self.pnt.n_spec)
+            if self.nrgcols.shape[2] != self.n_col:
+                raise IOError("Incorrect number of columns")
+        except (IOError, ValueError):
             sys.exit("IOError: nrg file does not exist or has"
                      " wrong number of columns: {}".format(self.filename))
-        self.timefld = np.array(self.timefld)
         first_time, last_time = self.get_minmaxtime()
         if len(self.timefld) != len(set(self.timefld)):
             raise RuntimeError("Error: {} contains 2 blocks with identical"
@@ -104,7 +90,6 @@ class Nrgdata(object):
                            (self.timefld <= self.endtime))[0]
 
         self.timefld = self.timefld[pos]
-        self.nrgcols = np.array(self.nrgcols).astype(float, copy=False)
         # Reduce the nrgcols to only the required time frame
         self.nrgcols = self.nrgcols[pos, ...]
         self.isdatapresent = True
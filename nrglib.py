@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+""" nrglib.py: Block parser for GENE nrg files
+
+An nrg file holds one block per time step: a line with the time followed by
+one line of ncols values per species. read_nrg converts the whole file at
+once into a (ntime, nspec, ncols) array, for any number of species.
+
+The parsed array is persisted in a sidecar file .<file>.nrg.npz next to the
+nrg file. As GENE only appends to nrg files during a run, reopening a file
+parses just the bytes beyond the cached blocks, so repeated reads of a live
+run are nearly free.
+
+TraceStats keeps trapezoidal time averages, batch-means errors and
+correlation times of all columns up to date as records arrive, with a fixed
+amount of memory per column; follow_nrg feeds it from a running simulation:
+
+    for stats in follow_nrg('nrg_0001', 2, tstart=100.):
+        if stats.converged(0.05):
+            break
+"""
+import os
+import time
+import numpy as np
+from binlib import replace_file, monotonic
+
+# bytes before the cached offset which have to be unchanged for the cache
+# to be extended instead of rebuilt
+TAIL_BYTES = 64
+
+
+def count_columns(text):
+    """Number of columns of the species lines, taken from the second line"""
+    lines = text.split('\n', 2)
+    if len(lines) < 2:
+        return 0
+    return len(lines[1].split())
+
+
+def parse_nrg(text, nspec, ncols=None):
+    """Parse the text of an nrg file, see read_nrg"""
+    filecols = count_columns(text)
+    if filecols == 0:
+        return np.empty(0), np.empty((0, nspec, filecols if ncols is None else ncols))
+    reclen = 1 + nspec*filecols
+    values = np.array(text.split(), dtype=np.float64)
+    # a block which is still being written is dropped
+    ntime = len(values)//reclen
+    nlines = text.rstrip().count('\n') + 1
+    # the lines and values left over must form the start of one more block
+    extralines = nlines - ntime*(nspec + 1)
+    extravalues = len(values) - ntime*reclen
+    valid = 0 <= extralines <= nspec and \
+        extravalues == (1 + (extralines - 1)*filecols if extralines else 0)
+    if valid and ntime > 1:
+        # and the lines expected to hold the times must hold one value each
+        timelines = text.split('\n', ntime*(nspec + 1))[:ntime*(nspec + 1):nspec + 1]
+        valid = len(' '.join(timelines).split()) == ntime
+    if not valid:
+        raise ValueError('nrg data does not consist of blocks of a time and '
+                         '{} species lines of {} columns'.format(nspec, filecols))
+    blocks = values[:ntime*reclen].reshape(ntime, reclen)
+    data = blocks[:, 1:].reshape(ntime, nspec, filecols)
+    return blocks[:, 0].copy(), data if ncols is None else data[:, :, :ncols]
+
+
+def cache_path(filename):
+    """Name of the sidecar file holding the parsed data of an nrg file"""
+    head, tail = os.path.split(filename)
+    return os.path.join(head, '.' + tail + '.nrg.npz')
+
+
+def load_cache(filename, nspec):
+    """Return (times, data, offset, tail, size, mtime) cached for filename, or None
+
+    offset is the number of bytes taken by the cached blocks, tail the bytes
+    right before it. A cache written for another nspec is not usable.
+    """
+    try:
+        with np.load(cache_path(filename)) as cache:
+            if cache['data'].shape[1] != nspec:
+                return None
+            return (cache['times'], cache['data'], int(cache['offset']),
+                    cache['tail'].tobytes(), int(cache['size']), float(cache['mtime']))
+    except (IOError, OSError, KeyError, ValueError, IndexError):
+        return None
+
+
+def save_cache(filename, times, data, offset, tail, size, mtime):
+    """Persist the parsed data next to filename; silently skipped for read-only directories"""
+    path = cache_path(filename)
+    tmppath = path + '.{}.tmp'.format(os.getpid())
+    try:
+        with open(tmppath, 'wb') as fobj:
+            np.savez(fobj, times=times, data=data, offset=offset,
+                     tail=np.frombuffer(tail, dtype=np.uint8), size=size, mtime=mtime)
+        replace_file(tmppath, path)
+    except (IOError, OSError):
+        try:
+            os.remove(tmppath)
+        except OSError:
+            pass
+
+
+def parse_bytes(buf, nspec):
+    """Parse the complete lines of buf, see parse_nrg
+
+    Returns (times, data, nbytes) with nbytes the length of the complete
+    blocks parsed, i.e. the offset at which parsing has to resume.
+    """
+    # a line which is still being written is left for the next read
+    buf = buf[:buf.rfind(b'\n') + 1]
+    times, data = parse_nrg(buf.decode('ascii'), nspec)
+    nlines = len(times)*(nspec + 1)
+    if nlines == 0:
+        return times, data, 0
+    newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == ord('\n'))
+    return times, data, int(newlines[nlines - 1]) + 1
+
+
+def read_nrg(filename, nspec, ncols=None, persist=True):
+    """Read an nrg file into (times, data) with data of shape (ntime, nspec, ncols)
+
+    Only the first ncols columns are returned if ncols is given. With
+    persist=True the parsed data is cached in a sidecar file (see
+    cache_path). The cache is used as is if size and mtime of the file are
+    unchanged, and extended by the blocks appended since otherwise; if the
+    file was rewritten it is parsed anew.
+    """
+    stat = os.stat(filename)
+    cached = load_cache(filename, nspec) if persist else None
+    with open(filename, 'rb') as nrgfile:
+        if cached is not None:
+            times, data, offset, tail, size, mtime = cached
+            if size == stat.st_size and mtime == stat.st_mtime:
+                return times, data if ncols is None else data[:, :, :ncols]
+            # resume after the cached blocks only if the file was appended to
+            nrgfile.seek(max(0, offset - len(tail)))
+            if stat.st_size >= offset and nrgfile.read(len(tail)) == tail:
+                new_times, new_data, nbytes = parse_bytes(nrgfile.read(), nspec)
+                if len(new_times) == 0 or new_data.shape[2] == data.shape[2]:
+                    times = np.concatenate((times, new_times))
+                    data = np.concatenate((data, new_data.reshape((-1,) + data.shape[1:])))
+                    offset += nbytes
+                else:
+                    cached = None
+            else:
+                cached = None
+        if cached is None:
+            nrgfile.seek(0)
+            times, data, offset = parse_bytes(nrgfile.read(), nspec)
+        nrgfile.seek(max(0, offset - TAIL_BYTES))
+        tail = nrgfile.read(offset - nrgfile.tell())
+    if persist:
+        save_cache(filename, times, data, offset, tail, stat.st_size, stat.st_mtime)
+    return times, data if ncols is None else data[:, :, :ncols]
+
+
+class TraceStats(object):
+    """TraceStats class:
+
+    Online estimator of the time average of time traces, e.g. the (nspec,
+    ncols) columns of an nrg file, from records with t >= tstart. The average
+    is the trapezoidal integral over the time range divided by its length.
+    Its error is estimated by batch means: the intervals between records are
+    collected into at most 2*nbatches batches of equal record count; once
+    all are full, neighbouring batches are merged and the batch size doubles.
+    Memory is therefore fixed per column. The correlation time follows from
+    the variance of the batch means, var = 2*tcorr*var(data)/duration, which
+    holds for batches much longer than tcorr.
+    """
+
+    def __init__(self, shape=(), tstart=None, nbatches=16):
+        self.shape = tuple(shape)
+        self.tstart = tstart
+        self.maxbatches = 2*nbatches
+        self.nrecords = 0
+        self.tfirst = self.tlast = None
+        self.ylast = None
+        self.integral = np.zeros(self.shape)
+        # time-weighted mean and sum of squared deviations of the data
+        self.wmean = np.zeros(self.shape)
+        self.wm2 = np.zeros(self.shape)
+        # complete batches: integrals and durations, and the one being filled
+        self.batchsize = 1
+        self.nbatches = 0
+        self.bint = np.zeros((self.maxbatches,) + self.shape)
+        self.bdur = np.zeros(self.maxbatches)
+        self.curint = np.zeros(self.shape)
+        self.curdur = 0.
+        self.curn = 0
+
+    def update(self, times, data):
+        """Add the records times (nt,) and data (nt,) + shape, in time order"""
+        times = np.asarray(times, dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64).reshape((-1,) + self.shape)
+        if self.tstart is not None:
+            keep = times >= self.tstart
+            times, data = times[keep], data[keep]
+        if self.tlast is not None:
+            keep = times > self.tlast
+            times, data = times[keep], data[keep]
+        if len(times) == 0:
+            return self
+        if self.tlast is None:
+            self.tfirst = times[0]
+        else:
+            times = np.concatenate(([self.tlast], times))
+            data = np.concatenate((self.ylast[np.newaxis], data))
+        self.nrecords += len(times) - (self.tlast is not None)
+        self.tlast, self.ylast = times[-1], data[-1].copy()
+        if len(times) > 1:
+            dt = np.diff(times).reshape((-1,) + (1,)*len(self.shape))
+            dint = 0.5*(data[1:] + data[:-1])*dt
+            self.integral += dint.sum(axis=0)
+            self.add_moments(dt, 0.5*(data[1:] + data[:-1]))
+            self.add_batches(dt.ravel(), dint)
+        return self
+
+    def add_moments(self, dt, values):
+        # merge the time-weighted moments of the intervals into the totals
+        weight = dt.sum()
+        before = self.tlast - self.tfirst - weight
+        mean = (values*dt).sum(axis=0)/weight
+        m2 = ((values - mean)**2*dt).sum(axis=0)
+        delta = mean - self.wmean
+        total = before + weight
+        self.wmean += delta*weight/total
+        self.wm2 += m2 + delta**2*before*weight/total
+
+    def add_batches(self, dt, dint):
+        pos = 0
+        while pos < len(dt):
+            take = min(self.batchsize - self.curn, len(dt) - pos)
+            self.curint += dint[pos:pos + take].sum(axis=0)
+            self.curdur += dt[pos:pos + take].sum()
+            self.curn += take
+            pos += take
+            if self.curn == self.batchsize:
+                self.bint[self.nbatches] = self.curint
+                self.bdur[self.nbatches] = self.curdur
+                self.nbatches += 1
+                self.curint = np.zeros(self.shape)
+                self.curdur = 0.
+                self.curn = 0
+                if self.nbatches == self.maxbatches:
+                    self.merge_batches()
+
+    def merge_batches(self):
+        half = self.maxbatches//2
+        self.bint[:half] = self.bint[0::2] + self.bint[1::2]
+        self.bdur[:half] = self.bdur[0::2] + self.bdur[1::2]
+        self.bint[half:] = 0.
+        self.bdur[half:] = 0.
+        self.nbatches = half
+        self.batchsize *= 2
+
+    def duration(self):
+        return 0. if self.tlast is None else self.tlast - self.tfirst
+
+    def mean(self):
+        """Trapezoidal time average; the record itself if there is only one"""
+        if self.tlast is None:
+            return np.full(self.shape, np.nan)
+        if self.tlast == self.tfirst:
+            return self.ylast.copy()
+        return self.integral/self.duration()
+
+    def error(self):
+        """Batch-means error of mean(); nan with fewer than two complete batches"""
+        if self.nbatches < 2:
+            return np.full(self.shape, np.nan)
+        bdur = self.bdur[:self.nbatches].reshape((-1,) + (1,)*len(self.shape))
+        bmeans = self.bint[:self.nbatches]/bdur
+        weight = bdur/bdur.sum()
+        mean = (weight*bmeans).sum(axis=0)
+        var = (weight**2*(bmeans - mean)**2).sum(axis=0)
+        return np.sqrt(var*self.nbatches/(self.nbatches - 1))
+
+    def variance(self):
+        """Time-weighted variance of the traces"""
+        if self.nrecords < 2:
+            return np.full(self.shape, np.nan)
+        return self.wm2/self.duration()
+
+    def corrtime(self):
+        """Integrated correlation time estimated from the batch means"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.error()**2*self.duration()/(2.*self.variance())
+
+    def converged(self, rtol, atol=0., min_batches=8):
+        """True if all errors are below atol + rtol*|mean| with at least
+        min_batches complete batches, each longer than the correlation time"""
+        if self.nbatches < min_batches:
+            return False
+        err = self.error()
+        batchdur = self.duration()/self.nbatches
+        with np.errstate(invalid='ignore'):
+            return bool(np.all(err <= atol + rtol*np.abs(self.mean())) and
+                        np.all(np.nan_to_num(self.corrtime()) <= batchdur))
+
+
+def follow_nrg(filename, nspec, stats=None, tstart=None, poll=5., timeout=None):
+    """Yield stats after every update with records appended to filename
+
+    stats is a TraceStats of shape (nspec, ncols), created on the first
+    records if None. Only the bytes appended since the last poll are parsed.
+    The file is polled every poll seconds; the generator ends once no new
+    record arrived for timeout seconds (never, if timeout is None).
+    """
+    offset = 0
+    idle_since = monotonic()
+    while True:
+        with open(filename, 'rb') as nrgfile:
+            nrgfile.seek(offset)
+            times, data, nbytes = parse_bytes(nrgfile.read(), nspec)
+        offset += nbytes
+        if len(times):
+            if stats is None:
+                stats = TraceStats(data.shape[1:], tstart)
+            yield stats.update(times, data)
+            idle_since = monotonic()
+        elif timeout is not None and monotonic() - idle_since >= timeout:
+            return
+        else:
+            time.sleep(poll)
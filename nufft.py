@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+""" nufft.py: Spectra of samples at nonuniform times (pure numpy NUFFT)
+
+GENE writes its output at an adaptive time step, so field, mom and nrg time
+traces are not equidistant. Instead of interpolating them onto an
+oversampled uniform grid, the sums of the discrete Fourier transform are
+evaluated directly at the sample times with a type-1 nonuniform FFT
+(Gaussian gridding after Greengard & Lee, SIAM Rev. 46, 443 (2004)): every
+sample is spread onto a twice oversampled grid with a Gaussian kernel, the
+grid is transformed by an FFT and the kernel is divided out again. This is
+O(N log N) with a relative error of about eps.
+
+    freqs, f_hat = fft(times, phi)        # like np.fft.fft for uniform times
+    freqs, psd = welch(times, phi, 256)   # like scipy.signal.welch
+
+python nufft.py compares fft with np.fft.fft for 1 to 16 modes and nufft1
+with the direct sum at jittered times, and locates a tone at jittered times.
+"""
+import numpy as np
+import precision
+
+OVERSAMPLING = 2
+# maximum number of spread kernel values held in memory at once
+MAX_ELEMENTS = 2**24
+
+
+def kernel_width(eps):
+    """Half width (in grid points) of the Gaussian kernel for accuracy eps"""
+    ratio = OVERSAMPLING
+    return max(2, int(np.ceil(-np.log(eps)*(ratio - 0.5)/(np.pi*(ratio - 1)) + 0.5)))
+
+
+def nufft1(x, c, n, axis=-1, eps=1e-12):
+    """Type-1 NUFFT: F[k] = sum_j c[j]*exp(-1j*k*x[j]) for the n modes k
+    in np.fft.fftfreq order (0, 1, ..., -1)
+
+    x are the positions in radians (taken modulo 2*pi), c the coefficients,
+    with the samples along axis; all other axes of c are transformed at once.
+    The result is complex64 for single precision c (see precision.py), whose
+    accuracy is then limited to about 1e-6 whatever eps.
+    """
+    x = np.mod(np.asarray(x, dtype=np.float64), 2.*np.pi)
+    c = np.moveaxis(np.asarray(c), axis, -1)
+    lead = c.shape[:-1]
+    dtype = precision.complex_dtype(like=c)
+    c = c.reshape(-1, len(x)).astype(dtype, copy=False)
+    nsig = c.shape[0]
+    msp = kernel_width(eps)
+    ngrid = max(OVERSAMPLING*n, 2*msp)
+    ngrid += ngrid % 2
+    # few modes need a grid of at least 2*msp points, i.e. a larger
+    # oversampling ratio, and the kernel must be narrowed to match it
+    ratio = ngrid/float(n)
+    tau = np.pi*msp/(n*n*ratio*(ratio - 0.5))
+    hx = 2.*np.pi/ngrid
+    # nearest grid point left of every sample and the kernel on the 2*msp
+    # grid points around it
+    m = np.floor(x/hx).astype(np.int64)
+    offsets = np.arange(-msp + 1, msp + 1)
+    kernel = np.exp(-(x[:, np.newaxis] - (m[:, np.newaxis] + offsets)*hx)**2/(4.*tau))
+    kernel = kernel.astype(precision.real_dtype(like=c), copy=False)
+    index = np.mod(m[:, np.newaxis] + offsets, ngrid).ravel()
+    grid = np.empty((nsig, ngrid), dtype=dtype)
+    nchunk = max(1, MAX_ELEMENTS//kernel.size)
+    for s0 in range(0, nsig, nchunk):
+        chunk = c[s0:s0 + nchunk]
+        values = (chunk[:, :, np.newaxis]*kernel).reshape(len(chunk), -1)
+        flat = (index + ngrid*np.arange(len(chunk))[:, np.newaxis]).ravel()
+        size = len(chunk)*ngrid
+        grid[s0:s0 + nchunk] = (np.bincount(flat, values.real.ravel(), size) +
+                                1j*np.bincount(flat, values.imag.ravel(), size)
+                                ).reshape(len(chunk), ngrid)
+    spectrum = precision.fft(grid, axis=-1)
+    k = np.fft.fftfreq(n, 1./n).round().astype(np.int64)
+    correction = (np.sqrt(np.pi/tau)*np.exp(k**2*tau)/ngrid).astype(precision.real_dtype(like=c))
+    result = correction*spectrum[:, k % ngrid]
+    return np.moveaxis(result.reshape(lead + (n,)), -1, axis)
+
+
+def sample_weights(time):
+    """Quadrature weights of the sample times: half the distance between the
+    neighbours of each sample (the full distance to its neighbour at the
+    ends), so that sum(weights*f) approximates the integral of f"""
+    time = np.asarray(time, dtype=np.float64)
+    if len(time) < 2:
+        return np.ones(len(time))
+    dt = np.diff(time)
+    weights = np.empty(len(time))
+    weights[1:-1] = 0.5*(dt[:-1] + dt[1:])
+    weights[0] = dt[0]
+    weights[-1] = dt[-1]
+    return weights
+
+
+def is_uniform(time, rtol=0.01):
+    """Whether the time steps agree within rtol of the smallest one"""
+    dt = np.diff(time)
+    return len(dt) < 2 or np.std(dt) < rtol*np.min(dt)
+
+
+def fft(time, f, n=None, period=None, axis=-1, eps=1e-12):
+    """Discrete Fourier transform of samples f at the nonuniform times time
+
+    Returns (freqs, f_hat) with
+        f_hat[k] = sum_j w_j*f_j*exp(-2j*pi*freqs[k]*(time_j - time_0))
+    for the n (default: number of samples) frequencies freqs =
+    np.fft.fftfreq(n, period/n). The weights w_j = sample_weights/(period/n)
+    are 1 for equidistant samples, for which f_hat equals np.fft.fft(f) if
+    period has its default n*dt, the mean time step times the number of
+    samples. Otherwise f_hat is the sum of the samples of f on a uniform
+    grid of n points over period, without interpolating f. For jittered
+    samples this sum leaves a flat floor of leaked power at all frequencies
+    (about 1% of a pure tone for a jitter of 20% of dt), which biases moments
+    of |f_hat|**2 taken over the whole band.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    nt = len(time)
+    if n is None:
+        n = nt
+    if period is None:
+        period = (time[-1] - time[0])*nt/(nt - 1.)
+    f = np.moveaxis(np.asarray(f), axis, -1)
+    weights = (sample_weights(time)/(period/n)).astype(precision.real_dtype(like=f))
+    x = 2.*np.pi*(time - time[0])/period
+    f_hat = nufft1(x, f*weights, n, -1, eps)
+    return np.fft.fftfreq(n, period/n), np.moveaxis(f_hat, -1, axis)
+
+
+def window_function(window, nperseg):
+    """Window of nperseg points as in scipy.signal.welch (periodic windows)"""
+    if isinstance(window, str) or isinstance(window, tuple):
+        from scipy import signal
+        return signal.get_window(window, nperseg)
+    return np.asarray(window, dtype=np.float64)
+
+
+def welch(time, f, nperseg=256, window='hann', noverlap=None, return_onesided=True,
+          detrend='constant', axis=-1, eps=1e-12):
+    """Welch power spectral density of samples at nonuniform times
+
+    Works like scipy.signal.welch(f, fs=1/dt, ..., scaling='density') with
+    dt the mean time step, and gives the same result for equidistant samples:
+    segments of nperseg*dt, shifted by (nperseg - noverlap)*dt, take the
+    samples inside them, the window is evaluated at the sample times and
+    every segment is transformed by fft with the quadrature weights of its
+    samples. detrend is 'constant' (subtract the weighted mean) or False.
+    One-sided spectra are returned for real input only. Returns (freqs, psd).
+    """
+    time = np.asarray(time, dtype=np.float64)
+    f = np.moveaxis(np.asarray(f), axis, -1)
+    nt = len(time)
+    dt = float(time[-1] - time[0])/(nt - 1.)
+    nperseg = min(int(nperseg), nt)
+    if noverlap is None:
+        noverlap = nperseg//2
+    step = nperseg - noverlap
+    win = window_function(window, nperseg)
+    rdtype = precision.real_dtype(like=f)
+    onesided = return_onesided and not np.iscomplexobj(f)
+    # sample positions in units of the mean time step
+    pos = (time - time[0])/dt
+    nseg = (nt - noverlap)//step
+    psd = 0.
+    nused = 0
+    for iseg in range(nseg):
+        start = iseg*step
+        j0, j1 = np.searchsorted(pos, [start - 0.5, start + nperseg - 0.5])
+        if j1 - j0 < 2:
+            continue
+        segpos = pos[j0:j1] - start
+        segwin = np.interp(segpos, np.arange(nperseg), win).astype(rdtype)
+        weights = sample_weights(segpos).astype(rdtype)
+        segment = f[..., j0:j1]
+        if detrend == 'constant':
+            segment = segment - (segment*weights).sum(axis=-1, keepdims=True)/weights.sum()
+        elif detrend:
+            raise ValueError('unknown detrend {}'.format(detrend))
+        x = 2.*np.pi*segpos/nperseg
+        spectrum = nufft1(x, segment*(weights*segwin), nperseg, -1, eps)
+        psd = psd + (spectrum*spectrum.conj()).real/np.sum(weights*segwin**2)
+        nused += 1
+    psd = psd*dt/nused
+    freqs = np.fft.fftfreq(nperseg, dt)
+    if onesided:
+        nfreq = nperseg//2 + 1
+        psd = psd[..., :nfreq]
+        freqs = np.abs(freqs[:nfreq])
+        if nperseg % 2:
+            psd[..., 1:] *= 2.
+        else:
+            psd[..., 1:-1] *= 2.
+    return freqs, np.moveaxis(psd, -1, axis)
+
+
+def check(nmax=16, rtol=1e-12):
+    """Compare fft of equidistant samples with np.fft.fft for 1..nmax modes,
+    nufft1 of jittered samples with the direct sum, and locate a pure tone
+    sampled at jittered times; returns the largest relative error of the
+    transforms"""
+    rng = np.random.default_rng(0)
+    worst = 0.
+    for n in range(1, nmax + 1):
+        f = rng.standard_normal(n) + 1j*rng.standard_normal(n)
+        if n == 1:
+            f_hat = nufft1(np.zeros(1), f, 1)
+        else:
+            freqs, f_hat = fft(0.1*np.arange(n), f)
+        exact = np.fft.fft(f)
+        err = np.max(np.abs(f_hat - exact))/np.max(np.abs(exact))
+        if err > rtol:
+            raise AssertionError('nufft of {} modes is off by {:.1e}'.format(n, err))
+        worst = max(worst, err)
+    # time steps jittered by +-20%
+    nt = 400
+    time = np.concatenate(([0.], np.cumsum(rng.uniform(0.05, 0.07, nt - 1))))
+    for n in range(1, nmax + 1):
+        c = rng.standard_normal(nt) + 1j*rng.standard_normal(nt)
+        x = 2.*np.pi*time/time[-1]
+        k = np.fft.fftfreq(n, 1./n).round()
+        exact = np.exp(-1j*k[:, np.newaxis]*x).dot(c)
+        err = np.max(np.abs(nufft1(x, c, n) - exact))/np.max(np.abs(exact))
+        if err > rtol:
+            raise AssertionError('nufft of {} jittered samples is off by {:.1e}'.format(n, err))
+        worst = max(worst, err)
+    period = time[-1]*nt/(nt - 1.)
+    freqs, f_hat = fft(time, np.exp(-2j*np.pi*10*time/period))
+    peak = np.argmax(np.abs(f_hat))
+    if abs(freqs[peak]*period + 10) > 1e-9 or abs(abs(f_hat[peak])/nt - 1) > 1e-3:
+        raise AssertionError('tone of -10 cycles found at {:.3f} cycles with amplitude {:.4f}'
+                             .format(freqs[peak]*period, abs(f_hat[peak])/nt))
+    return worst
+
+
+if __name__ == '__main__':
+    print('largest relative error: {:.1e}'.format(check()))
@@ -60,18 +60,14 @@ if 1 == 0:
     doublePlot2D(kygrid, tgrid, dens_tky, tperp_tky, 'dens_tky', 'tperp_tky', title, filename, 'ky', 't',plot_format)
 if 1 == 1:
 #    plot_format = 'ps'
-    dens_fky = np.empty((nf,ny),dtype = 'complex128')
-    tperp_fky = np.empty((nf,ny),dtype = 'complex128')
     show_plots = False
-    for ky in kygrid:
-        fgrid, dens_f = windowFFT(tgrid, dens_tky[:,ky], nf, lf, 'dens_ky=' + str(ky), show_plots, plot_format)
-        fgrid, tperp_f = windowFFT(tgrid, tperp_tky[:,ky], nf, lf, 'tperp_ky=' + str(ky), show_plots, plot_format)
-        dens_f = np.minimum(dens_f, 0.002)
-        tperp_f = np.minimum(tperp_f, 0.002)
-        #dens_f = np.log(dens_f)
-        #tperp_f = np.log(tperp_f)
-        dens_fky[:,ky] = dens_f.reshape(1, nf)
-        tperp_fky[:,ky] = tperp_f.reshape(1, nf)
+    #transforms of all ky at once
+    fgrid, dens_fky = windowFFT_batch(tgrid, np.transpose(dens_tky[:,kygrid]), nf, lf)
+    fgrid, tperp_fky = windowFFT_batch(tgrid, np.transpose(tperp_tky[:,kygrid]), nf, lf)
+    dens_fky = np.transpose(np.minimum(dens_fky, 0.002))
+    tperp_fky = np.transpose(np.minimum(tperp_fky, 0.002))
+    #dens_fky = np.log(dens_fky)
+    #tperp_fky = np.log(tperp_fky)
     #doublePlot2D(kygrid, fgrid, dens_fky, tperp_fky, 'dens_fky', 'tperp_fky', title, filename, 'ky', 'f',plot_format)
     filename = 'dens_fky01.ps'
     title = ' '
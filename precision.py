@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+""" precision.py: Precision policy for processing GENE data in memory
+
+With the default policy 'auto' arrays follow the PRECISION parameter of the
+run (or the dtype of the input array), so data of single precision runs stays
+in float32/complex64 from fieldlib/momlib through the wrappers and spectral
+routines. set_policy('double') restores upcasting to float64/complex128,
+set_policy('single') forces single precision for all runs.
+"""
+import numpy as np
+try:
+    # scipy.fft keeps single precision input in single precision
+    import scipy.fft as fftmod
+except ImportError:
+    fftmod = np.fft
+
+POLICIES = ('auto', 'single', 'double')
+policy = 'auto'
+
+
+def set_policy(newpolicy):
+    """Set the global precision policy: 'auto', 'single' or 'double'"""
+    global policy
+    if newpolicy not in POLICIES:
+        raise ValueError('precision policy must be one of {}'.format(POLICIES))
+    policy = newpolicy
+
+
+def is_single(pars=None, like=None):
+    """Whether to process in single precision
+
+    Decided by the policy, or for 'auto' by PRECISION in pars or else by the
+    dtype of the array like.
+    """
+    if policy != 'auto':
+        return policy == 'single'
+    if pars is not None:
+        return pars.get('PRECISION') == 'SINGLE'
+    if like is not None:
+        # by kind and size, so big-endian memmaps count as single too
+        dtype = np.asarray(like).dtype
+        return (dtype.kind == 'f' and dtype.itemsize == 4) or \
+            (dtype.kind == 'c' and dtype.itemsize == 8)
+    return False
+
+
+def real_dtype(pars=None, like=None):
+    return np.dtype(np.float32) if is_single(pars, like) else np.dtype(np.float64)
+
+
+def complex_dtype(pars=None, like=None):
+    return np.dtype(np.complex64) if is_single(pars, like) else np.dtype(np.complex128)
+
+
+def fft(arr, axis=-1):
+    """FFT along axis which returns complex64 for single precision input"""
+    arr = np.asarray(arr)
+    return fftmod.fft(arr, axis=axis).astype(complex_dtype(like=arr), copy=False)
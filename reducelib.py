@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+""" reducelib.py: Process-parallel reductions over the time steps of field/mom files
+
+The time indices are cut into blocks, the blocks are distributed over a
+concurrent.futures process pool, and every worker opens its own handle of
+the file, reads its blocks with coalesced reads and reduces them. The partial
+results are then combined in time order. Example, the time averaged |phi|^2:
+
+    field = fieldfile('field_0001', pars)
+    tinds = field.tind_range(t0, t1)
+    phi2 = reduce_tinds(field, Sum(abs2, mean=True), tinds, 'phi')[0]
+
+Reducers get the data of a block as read by read_tinds, with shape
+(nvars, nt, nz, ny, nx) or the selected hyperslab of it. They must be
+picklable, so func arguments have to be module level functions or numpy
+ufuncs (abs2, np.abs, np.real, ...), not lambdas.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import binlib
+import nufft
+import precision
+
+
+def abs2(data):
+    """|data|^2 without the square root of np.abs"""
+    return data.real**2 + data.imag**2
+
+
+class Reducer(object):
+    """Reducer class:
+
+    Base class of the reductions. map() reduces the data of one block of time
+    steps to a partial result, combine() merges two partial results of
+    consecutive time ranges and finish() turns the total into the result.
+    """
+
+    def blocks(self, tinds, block):
+        """Cut tinds into the blocks which are read and mapped at once"""
+        return [tinds[i0:i0 + block] for i0 in range(0, len(tinds), block)]
+
+    def map(self, times, data):
+        raise NotImplementedError
+
+    def combine(self, part0, part1):
+        return part0 + part1
+
+    def finish(self, total):
+        return total
+
+
+class Sum(Reducer):
+    """Sum class:
+
+    Sum over time of func(data) (of data itself if func is None), with
+    mean=True divided by the number of time steps. Shape (nvars, ...).
+    """
+
+    def __init__(self, func=None, mean=False):
+        self.func = func
+        self.mean = mean
+
+    def map(self, times, data):
+        values = data if self.func is None else self.func(data)
+        return values.shape[1], values.sum(axis=1)
+
+    def combine(self, part0, part1):
+        return part0[0] + part1[0], part0[1] + part1[1]
+
+    def finish(self, total):
+        ntimes, values = total
+        return values/ntimes if self.mean else values
+
+
+class SumSquares(Sum):
+    """SumSquares class:
+
+    Sum (or with mean=True the mean) of |data|^2 over time.
+    """
+
+    def __init__(self, mean=False):
+        super(SumSquares, self).__init__(abs2, mean)
+
+
+class Histogram(Reducer):
+    """Histogram class:
+
+    Histogram of func(data) over all time steps and grid points, one per
+    variable. The bin edges have to be fixed beforehand so that the partial
+    histograms can be added: either bins edges, or a number of bins together
+    with range=(min, max). finish() returns (edges, counts) with counts of
+    shape (nvars, nbins).
+    """
+
+    def __init__(self, bins, range=None, func=np.abs):
+        if range is None:
+            self.edges = np.asarray(bins, dtype=np.float64)
+        else:
+            self.edges = np.linspace(range[0], range[1], int(bins) + 1)
+        self.func = func
+
+    def map(self, times, data):
+        values = data if self.func is None else self.func(data)
+        return np.stack([np.histogram(var_values, self.edges)[0] for var_values in values])
+
+    def finish(self, total):
+        return self.edges, total
+
+
+class Welch(Reducer):
+    """Welch class:
+
+    Welch estimate of the power spectral density along time at every grid
+    point. The blocks are the segments of nperseg time steps, overlapping by
+    noverlap (default nperseg//2), which are detrended by their mean and
+    windowed (window: a name for scipy.signal.get_window such as 'hann',
+    periodic as in scipy.signal.welch and nufft.welch, None for a boxcar or
+    an array). The time step
+    is taken as the mean spacing of the segments, i.e. the output interval
+    is assumed to be constant. finish() returns (freqs, psd) with the
+    two-sided psd of shape (nvars, nperseg, ...) in np.fft.fftfreq order.
+    """
+
+    def __init__(self, nperseg=256, noverlap=None, window='hann'):
+        self.nperseg = nperseg
+        self.noverlap = nperseg//2 if noverlap is None else noverlap
+        if window is None:
+            self.window = np.ones(nperseg)
+        else:
+            self.window = nufft.window_function(window, nperseg)
+
+    def blocks(self, tinds, block):
+        step = self.nperseg - self.noverlap
+        segs = [tinds[i0:i0 + self.nperseg]
+                for i0 in range(0, len(tinds) - self.nperseg + 1, step)]
+        if not segs:
+            raise ValueError('fewer than nperseg={} time steps'.format(self.nperseg))
+        return segs
+
+    def map(self, times, data):
+        seg = data - data.mean(axis=1, keepdims=True)
+        seg *= self.window.astype(precision.real_dtype(like=seg)).reshape(
+            (1, -1) + (1,)*(data.ndim - 2))
+        dt = (times[-1] - times[0])/(len(times) - 1)
+        return 1, dt, abs2(precision.fft(seg, axis=1))
+
+    def combine(self, part0, part1):
+        return tuple(p0 + p1 for p0, p1 in zip(part0, part1))
+
+    def finish(self, total):
+        nseg, dtsum, power = total
+        dt = dtsum/nseg
+        psd = power*(dt/(nseg*np.sum(self.window**2)))
+        return np.fft.fftfreq(self.nperseg, dt), psd
+
+
+def reduce_blocks(gene_file, reducer, blocks, vars, ky=None, kx=None, z=None):
+    """Partial result of reducer over blocks of time indices of an opened file"""
+    total = None
+    for tinds in blocks:
+        times, data = gene_file.read_tinds(tinds, vars, ky, kx, z)
+        part = reducer.map(times, data)
+        total = part if total is None else reducer.combine(total, part)
+    return total
+
+
+def open_and_reduce(opener, args, reducer, blocks, vars, ky=None, kx=None, z=None):
+    """Worker: open a handle of its own and reduce its blocks"""
+    return reduce_blocks(opener(*args), reducer, blocks, vars, ky, kx, z)
+
+
+def handle_args(gene_file):
+    """Class and constructor arguments reopening gene_file in a worker"""
+    if isinstance(gene_file, binlib.FileSeries):
+        return type(gene_file), (gene_file.files, gene_file.pars)
+    return type(gene_file), (gene_file.file, gene_file.pars)
+
+
+def reduce_tinds(gene_file, reducer, tinds, vars, ky=None, kx=None, z=None,
+                 nworkers=None, block=64, tasks_per_worker=4):
+    """Reduce vars of gene_file over the time indices tinds
+
+    gene_file is a fieldfile, momfile or one of the series classes, vars a
+    variable name or a tuple of them (the data handed to the reducer always
+    has the variable axis first). Blocks of block time steps are read at once
+    and spread over nworkers processes (default: all cores); nworkers=1
+    reduces in this process with gene_file itself.
+    """
+    if isinstance(vars, str):
+        vars = (vars,)
+    tinds = np.asarray(tinds, dtype=np.int64)
+    blocks = reducer.blocks(tinds, block)
+    if not blocks:
+        raise ValueError('no time steps to reduce')
+    if nworkers is None:
+        nworkers = os.cpu_count() or 1
+    if nworkers == 1:
+        return reducer.finish(reduce_blocks(gene_file, reducer, blocks, vars, ky, kx, z))
+    # consecutive blocks per task, a few tasks per worker to balance the load
+    ntasks = min(len(blocks), nworkers*tasks_per_worker)
+    bounds = np.linspace(0, len(blocks), ntasks + 1).astype(int)
+    opener, args = handle_args(gene_file)
+    with ProcessPoolExecutor(max_workers=nworkers) as pool:
+        futures = [pool.submit(open_and_reduce, opener, args, reducer,
+                               blocks[i0:i1], vars, ky, kx, z)
+                   for i0, i1 in zip(bounds[:-1], bounds[1:])]
+        total = None
+        for future in futures:
+            part = future.result()
+            total = part if total is None else reducer.combine(total, part)
+    return reducer.finish(total)
+
+
+def reduce_window(gene_file, reducer, t0, t1, vars, stride=1, ky=None, kx=None, z=None,
+                  nworkers=None, block=64):
+    """Same as reduce_tinds for all time steps with t0 <= time <= t1, every stride-th one"""
+    return reduce_tinds(gene_file, reducer, gene_file.tind_range(t0, t1, stride), vars,
+                        ky, kx, z, nworkers, block)
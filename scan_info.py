@@ -61,7 +61,7 @@ def my_corr_func_complex(v1,v2,time,show_plot=False,v1eqv2=True):
         i+=1
 
     if neg_loc < corr_time:
-        print "WARNING: neg_loc < corr_time"
+        print("WARNING: neg_loc < corr_time")
         corr_time = neg_loc
 
     if show_plot:
@@ -71,15 +71,43 @@ def my_corr_func_complex(v1,v2,time,show_plot=False,v1eqv2=True):
         plt.show()
     return cfunc,tau,corr_time
 
+def omega_done(scan_num):
+    #omega file of an earlier evaluation holding a growth rate
+    if not os.path.isfile('omega_'+scan_num):
+        return False
+    omega0 = np.genfromtxt('omega_'+scan_num)
+    return bool(omega0.any() and omega0[1] != 0.0 and np.isfinite(omega0[1]))
+
+def field_omega(gr_table,i,scan_num):
+    #gamma and omega from phi of the batch evaluation; if the field file has
+    #too few records for it the fit window is asked for by
+    #calc_omega_from_field.py as before
+    om = [gr_table['kymin'][i],gr_table['gamma_field'][i],gr_table['omega_field'][i]]
+    if np.isfinite(om[1]) and np.isfinite(om[2]):
+        np.savetxt('omega_'+scan_num,[om])
+    else:
+        print("No frequency from the field file of run "+scan_num+", calling calc_omega_from_field.py")
+        call(['calc_omega_from_field.py',scan_num])
+        om = np.genfromtxt('omega_'+scan_num)
+    return om
+
+def nrg_gamma(gr_table,i,scan_num,nspec):
+    #growth rate of the batch evaluation; unconverged runs go through
+    #calc_gr2, which shows the fit and asks which growth rate to keep
+    if gr_table['converged'][i]:
+        return gr_table['gamma'][i]
+    print("Growth rate of run "+scan_num+" not converged (error "+str(gr_table['err'][i])+")")
+    return calc_gr2('_'+scan_num,nspec=nspec)
+
 par = Parameters()
 par.Read_Pars('parameters')
 pars = par.pardict
 edge_opt = pars['edge_opt']
-print "edge_opt = ",edge_opt
+print("edge_opt = ",edge_opt)
 #dummy = raw_input("Press any key to continue:\n")
 
-print type(pars['scan_dims'])
-print "scan_dims",pars['scan_dims']
+print(type(pars['scan_dims']))
+print("scan_dims",pars['scan_dims'])
 if type(pars['scan_dims']) == str:
     scan_dims = pars['scan_dims'].split()
     numscan_tot = 1
@@ -88,10 +116,17 @@ if type(pars['scan_dims']) == str:
 else:
     numscan_tot = pars['scan_dims']
 
-print "Total number of runs: ", numscan_tot 
+print("Total number of runs: ", numscan_tot)
+
+if calc_grs:
+    #growth rates of all runs without an omega file at once from the nrg
+    #files, and for global scans the frequencies from the field files
+    todo = [i+1 for i in range(numscan_tot) if not omega_done('%04d' % (i+1))]
+    gr_table,gr_rates = scan_growth_rates('.',nruns=numscan_tot,only=todo,
+                                          use_field='x_local' in pars and not pars['x_local'])
 
 if pars['n_spec'] == 3:
-    dummy = raw_input("Assuming electrons are third species (press any key).\n")
+    dummy = input("Assuming electrons are third species (press any key).\n")
 
 #Test if global scan
 if 'x_local' in pars and not pars['x_local']:
@@ -100,12 +135,12 @@ if 'x_local' in pars and not pars['x_local']:
         par0 = Parameters()
         scan_num = '000'+str(i+1)
         scan_num = scan_num[-4:]
-        print "Analyzing ",scan_num
+        print("Analyzing ",scan_num)
         if os.path.isfile('parameters_'+scan_num):
             par0.Read_Pars('parameters_'+scan_num)
             pars0 = par0.pardict
             nspec = pars0['n_spec']
-            print pars0['kymin']
+            print(pars0['kymin'])
             scan_info[i,0] = pars0['kymin']
             if 'x0' in pars0:
                 scan_info[i,1] = pars0['x0']
@@ -129,20 +164,18 @@ if 'x_local' in pars and not pars['x_local']:
             scan_info[i,2] = 0.0
         if os.path.isfile('omega_'+scan_num):
             omega0 = np.genfromtxt('omega_'+scan_num)
-            if omega0.any() and omega0[1] != 0.0:
+            if omega_done(scan_num):
                 scan_info[i,4]=omega0[1]
                 scan_info[i,5]=omega0[2]
             elif calc_grs:
-                call(['calc_omega_from_field.py',scan_num])
-                om = np.genfromtxt('omega_'+scan_num)
+                om = field_omega(gr_table,i,scan_num)
                 scan_info[i,4]=om[1]
                 scan_info[i,5]=om[2]
             else:
                 scan_info[i,4]=np.nan
                 scan_info[i,5]=np.nan
         elif calc_grs and os.path.isfile('field_'+scan_num):
-            call(['calc_omega_from_field.py',scan_num])
-            om = np.genfromtxt('omega_'+scan_num)
+            om = field_omega(gr_table,i,scan_num)
             scan_info[i,4]=om[1]
             scan_info[i,5]=om[2]
         else:
@@ -217,15 +250,15 @@ if 'x_local' in pars and not pars['x_local']:
             #plt.plot(zgrid,(np.imag(gradphi[2:-2,0,3*field.nx/4])),'-.',color = 'black')
             #plt.plot(zgrid,(np.imag(-omega_complex*field.apar()[:,0,3*field.nx/4])),'-.',color = 'red')
             #plt.show()
-            print "omega_complex",omega_complex
+            print("omega_complex",omega_complex)
             
             diff = np.sum(np.abs(gradphi[2:-2,:] + omega_complex*apar[:,:]))
             phi_cont = np.sum(np.abs(gradphi[2:-2,:]))
             apar_cont = np.sum(np.abs(omega_complex*apar[:,:]))
-            print "diff",diff
-            print "phi_cont",phi_cont
-            print "apar_cont",apar_cont
-            print "diff/abs",diff/(phi_cont+apar_cont)
+            print("diff",diff)
+            print("phi_cont",phi_cont)
+            print("apar_cont",apar_cont)
+            print("diff/abs",diff/(phi_cont+apar_cont))
             scan_info[i,11] = diff/(phi_cont+apar_cont)
             scan_info[i,12] = np.nan           
    
@@ -273,12 +306,12 @@ else:
         par0 = Parameters()
         scan_num = '000'+str(i+1)
         scan_num = scan_num[-4:]
-        print "Analyzing ",scan_num
+        print("Analyzing ",scan_num)
         if os.path.isfile('parameters_'+scan_num):
             par0.Read_Pars('parameters_'+scan_num)
             pars0 = par0.pardict
             nspec = pars0['n_spec']
-            print pars0['kymin']
+            print(pars0['kymin'])
             scan_info[i,0] = pars0['kymin']
             if 'x0' in pars0:
                 scan_info[i,1] = pars0['x0']
@@ -308,18 +341,18 @@ else:
                 scan_info[i,3] = 0.0
         if os.path.isfile('omega_'+scan_num):
             omega0 = np.genfromtxt('omega_'+scan_num)
-            if omega0.any() and omega0[1] != 0.0:
+            if omega_done(scan_num):
                 scan_info[i,4]=omega0[1]
                 scan_info[i,5]=omega0[2]
             elif calc_grs:
-                scan_info[i,4]=calc_gr2('_'+scan_num,nspec=nspec)
+                scan_info[i,4]=nrg_gamma(gr_table,i,scan_num,nspec)
                 scan_info[i,5]= 0.0
                 np.savetxt('omega_'+scan_num,[scan_info[i,0],scan_info[i,4],np.nan])
             else:
                 scan_info[i,4]=np.nan
                 scan_info[i,5]=np.nan
         elif calc_grs and os.path.isfile('nrg_'+scan_num):
-            scan_info[i,4]=calc_gr2('_'+scan_num,nspec=nspec)
+            scan_info[i,4]=nrg_gamma(gr_table,i,scan_num,nspec)
             scan_info[i,5] = 0.0
             np.savetxt('omega_'+scan_num,[scan_info[i,0],scan_info[i,4],np.nan])
         else:
@@ -340,14 +373,14 @@ else:
             phikx = field.phi()[:,0,:]
             aparkx = field.phi()[:,0,:]
             phase_fac = -np.e**(-2.0*np.pi*(0.0+1.0J)*pars0['n0_global']*pars0['q0'])
-            for j in range(field.nx/2+1):
-                phi[(j+field.nx/2)*field.nz:(j+field.nx/2+1)*field.nz]=field.phi()[:,0,j]*phase_fac**j
-                if j < field.nx/2:
-                    phi[(field.nx/2-j-1)*field.nz : (field.nx/2-j)*field.nz ]=field.phi()[:,0,-1-j]*phase_fac**(-(j+1))
+            for j in range(int(field.nx/2)+1):
+                phi[(j+int(field.nx/2))*field.nz:(j+int(field.nx/2)+1)*field.nz]=field.phi()[:,0,j]*phase_fac**j
+                if j < int(field.nx/2):
+                    phi[(int(field.nx/2)-j-1)*field.nz : (int(field.nx/2)-j)*field.nz ]=field.phi()[:,0,-1-j]*phase_fac**(-(j+1))
                 if pars0['n_fields']>1:
-                    apar[(j+field.nx/2)*field.nz:(j+field.nx/2+1)*field.nz]=field.apar()[:,0,j]*phase_fac**j
-                    if j < field.nx/2:
-                        apar[(field.nx/2-j-1)*field.nz : (field.nx/2-j)*field.nz ]=field.apar()[:,0,-1-j]*phase_fac**(-(j+1))
+                    apar[(j+int(field.nx/2))*field.nz:(j+int(field.nx/2)+1)*field.nz]=field.apar()[:,0,j]*phase_fac**j
+                    if j < int(field.nx/2):
+                        apar[(int(field.nx/2)-j-1)*field.nz : (int(field.nx/2)-j)*field.nz ]=field.apar()[:,0,-1-j]*phase_fac**(-(j+1))
         
             zavg=np.sum(np.abs(phi)*np.abs(zgrid))/np.sum(np.abs(phi))
             scan_info[i,6] = zavg
@@ -389,7 +422,7 @@ else:
             apar0 = aparkx
             #Calculate <gamma_HB> / gamma
             geomfile = pars0['magn_geometry'][1:-1]+'_'+scan_num
-            print "geomfile",geomfile
+            print("geomfile",geomfile)
             zgrid_pp, Btheta_R, prefactor = get_abs_psi_prime(geomfile,'../rbsProfs',pars['x0'])
             rbs = np.genfromtxt('../rbsProfs')
             ind_rbs_x0 = np.argmin(abs(rbs[:,0]-pars['x0'])) 
@@ -418,7 +451,7 @@ else:
             #print 'kymin',pars0['kymin']
             #print 'theta0',theta0
             #print 'ind_theta0',ind_theta0
- 	    scan_info[i,13] = np.min(gamma_HB_theta)
+            scan_info[i,13] = np.min(gamma_HB_theta)
         else:
             scan_info[i,6] = np.nan
             scan_info[i,7] = np.nan
@@ -71,6 +71,34 @@ def my_corr_func_complex(v1,v2,time,show_plot=False,v1eqv2=True):
         plt.show()
     return cfunc,tau,corr_time
 
+def omega_done(scan_num):
+    #omega file of an earlier evaluation holding a growth rate
+    if not os.path.isfile('omega_'+scan_num):
+        return False
+    omega0 = np.genfromtxt('omega_'+scan_num)
+    return bool(omega0.any() and omega0[1] != 0.0 and np.isfinite(omega0[1]))
+
+def field_omega(gr_table,i,scan_num):
+    #gamma and omega from phi of the batch evaluation; if the field file has
+    #too few records for it the fit window is asked for by
+    #calc_omega_from_field.py as before
+    om = [gr_table['kymin'][i],gr_table['gamma_field'][i],gr_table['omega_field'][i]]
+    if np.isfinite(om[1]) and np.isfinite(om[2]):
+        np.savetxt('omega_'+scan_num,[om])
+    else:
+        print("No frequency from the field file of run "+scan_num+", calling calc_omega_from_field.py")
+        call(['calc_omega_from_field.py',scan_num])
+        om = np.genfromtxt('omega_'+scan_num)
+    return om
+
+def nrg_gamma(gr_table,i,scan_num,nspec):
+    #growth rate of the batch evaluation; unconverged runs go through
+    #calc_gr2, which shows the fit and asks which growth rate to keep
+    if gr_table['converged'][i]:
+        return gr_table['gamma'][i]
+    print("Growth rate of run "+scan_num+" not converged (error "+str(gr_table['err'][i])+")")
+    return calc_gr2('_'+scan_num,nspec=nspec)
+
 par = Parameters()
 par.Read_Pars('parameters')
 pars = par.pardict
@@ -95,6 +123,13 @@ else:
 
 print( "Total number of runs: ", numscan_tot )
 
+if calc_grs:
+    #growth rates of all runs without an omega file at once from the nrg
+    #files, and for global scans the frequencies from the field files
+    todo = [i+1 for i in range(numscan_tot) if not omega_done('%04d' % (i+1))]
+    gr_table,gr_rates = scan_growth_rates('.',nruns=numscan_tot,only=todo,
+                                          use_field='x_local' in pars and not pars['x_local'])
+
 #Test if global scan
 if 'x_local' in pars and not pars['x_local']:
     scan_info = np.zeros((numscan_tot,14),dtype='float64')
@@ -133,20 +168,18 @@ if 'x_local' in pars and not pars['x_local']:
             scan_info[i,2] = 0.0
         if os.path.isfile('omega_'+scan_num):
             omega0 = np.genfromtxt('omega_'+scan_num)
-            if omega0.any() and omega0[1] != 0.0:
+            if omega_done(scan_num):
                 scan_info[i,4]=omega0[1]
                 scan_info[i,5]=omega0[2]
             elif calc_grs:
-                call(['calc_omega_from_field.py',scan_num])
-                om = np.genfromtxt('omega_'+scan_num)
+                om = field_omega(gr_table,i,scan_num)
                 scan_info[i,4]=om[1]
                 scan_info[i,5]=om[2]
             else:
                 scan_info[i,4]=np.nan
                 scan_info[i,5]=np.nan
         elif calc_grs and os.path.isfile('field_'+scan_num):
-            call(['calc_omega_from_field.py',scan_num])
-            om = np.genfromtxt('omega_'+scan_num)
+            om = field_omega(gr_table,i,scan_num)
             scan_info[i,4]=om[1]
             scan_info[i,5]=om[2]
         else:
@@ -318,11 +351,11 @@ else:
                 scan_info[i,3] = np.nan
         if os.path.isfile('omega_'+scan_num):
             omega0 = np.genfromtxt('omega_'+scan_num)
-            if omega0.any() and omega0[1] != 0.0:
+            if omega_done(scan_num):
                 scan_info[i,4]=omega0[1]
                 scan_info[i,5]=omega0[2]
             elif calc_grs:
-                scan_info[i,4]=calc_gr2('_'+scan_num,nspec=nspec)
+                scan_info[i,4]=nrg_gamma(gr_table,i,scan_num,nspec)
                 scan_info[i,5]= 0.0
                 #np.savetxt('omega_'+scan_num,[scan_info[i,0],scan_info[i,4],np.nan])
                 f=open('omega_'+scan_num,'w')
@@ -332,7 +365,7 @@ else:
                 scan_info[i,4]=np.nan
                 scan_info[i,5]=np.nan
         elif calc_grs and os.path.isfile('nrg_'+scan_num):
-            scan_info[i,4]=calc_gr2('_'+scan_num,nspec=nspec)
+            scan_info[i,4]=nrg_gamma(gr_table,i,scan_num,nspec)
             scan_info[i,5] = 0.0
             np.savetxt('omega_'+scan_num,[scan_info[i,0],scan_info[i,4],np.nan])
         else:
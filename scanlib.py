@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+""" scanlib.py: Tables of the parameters of all runs of a GENE scan
+
+load_scan_parameters parses parameters_0001 ... parameters_NNNN of a scan
+directory (falling back to in_par/parameters_NNNN for runs which have not
+been started) with a process pool and returns one row per run, e.g.
+
+    table = load_scan_parameters('scanfiles0001')
+    plt.plot(table['kymin'], table['x0'], 'x')
+"""
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ParIO import load_parameters
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+SCAN_COLUMNS = ('kymin', 'x0', 'kx_center', 'n0_global')
+
+
+def scan_value(value):
+    """Float of a parameter value; for in_par files the first value of a scan list"""
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    try:
+        return float(str(value).split()[0])
+    except (ValueError, IndexError):
+        return np.nan
+
+
+def scan_dims(pars):
+    """Tuple of the scan dimensions given by scan_dims in pars, () if there is none"""
+    dims = pars.get('scan_dims')
+    if dims is None:
+        return ()
+    return tuple(int(dim) for dim in str(dims).split())
+
+
+def scan_files(scandir, nruns=None):
+    """(run number, parameters file or None) of all runs in scandir"""
+    runs = {}
+    for pattern in ('in_par/parameters_[0-9]*', 'parameters_[0-9]*'):
+        # files of the started runs override those in in_par
+        for path in glob.glob(os.path.join(scandir, pattern)):
+            try:
+                runs[int(path[-4:])] = path
+            except ValueError:
+                pass
+    if nruns is None:
+        nruns = max(runs) if runs else 0
+    return [(run, runs.get(run)) for run in range(1, nruns + 1)]
+
+
+def scan_row(path, columns, defaults):
+    """Values of columns in the parameters file path, nan where missing"""
+    if path is None:
+        return (np.nan,)*len(columns)
+    pardict = load_parameters(path).pardict
+    return tuple(scan_value(pardict[col]) if col in pardict else defaults[col]
+                 for col in columns)
+
+
+def load_scan_parameters(scandir='.', columns=SCAN_COLUMNS, nworkers=None, order='C',
+                         dataframe=False):
+    """Columnar table of the parameters of all runs of a scan
+
+    Returns a structured array with the fields run (run number), in_par (True
+    if the run was read from in_par/), the coordinates scan_dim1, scan_dim2,
+    ... of the run in the scan_dims grid of scandir/parameters (order 'C':
+    the last dimension runs fastest, 'F': the first one) and one float field
+    per parameter in columns. Parameters missing in a run are taken from
+    scandir/parameters, or else nan. With dataframe=True a pandas DataFrame
+    is returned instead. The files are parsed by nworkers processes (default:
+    all cores); nworkers=1 parses them in this process.
+    """
+    pars = {}
+    if os.path.isfile(os.path.join(scandir, 'parameters')):
+        pars = load_parameters(os.path.join(scandir, 'parameters')).pardict
+    dims = scan_dims(pars)
+    runs = scan_files(scandir, int(np.prod(dims)) if dims else None)
+    defaults = dict((col, scan_value(pars[col]) if col in pars else np.nan) for col in columns)
+    paths = [path for run, path in runs]
+    if nworkers is None:
+        nworkers = os.cpu_count() or 1
+    if nworkers == 1 or len(paths) < 2*nworkers:
+        rows = [scan_row(path, columns, defaults) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=nworkers) as pool:
+            rows = list(pool.map(scan_row, paths, [columns]*len(paths), [defaults]*len(paths),
+                                 chunksize=max(1, len(paths)//(4*nworkers))))
+    coordnames = ['scan_dim{}'.format(idim + 1) for idim in range(len(dims))]
+    table = np.zeros(len(runs), dtype=[('run', np.int64), ('in_par', bool)] +
+                     [(name, np.int64) for name in coordnames] +
+                     [(col, np.float64) for col in columns])
+    table['run'] = [run for run, path in runs]
+    table['in_par'] = [path is not None and os.path.basename(os.path.dirname(path)) == 'in_par'
+                       for path in paths]
+    if dims:
+        coords = np.unravel_index(table['run'] - 1, dims, order=order)
+        for name, coord in zip(coordnames, coords):
+            table[name] = coord
+    if rows:
+        values = np.array(rows, dtype=np.float64)
+        for icol, col in enumerate(columns):
+            table[col] = values[:, icol]
+    if dataframe:
+        if pd is None:
+            raise ImportError('dataframe=True needs the pandas package')
+        return pd.DataFrame(table)
+    return table
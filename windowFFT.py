@@ -23,32 +23,52 @@ def windowFFT(tgrid, \
         plt.legend()
         plt.show()
 
-    fgrid = np.linspace(-lf,lf,nf,endpoint = False)
-    field_f = np.empty(0, dtype = 'complex128')
-    for f in fgrid:
-        numerator = 0.
-        denominator = 0.
-        for i in range(len(field) - 1):
-            numerator += 0.5*(field[i] * window[i] * \
-                         np.exp(zi*f*tgrid[i]) + \
-                         field[i + 1] * window[i + 1] * \
-                         np.exp(zi*f*tgrid[i + 1])) * \
-                          (tgrid[i + 1] - tgrid[i])
-            denominator += 0.5 * (window[i] + window[i + 1]) * \
-                          (tgrid[i + 1] - tgrid[i])
-        field_f = np.append(field_f, numerator / denominator)
+    fgrid, field_f = windowFFT_batch(tgrid, field, nf, lf)
     if show_plots:
-        plt.figure()
-        plt.plot(fgrid, abs(field_f), label = 'abs')
-        plt.plot(fgrid, np.real(field_f), '+-', label = 'real')
-        plt.plot(fgrid, np.imag(field_f), '+-', label = 'imag')
-        plt.xlabel('f (cref/Lref)')
-        plt.legend()
-        plt.title(tt)
-        if plot_format == 'display':
-            plt.show()
-        elif plot_format == 'ps':
-            filename = 'f_' + tt + '.ps'
-            fig=plt.gcf()
-            fig.savefig(filename, format = 'ps', bbox_inches = 'tight')
+        plot_windowFFT(fgrid, field_f, tt, plot_format)
     return fgrid, field_f
+
+def windowFFT_batch(tgrid, fields, nf, lf, \
+                    max_elements = 2**22):
+    # windowFFT of a stack of signals fields (..., nt), e.g. all x or all ky
+    # at once; returns fgrid and field_f (..., nf). The trapezoidal integral
+    # over the (possibly nonuniform) tgrid is the product of the windowed,
+    # trapezoid weighted signals with exp(i*f*t), evaluated in chunks of
+    # frequencies of at most max_elements matrix elements
+    nf = int(nf)
+    lf = float(lf)
+    tgrid = np.array(tgrid, dtype = 'float64')
+    fields = np.asarray(fields)
+    tgrid_n = (tgrid - tgrid[0]) / (tgrid[-1] - tgrid[0])
+    window = np.cos(np.pi * tgrid_n - np.pi / 2.)
+    dt = np.diff(tgrid)
+    weights = np.zeros(len(tgrid))
+    weights[:-1] += 0.5 * dt
+    weights[1:] += 0.5 * dt
+    denominator = np.sum(0.5 * (window[:-1] + window[1:]) * dt)
+    signals = (fields * (window * weights)).reshape(-1, len(tgrid))
+    fgrid = np.linspace(-lf,lf,nf,endpoint = False)
+    field_f = np.empty((len(signals), nf), dtype = 'complex128')
+    nfchunk = max(1, max_elements // len(tgrid))
+    for f0 in range(0, nf, nfchunk):
+        kernel = np.exp(zi * np.outer(tgrid, fgrid[f0:f0 + nfchunk]))
+        field_f[:, f0:f0 + nfchunk] = np.dot(signals, kernel)
+    field_f /= denominator
+    return fgrid, field_f.reshape(fields.shape[:-1] + (nf,))
+
+def plot_windowFFT(fgrid, field_f, \
+                   tt = ' ', \
+                   plot_format = 'display'):
+    plt.figure()
+    plt.plot(fgrid, abs(field_f), label = 'abs')
+    plt.plot(fgrid, np.real(field_f), '+-', label = 'real')
+    plt.plot(fgrid, np.imag(field_f), '+-', label = 'imag')
+    plt.xlabel('f (cref/Lref)')
+    plt.legend()
+    plt.title(tt)
+    if plot_format == 'display':
+        plt.show()
+    elif plot_format == 'ps':
+        filename = 'f_' + tt + '.ps'
+        fig=plt.gcf()
+        fig.savefig(filename, format = 'ps', bbox_inches = 'tight')